@@ -0,0 +1,54 @@
+import json
+import os
+from contextlib import contextmanager
+
+# Crash-safe file writes: data goes to <path>.tmp, which is flushed, optionally
+# fsynced, and renamed over <path>. A process killed mid-write leaves the old
+# file intact (plus a stray .tmp), never a truncated one.
+
+
+def fsync_dir(path):
+    """fsync a directory so a rename inside it survives power loss."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding=None, fsync=True):
+    """Open `path` for writing atomically; the new content replaces it only if the block completes.
+
+    fsync=False skips the disk flush: still safe against the process dying,
+    not against power loss. Fine for caches.
+    """
+    tmp_path = f"{path}.tmp"
+    if "b" not in mode and encoding is None:
+        encoding = "utf-8"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def write_json(path, obj, fsync=True, **kwargs):
+    """json.dump `obj` to `path` atomically. Extra keyword arguments go to json.dump."""
+    with atomic_write(path, "w", fsync=fsync) as f:
+        json.dump(obj, f, **kwargs)
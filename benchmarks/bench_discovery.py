@@ -0,0 +1,49 @@
+"""Compare judge discovery over HTTP paging against the Playwright scroll path.
+
+Usage: python benchmarks/bench_discovery.py [--runs N]
+
+Hits the live Kennel Club site, so keep N small.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_pool import pool as browser_pool
+from main import discover_judge_links
+
+
+async def bench(runs):
+    timings = {"http": [], "browser": []}
+    found = {}
+    try:
+        for _ in range(runs):
+            for mode in ("http", "browser"):
+                links, _, elapsed = await discover_judge_links(mode)
+                timings[mode].append(elapsed)
+                found[mode] = set(links)
+    finally:
+        await browser_pool.stop()
+
+    report = {
+        mode: {
+            "runs": len(t),
+            "best_s": round(min(t), 2),
+            "mean_s": round(sum(t) / len(t), 2),
+            "judges": len(found[mode]),
+        }
+        for mode, t in timings.items()
+    }
+    report["speedup"] = round(report["browser"]["mean_s"] / max(report["http"]["mean_s"], 1e-9), 1)
+    report["only_http"] = sorted(found["http"] - found["browser"])
+    report["only_browser"] = sorted(found["browser"] - found["http"])
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=1)
+    asyncio.run(bench(parser.parse_args().runs))
@@ -0,0 +1,174 @@
+"""Benchmark judge page parsing: judge_parser (selectolax) against the original BeautifulSoup code.
+
+Usage: python benchmarks/bench_parse.py [--repeat N] [--fixtures DIR]
+
+Parses every *profile*.html / *appointments*.html fixture, checks both
+implementations return identical results, and reports mean per-page parse time
+plus peak memory growth (each measured in a fresh subprocess so the two
+parsers don't share allocator state).
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import judge_parser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+# The pre-judge_parser implementation, kept here as the reference.
+def bs4_parse_profile(html):
+    from bs4 import BeautifulSoup
+
+    profile_soup = BeautifulSoup(html, "html.parser")
+    name_tag = profile_soup.select_one("div.t-judge-profile__name")
+    raw_name = name_tag.get_text(strip=True) if name_tag else ""
+    match = re.match(r"^(.*?)(?:\s*Breed Judge ID\s*(\d+))?$", raw_name)
+    judge_name = match.group(1).strip() if match else "Unknown"
+    breed_judge_id = match.group(2) if match else None
+
+    address_tag = profile_soup.select_one("dt:-soup-contains('Address') + dd")
+    address = address_tag.get_text(separator=", ", strip=True) if address_tag else None
+
+    approved_breeds = []
+    group_headers = profile_soup.select("h4")
+    for group in group_headers:
+        group_name = group.get_text(strip=True)
+        ul = group.find_next_sibling("ul", class_="t-judge-profile__long-list")
+        if ul:
+            for li in ul.find_all("li"):
+                breed = li.find("a") or li.find("label")
+                level = li.find_all("label")[-1]
+                if breed and level:
+                    approved_breeds.append({
+                        "group": group_name,
+                        "breed": breed.get_text(strip=True),
+                        "level": level.get_text(strip=True)
+                    })
+    return {
+        "judge_name": judge_name,
+        "breed_judge_id": breed_judge_id,
+        "address": address,
+        "approved_breeds": approved_breeds,
+    }
+
+
+def bs4_parse_appointments(html):
+    from bs4 import BeautifulSoup
+
+    appt_soup = BeautifulSoup(html, "html.parser")
+    appointments = []
+    rows = appt_soup.select("table.a-table__table tbody tr")
+    for row in rows:
+        cols = row.find_all(["td", "th"])
+        if len(cols) < 5:
+            continue
+        sex_icon = cols[2].find("svg")
+        sex = None
+        if sex_icon:
+            if "a-icon--female" in sex_icon.get("class", []):
+                sex = "Bitch"
+            elif "a-icon--male" in sex_icon.get("class", []):
+                sex = "Dog"
+        appointments.append({
+            "date": cols[0].get_text(strip=True),
+            "club_name": cols[1].get_text(strip=True),
+            "sex_judged": sex,
+            "dogs_judged": cols[3].get_text(strip=True),
+            "breed_average": cols[4].get_text(strip=True)
+        })
+    return appointments
+
+
+PARSERS = {
+    "bs4": {"profile": bs4_parse_profile, "appointments": bs4_parse_appointments},
+    "selectolax": {"profile": judge_parser.parse_profile, "appointments": judge_parser.parse_appointments},
+}
+
+
+def load_fixtures(fixtures_dir):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        name = os.path.basename(path)
+        kind = "profile" if "profile" in name else "appointments" if "appointment" in name else None
+        if kind:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append((name, kind, f.read()))
+    return pages
+
+
+def time_parser(impl, pages, repeat):
+    timings = {}
+    for name, kind, html in pages:
+        parse = PARSERS[impl][kind]
+        parse(html)  # warm up imports and caches
+        started = time.perf_counter()
+        for _ in range(repeat):
+            parse(html)
+        timings[name] = (time.perf_counter() - started) / repeat
+    return timings
+
+
+def vm_hwm_kb():
+    # ru_maxrss survives fork/exec on Linux, so a child would report the
+    # parent's peak; VmHWM belongs to the child's own address space.
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def peak_memory_kb(impl, fixtures_dir):
+    """Peak memory growth while parsing every fixture once, measured in a child process.
+
+    Returns (rss_kb, python_heap_kb): RSS covers lexbor's native allocations,
+    tracemalloc covers what BeautifulSoup builds on the Python heap.
+    """
+    code = (
+        "import json, sys, tracemalloc; sys.path.insert(0, %r); "
+        "import bs4, selectolax.lexbor; "
+        "import bench_parse as b; pages = b.load_fixtures(%r); "
+        "before = b.vm_hwm_kb(); tracemalloc.start(); "
+        "results = [b.PARSERS[%r][kind](html) for _, kind, html in pages]; "
+        "print(json.dumps([b.vm_hwm_kb() - before, tracemalloc.get_traced_memory()[1] // 1024]))"
+    ) % (os.path.dirname(os.path.abspath(__file__)), fixtures_dir, impl)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures)
+    identical = all(
+        PARSERS["bs4"][kind](html) == PARSERS["selectolax"][kind](html)
+        for _, kind, html in pages
+    )
+
+    report = {"fixtures": len(pages), "identical_results": identical, "pages": {}}
+    timings = {impl: time_parser(impl, pages, args.repeat) for impl in PARSERS}
+    for name, _, html in pages:
+        report["pages"][name] = {
+            "bytes": len(html.encode("utf-8")),
+            **{f"{impl}_ms": round(timings[impl][name] * 1000, 3) for impl in PARSERS},
+            "speedup": round(timings["bs4"][name] / timings["selectolax"][name], 1),
+        }
+    for impl in PARSERS:
+        rss_kb, heap_kb = peak_memory_kb(impl, args.fixtures)
+        report[f"{impl}_peak_rss_growth_kb"] = rss_kb
+        report[f"{impl}_peak_python_heap_kb"] = heap_kb
+    print(json.dumps(report, indent=2))
+    if not identical:
+        sys.exit(1)
@@ -0,0 +1,246 @@
+"""End-to-end benchmark of the judge and critique pipelines, fully offline.
+
+Usage: python benchmarks/bench_pipeline.py [--scales 10,500,5000] [--pipelines judges,critiques]
+                                           [--concurrency N] [--warm] [--out FILE] [--compare FILE]
+
+Serves a synthetic corpus built from benchmarks/fixtures (see fixture_server)
+and a fake Google Drive, then runs fetch_golden_judges and
+scrape_brazenbeacon_critiques against them at each scale. Every run happens in
+a fresh subprocess and working directory, so peak RSS and on-disk state are
+per run. With --warm each scale is run a second time against the state the
+first run left behind (HTTP cache, judge store, critique log).
+
+Reports wall-clock, requests and requests/sec, parse CPU, total CPU, Drive API
+calls and peak RSS, and writes them to benchmarks/results/ (or --out) as JSON.
+--compare prints wall-clock and CPU ratios against an earlier results file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from fixture_server import CRITIQUE_PAGE_SIZE, JUDGE_PAGE_SIZE, serve_drive, serve_site
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+RESULT_PREFIX = "BENCH_RESULT "
+
+KC_BASE_URL = "https://www.thekennelclub.org.uk"
+CRITIQUES_BASE_URL = "https://kcjudgescritiques.org.uk"
+
+
+def vm_hwm_kb():
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def cpu_seconds(who=resource.RUSAGE_SELF):
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def time_calls(module, names, totals):
+    """Wrap module.<name> for each name so its thread CPU time is added to totals["parse_cpu_s"]."""
+    for name in names:
+        func = getattr(module, name)
+
+        def timed(*args, _func=func, **kwargs):
+            started = time.thread_time()
+            try:
+                return _func(*args, **kwargs)
+            finally:
+                totals["parse_cpu_s"] += time.thread_time() - started
+
+        setattr(module, name, timed)
+
+
+# ---------------------------------------------
+# CHILD: one pipeline run
+# ---------------------------------------------
+def run_child(pipeline, scale, site_url, concurrency):
+    sys.path.insert(0, REPO_ROOT)
+    totals = {"parse_cpu_s": 0.0}
+
+    if pipeline == "judges":
+        import main
+
+        base = f"{site_url}/kc/{scale}"
+        main.BASE_URL = base
+        main.JUDGE_URL = main.JUDGE_URL.replace(KC_BASE_URL, base)
+        # Profiles and appointments are parsed in parser processes, counted below.
+        time_calls(main, ["parse_judge_cards"], totals)
+        run = main.fetch_golden_judges(concurrency=concurrency, discovery="http")
+    else:
+        import brazenbeacon_critiques_scraper as critiques
+
+        base = f"{site_url}/critiques/{scale}"
+        critiques.BASE_URL = base
+        critiques.LISTING_URL = critiques.LISTING_URL.replace(CRITIQUES_BASE_URL, base)
+        time_calls(critiques, ["parse_listing_html", "parse_critique_html"], totals)
+        run = critiques.scrape_brazenbeacon_critiques()
+
+    cpu_before = cpu_seconds()
+    started = time.perf_counter()
+    stats = asyncio.run(run)
+    wall = time.perf_counter() - started
+    # Parser processes only show up in RUSAGE_CHILDREN once they have exited.
+    children_cpu = 0.0
+    if pipeline == "judges":
+        main.parse_pool.shutdown()
+        children_cpu = cpu_seconds(resource.RUSAGE_CHILDREN)
+        totals["parse_cpu_s"] += children_cpu
+
+    if pipeline == "critiques":
+        log = critiques.CritiqueLog()
+        stats = {"critiques": len(log.seen_urls()), "segments": len(log.segments())}
+
+    result = {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu_seconds() - cpu_before + children_cpu, 3),
+        "parse_cpu_s": round(totals["parse_cpu_s"], 3),
+        "peak_rss_mb": round(vm_hwm_kb() / 1024, 1),
+        "stats": stats,
+    }
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+# ---------------------------------------------
+# PARENT: servers, subprocesses, report
+# ---------------------------------------------
+def git_revision():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_once(pipeline, scale, workdir, site, drive, args):
+    site.reset()
+    drive.calls.clear()
+    env = {
+        **os.environ,
+        "DRIVE_API_ENDPOINT": drive.url,
+        "GDRIVE_FOLDER_ID": "bench",
+        # The limiter exists to be polite to the live site; the fixture server doesn't need it.
+        "JUDGE_RATE_PER_HOST": "0",
+        # Page caps sized to the corpus so every judge/critique is reachable.
+        "JUDGE_LIST_MAX_PAGES": str(scale // JUDGE_PAGE_SIZE + 2),
+        "CRITIQUE_MAX_PAGES": str(scale // CRITIQUE_PAGE_SIZE + 2),
+        "PYTHONUNBUFFERED": "1",
+    }
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", pipeline, str(scale),
+           "--site", site.url, "--concurrency", str(args.concurrency)]
+    out = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+    lines = [l for l in out.stdout.splitlines() if l.startswith(RESULT_PREFIX)]
+    if out.returncode != 0 or not lines:
+        sys.stderr.write(out.stdout[-4000:] + out.stderr[-4000:])
+        raise RuntimeError(f"{pipeline} at scale {scale} failed (exit {out.returncode})")
+
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+    requests = sum(site.calls.values())
+    return {
+        "pipeline": pipeline,
+        "scale": scale,
+        "wall_s": result["wall_s"],
+        "requests": requests,
+        "requests_by_page": dict(site.calls),
+        "requests_per_sec": round(requests / result["wall_s"], 1) if result["wall_s"] else None,
+        "parse_cpu_s": result["parse_cpu_s"],
+        "cpu_s": result["cpu_s"],
+        "drive_calls": sum(drive.calls.values()),
+        "drive_calls_by_method": dict(drive.calls),
+        "drive_mb_uploaded": round(drive.bytes_uploaded / (1024 * 1024), 2),
+        "peak_rss_mb": result["peak_rss_mb"],
+        "stats": result["stats"],
+    }
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    key = lambda r: (r["pipeline"], r["scale"], r.get("pass", "cold"))
+    old = {key(r): r for r in baseline["runs"]}
+    print(f"Compared with {baseline_path} ({baseline.get('git_revision')}):", file=sys.stderr)
+    for run in report["runs"]:
+        prev = old.get(key(run))
+        if not prev:
+            continue
+        ratios = {
+            metric: round(run[metric] / prev[metric], 2) if prev[metric] else None
+            for metric in ("wall_s", "cpu_s", "parse_cpu_s", "peak_rss_mb")
+        }
+        label = "/".join(str(k) for k in key(run))
+        print(f"  {label}: " + ", ".join(f"{m} x{r}" for m, r in ratios.items()), file=sys.stderr)
+
+
+def main(args):
+    site, drive = serve_site(), serve_drive()
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "concurrency": args.concurrency,
+        "runs": [],
+    }
+    try:
+        for pipeline in args.pipelines:
+            for scale in args.scales:
+                with tempfile.TemporaryDirectory(prefix=f"bench-{pipeline}-{scale}-") as workdir:
+                    drive.reset()
+                    passes = ("cold", "warm") if args.warm else ("cold",)
+                    for run_pass in passes:
+                        run = run_once(pipeline, scale, workdir, site, drive, args)
+                        run["pass"] = run_pass
+                        report["runs"].append(run)
+                        print(f"{pipeline:>9} {scale:>6} {run_pass}: {run['wall_s']:.2f}s, "
+                              f"{run['requests_per_sec']} req/s, parse {run['parse_cpu_s']:.2f}s CPU, "
+                              f"{run['drive_calls']} Drive calls, {run['peak_rss_mb']} MB peak", file=sys.stderr)
+    finally:
+        site.shutdown()
+        drive.shutdown()
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"pipeline-{report['git_revision'] or 'unknown'}-{stamp}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Saved {out}", file=sys.stderr)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=lambda s: [int(x) for x in s.split(",")], default=[10, 500, 5000])
+    parser.add_argument("--pipelines", type=lambda s: s.split(","), default=["judges", "critiques"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warm", action="store_true", help="also time a second run over the first run's state")
+    parser.add_argument("--out")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--child", nargs=2, metavar=("PIPELINE", "SCALE"), help=argparse.SUPPRESS)
+    parser.add_argument("--site", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), args.site, args.concurrency)
+    else:
+        main(args)
@@ -0,0 +1,68 @@
+"""Measure cold-start time: launching uvicorn until the first `/` response.
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+
+Also reports the bare `import main` time in a fresh interpreter. Run it with
+and without GOOGLE_SERVICE_ACCOUNT_BASE64 set to check credentials stay off the
+startup path.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_response(timeout=60):
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("no response from / within timeout")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def import_time():
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=REPO_ROOT, check=True,
+                   stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    runs = parser.parse_args().runs
+
+    first_response = [time_to_first_response() for _ in range(runs)]
+    imports = [import_time() for _ in range(runs)]
+    print(json.dumps({
+        "runs": runs,
+        "first_response_s": {"best": round(min(first_response), 3), "mean": round(sum(first_response) / runs, 3)},
+        "import_main_s": {"best": round(min(imports), 3), "mean": round(sum(imports) / runs, 3)},
+    }, indent=2))
@@ -0,0 +1,64 @@
+"""Check the HTTP critique parser against the browser extractor on the critique fixtures.
+
+Usage: python benchmarks/check_critique_text.py [--fixtures DIR]
+
+Loads every critique*.html fixture into Chromium, reads the fields with the
+same script the browser fallback uses (innerText), and compares them with
+parse_critique_html. Exits non-zero on any difference, printing both texts.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from playwright.async_api import async_playwright
+
+from brazenbeacon_critiques_scraper import CRITIQUE_SELECTORS, EXTRACT_FIELDS_JS, parse_critique_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def http_fields(html):
+    detail = parse_critique_html(html, "fixture")
+    return {name: detail[name] for name in CRITIQUE_SELECTORS} if detail else None
+
+
+async def browser_fields(page, html):
+    await page.set_content(html, wait_until="domcontentloaded")
+    fields = await page.evaluate(EXTRACT_FIELDS_JS, CRITIQUE_SELECTORS)
+    fields["critique"] = fields["critique"].strip()
+    return fields
+
+
+async def main(fixtures_dir):
+    report = {}
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page()
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, "critique*.html"))):
+            with open(path, "r", encoding="utf-8") as f:
+                html = f.read()
+            if "field--name-body" not in html:
+                continue
+            expected, got = await browser_fields(page, html), http_fields(html)
+            report[os.path.basename(path)] = {
+                "identical": expected == got,
+                **({} if expected == got else {"browser": expected, "http": got}),
+            }
+        await browser.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=FIXTURES)
+    args = parser.parse_args()
+    report = asyncio.run(main(args.fixtures))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if not report or not all(r["identical"] for r in report.values()):
+        sys.exit(1)
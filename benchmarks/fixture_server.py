@@ -0,0 +1,289 @@
+"""Local stand-ins for the Kennel Club site, kcjudgescritiques.org.uk and Google Drive.
+
+Pages are built from the recorded fixtures in benchmarks/fixtures, with judge
+and critique IDs substituted so a corpus of any size can be served. The corpus
+size is part of the URL: the Kennel Club site with N Golden Retriever judges is
+served under /kc/<N> and the critique site with N critiques under /critiques/<N>.
+Every page carries an ETag and honours If-None-Match, like the real sites.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Judge listing and critique listing page sizes on the live sites.
+JUDGE_PAGE_SIZE = 12
+CRITIQUE_PAGE_SIZE = 20
+# Appointment rows per judge cycle through 1..APPOINTMENTS_CYCLE, taken from the recorded table.
+APPOINTMENTS_CYCLE = 40
+
+# IDs and names used in the recorded pages, replaced per synthetic judge/critique.
+SAMPLE_JUDGE_ID = "3f2a9c1e-0b7d-e811-a8a3-002248005d25"
+SAMPLE_JUDGE_NAME = "Mrs Jane Example"
+SAMPLE_BREED_JUDGE_ID = "104233"
+SAMPLE_CRITIQUE_PATH = "/critique/example-championship-show-2024-retriever-golden"
+SAMPLE_SHOW_NAME = "Example Championship Show 2024"
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _split_block(html, marker):
+    """Split a page around its <!-- marker --> ... <!-- /marker --> block."""
+    start, end = f"<!-- {marker} -->", f"<!-- /{marker} -->"
+    head, rest = html.split(start, 1)
+    block, tail = rest.split(end, 1)
+    return head, block, tail
+
+
+class FixtureCorpus:
+    def __init__(self):
+        self.listing_head, self.card, self.listing_tail = _split_block(_read("judge_listing.html"), "card")
+        self.profile = _read("judge_profile.html")
+        appointments = _read("judge_appointments.html")
+        body_start = appointments.index("<tbody>") + len("<tbody>")
+        body_end = appointments.index("</tbody>")
+        self.appointments_head = appointments[:body_start]
+        self.appointments_tail = appointments[body_end:]
+        self.appointment_rows = re.findall(r"<tr>.*?</tr>", appointments[body_start:body_end], re.S)
+        self.critique_head, self.critique_row, self.critique_tail = _split_block(_read("critique_listing.html"), "row")
+        self.critique = _read("critique.html")
+
+    @staticmethod
+    def judge_id(i):
+        return f"{i:08x}" + SAMPLE_JUDGE_ID[8:]
+
+    @staticmethod
+    def judge_index(judge_id):
+        return int(judge_id[:8], 16)
+
+    def judge_listing(self, judges, offset):
+        cards = "".join(
+            self.card.replace(SAMPLE_JUDGE_ID, self.judge_id(i)).replace(SAMPLE_JUDGE_NAME, f"Judge {i}")
+            for i in range(offset, min(offset + JUDGE_PAGE_SIZE, judges))
+        )
+        return self.listing_head + cards + self.listing_tail
+
+    def judge_profile(self, judge_id):
+        i = self.judge_index(judge_id)
+        return (self.profile
+                .replace(SAMPLE_JUDGE_NAME, f"Judge {i}")
+                .replace(SAMPLE_BREED_JUDGE_ID, str(100000 + i)))
+
+    def judge_appointments(self, judge_id):
+        rows = self.appointment_rows[:1 + self.judge_index(judge_id) % APPOINTMENTS_CYCLE]
+        return self.appointments_head + "".join(rows) + self.appointments_tail
+
+    def critique_listing(self, critiques, page_no):
+        offset = page_no * CRITIQUE_PAGE_SIZE
+        rows = "".join(
+            self.critique_row.replace(SAMPLE_CRITIQUE_PATH, f"/critique/{i}").replace(SAMPLE_SHOW_NAME, f"Show {i}")
+            for i in range(offset, min(offset + CRITIQUE_PAGE_SIZE, critiques))
+        )
+        return self.critique_head + rows + self.critique_tail
+
+    def critique_page(self, i):
+        return self.critique.replace(SAMPLE_SHOW_NAME, f"Show {i}")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.lock = threading.Lock()
+        self.calls = Counter()
+
+    def count(self, key):
+        with self.lock:
+            self.calls[key] += 1
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # responses stall on Nagle + delayed ACK and the server becomes the bottleneck.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+
+class SiteHandler(_Handler):
+    corpus = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        m = re.match(r"^/(kc|critiques)/(\d+)(/.*)$", url.path)
+        if not m:
+            return self.send_body("not found", "text/plain", 404)
+        site, size, path = m.group(1), int(m.group(2)), m.group(3)
+
+        page = None
+        if site == "kc":
+            judge_id = query.get("JudgeId", [""])[0]
+            if path.endswith("/judge-appointment/") and judge_id:
+                kind, page = "judge_appointments", self.corpus.judge_appointments(judge_id)
+            elif path.endswith("/judge-profile/") and judge_id:
+                kind, page = "judge_profile", self.corpus.judge_profile(judge_id)
+            elif path.endswith("/find-a-judge/"):
+                offset = int(query.get("TotalResults", ["0"])[0] or 0)
+                kind, page = "judge_listing", self.corpus.judge_listing(size, offset)
+        else:
+            if path.startswith("/critique-listing/"):
+                page_no = int(query.get("page", ["0"])[0] or 0)
+                kind, page = "critique_listing", self.corpus.critique_listing(size, page_no)
+            elif (cm := re.match(r"^/critique/(\d+)$", path)) and int(cm.group(1)) < size:
+                kind, page = "critique", self.corpus.critique_page(int(cm.group(1)))
+        if page is None:
+            return self.send_body("not found", "text/plain", 404)
+
+        self.server.count(kind)
+        etag = '"%s"' % hashlib.md5(page.encode("utf-8")).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            return self.send_body(b"", "text/html; charset=utf-8", 304, {"ETag": etag})
+        self.send_body(page, "text/html; charset=utf-8", headers={"ETag": etag})
+
+
+def _multipart(body, content_type):
+    """(metadata, media bytes) from a multipart/related Drive upload."""
+    boundary = re.search(r'boundary="?([^";]+)', content_type)
+    if not boundary:
+        return {}, body
+    parts = [p for p in body.split(b"--" + boundary.group(1).encode()) if p.strip() not in (b"", b"--")]
+    meta = re.split(rb"\r?\n\r?\n", parts[0], 1)[1].strip()
+    media = re.split(rb"\r?\n\r?\n", parts[1], 1)[1].rstrip(b"\r\n") if len(parts) > 1 else b""
+    return json.loads(meta or b"{}"), media
+
+
+class DriveHandler(_Handler):
+    """Just enough of Drive v3 for DriveSync: files.list, files.create and files.update,
+    as simple multipart uploads or resumable sessions uploaded in chunks."""
+
+    def _json(self, obj, status=200):
+        self.send_body(json.dumps(obj), "application/json", status)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _read_upload(self):
+        return _multipart(self._body(), self.headers.get("Content-Type", ""))
+
+    def _resumable(self):
+        return parse_qs(urlparse(self.path).query).get("uploadType") == ["resumable"]
+
+    def _start_session(self, file_id=None):
+        meta = json.loads(self._body() or b"{}")
+        with self.server.lock:
+            session = f"s{len(self.server.sessions) + 1}"
+            self.server.sessions[session] = {"name": meta.get("name"), "file_id": file_id,
+                                             "md5": hashlib.md5(), "size": 0}
+        host = self.headers.get("Host")
+        self.send_body(b"", "application/json", headers={"Location": f"http://{host}/upload/session/{session}"})
+
+    def _save(self, file_id, name, md5, size):
+        with self.server.lock:
+            if file_id is None:
+                file_id = f"file{len(self.server.files) + 1}"
+                self.server.files[file_id] = {"name": name}
+            self.server.files[file_id].update(md5=md5, size=size)
+            self.server.bytes_uploaded += size
+        self._json({"id": file_id, "md5Checksum": md5})
+
+    def do_GET(self):
+        self.server.count("list")
+        self._json({"files": [
+            {"id": file_id, "name": f["name"], "md5Checksum": f["md5"]}
+            for file_id, f in self.server.files.items()
+        ]})
+
+    def do_POST(self):
+        self.server.count("create")
+        if self._resumable():
+            return self._start_session()
+        meta, media = self._read_upload()
+        self._save(None, meta.get("name"), hashlib.md5(media).hexdigest(), len(media))
+
+    def do_PATCH(self):
+        self.server.count("update")
+        file_id = urlparse(self.path).path.rsplit("/", 1)[1]
+        if file_id not in self.server.files:
+            self._body()
+            return self._json({"error": {"code": 404, "message": f"File not found: {file_id}"}}, 404)
+        if self._resumable():
+            return self._start_session(file_id)
+        _, media = self._read_upload()
+        self._save(file_id, None, hashlib.md5(media).hexdigest(), len(media))
+
+    def do_PUT(self):
+        """One chunk of a resumable session: 308 until the last byte arrives."""
+        self.server.count("chunk")
+        session = self.server.sessions.get(urlparse(self.path).path.rsplit("/", 1)[1])
+        chunk = self._body()
+        if session is None:
+            return self._json({"error": {"code": 404, "message": "Upload session not found"}}, 404)
+        session["md5"].update(chunk)
+        session["size"] += len(chunk)
+        total = self.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+        if total.isdigit() and session["size"] >= int(total):
+            return self._save(session["file_id"], session["name"], session["md5"].hexdigest(), session["size"])
+        self.send_body(b"", "text/plain", 308, headers={"Range": f"bytes=0-{session['size'] - 1}"})
+
+
+class _DriveServer(_Server):
+    def __init__(self, handler):
+        super().__init__(handler)
+        self.files = {}
+        self.sessions = {}
+        self.bytes_uploaded = 0
+
+    def reset(self):
+        super().reset()
+        with self.lock:
+            self.files.clear()
+            self.sessions.clear()
+            self.bytes_uploaded = 0
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_site(corpus=None):
+    """Start the fixture site in a background thread. `server.url` is its base URL."""
+    handler = type("BoundSiteHandler", (SiteHandler,), {"corpus": corpus or FixtureCorpus()})
+    return _serve(_Server(handler))
+
+
+def serve_drive():
+    """Start the fake Drive API in a background thread; point DRIVE_API_ENDPOINT at `server.url`."""
+    return _serve(_DriveServer(DriveHandler))
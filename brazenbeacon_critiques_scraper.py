@@ -1,174 +1,382 @@
 import asyncio
-from playwright.async_api import async_playwright
-import json
+import httpx
+import re
+from urllib.parse import urlencode
+from selectolax.lexbor import LexborHTMLParser
 import os
 from datetime import datetime
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google.oauth2 import service_account
+from browser_pool import pool as browser_pool
+from columnar_export import ANALYTICS_EXPORT, CRITIQUES_FILE, EXPORT_DIR, PARQUET_MIME, export_critiques
+from critique_index import CRITIQUE_INDEX_DB, build_critique_index
+from critique_log import CritiqueLog
+from drive_utils import drive_sync, upload_to_drive
+from jobs import progress
+from metrics import BROWSER_FALLBACKS, ERRORS, RETRIES, SKIPS, count_page, span
+from request_policy import RequestPolicy, backoff_delay
 
 BASE_URL = "https://kcjudgescritiques.org.uk"
 SEARCH_TERM = "Brazenbeacon Artemis"
+LISTING_URL = f"{BASE_URL}/critique-listing/"
+# Pre-JSONL output files, imported into the critique log on first run
 OUTPUT_FILE = "brazenbeacon_critiques.json"
 SEEN_FILE = "brazenbeacon_critiques_seen.json"
 
-def upload_to_drive(local_path, mime_type="application/json"):
-    SCOPES = ["https://www.googleapis.com/auth/drive.file"]
-    creds = service_account.Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
-    drive_service = build("drive", "v3", credentials=creds)
+# Comma-separated dog names, kennel affixes or judges to search for.
+SEARCH_TERMS = [t.strip() for t in os.environ.get("CRITIQUE_SEARCH_TERMS", SEARCH_TERM).split(",") if t.strip()]
+# Hard cap on result pages walked per search term.
+CRITIQUE_MAX_PAGES = int(os.environ.get("CRITIQUE_MAX_PAGES", "100"))
 
-    fname = os.path.basename(local_path)
-    folder_id = os.environ.get("GDRIVE_FOLDER_ID")
-    if not os.path.exists(local_path) or not folder_id:
-        print(f"[ERROR] Missing file or GDRIVE_FOLDER_ID: {local_path}")
-        return
+# Number of critique pages fetched at once (HTTP requests, or browser pages on fallback).
+CRITIQUE_WORKERS = int(os.environ.get("CRITIQUE_WORKERS", "4"))
 
+# Per-host request rate for the critique site; 0 leaves pacing to the adaptive concurrency limit.
+CRITIQUE_RATE_PER_HOST = float(os.environ.get("CRITIQUE_RATE_PER_HOST", "0"))
+
+# Field -> selector on a critique node page. Shared by the HTTP parser and the browser fallback.
+CRITIQUE_SELECTORS = {
+    "show_name": "h1.page-title",
+    "breed": "div.field--name-field-breed span",
+    "judge": "div.field--name-field-judge span",
+    "show_date": "div.field--name-field-date span",
+    "published_date": "div.field--name-field-published span",
+    "critique": "div.field--name-body",
+}
+
+# Reads every field in one round-trip; missing fields come back as null.
+EXTRACT_FIELDS_JS = """
+(selectors) => {
+    const fields = {};
+    for (const [name, sel] of Object.entries(selectors)) {
+        const el = document.querySelector(sel);
+        fields[name] = el ? el.innerText : null;
+    }
+    return fields;
+}
+"""
+
+# Elements rendered as blocks by the browser's default stylesheet. innerText
+# puts a line break around each one, and a blank line around paragraphs.
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "pre", "section",
+    "table", "tr", "ul",
+}
+SKIPPED_TAGS = {"script", "style", "template", "noscript", "-comment"}
+# Placeholders for the line breaks required around blocks (\x01) and paragraphs (\x02).
+_BREAK_RUN = re.compile(r"[ \n]*[\x01\x02][\x01\x02 \n]*")
+# Collapsible white space; unlike \s, a no-break space is kept, as in the browser.
+_SPACE_RUN = re.compile(r"[ \t\n\r\f]+")
+
+def _inner_text_parts(node, parts):
+    for child in node.iter(include_text=True):
+        tag = child.tag
+        if tag == "-text":
+            parts.append(_SPACE_RUN.sub(" ", child.text_content or ""))
+        elif tag == "br":
+            parts.append("\n")
+        elif tag not in SKIPPED_TAGS:
+            mark = "\x02" if tag == "p" else "\x01" if tag in BLOCK_TAGS else ""
+            parts.append(mark)
+            _inner_text_parts(child, parts)
+            parts.append(mark)
+
+def inner_text(node):
+    """Approximate the browser's innerText: every child in document order, whitespace collapsed,
+    <br> and blocks on new lines, paragraphs separated by a blank line."""
+    parts = []
+    _inner_text_parts(node, parts)
+    text = _BREAK_RUN.sub(lambda m: "\n\n" if "\x02" in m.group() else "\n", "".join(parts))
+    lines = (re.sub(" +", " ", line).strip(" ") for line in text.split("\n"))
+    return "\n".join(lines).strip()
+
+def parse_critique_html(html, url):
+    """Parse a server-rendered critique page. Returns None if the node or any field is missing."""
+    tree = LexborHTMLParser(html)
+    if tree.css_first("div.node__content") is None:
+        return None
+    fields = {}
+    for name, sel in CRITIQUE_SELECTORS.items():
+        node = tree.css_first(sel)
+        if node is None:
+            return None
+        fields[name] = inner_text(node)
+    return {"url": url, "scraped_at": datetime.utcnow().isoformat(), **fields}
+
+async def fetch_critique_http(client, url):
+    """Fast path: plain GET + parse. Returns None when the page needs a real browser."""
     try:
-        res = drive_service.files().list(
-            q=f"name='{fname}' and trashed=false and '{folder_id}' in parents",
-            spaces="drive",
-            fields="files(id, name)"
-        ).execute()
-
-        if res["files"]:
-            file_id = res["files"][0]["id"]
-            drive_service.files().update(
-                fileId=file_id,
-                media_body=MediaFileUpload(local_path, mimetype=mime_type)
-            ).execute()
-            print(f"[INFO] Updated {fname} on Google Drive.")
-        else:
-            file = drive_service.files().create(
-                body={"name": fname, "parents": [folder_id]},
-                media_body=MediaFileUpload(local_path, mimetype=mime_type),
-                fields="id, webViewLink"
-            ).execute()
-            print(f"[INFO] Uploaded {fname}. Link: {file['webViewLink']}")
-    except Exception as e:
-        print(f"[ERROR] Google Drive upload failed: {e}")
+        with span("fetch", "critiques", kind="critique", url=url):
+            resp = await client.get(url)
+    except httpx.HTTPError as e:
+        print(f"[WARN] HTTP fetch failed for {url}: {e}")
+        return None
+    count_page("critiques", "critique", resp.status_code, len(resp.content))
+    if resp.status_code != 200:
+        print(f"[WARN] HTTP {resp.status_code} for {url}, falling back to browser.")
+        return None
+    with span("parse", "critiques", kind="critique"):
+        detail = parse_critique_html(resp.text, url)
+    if detail is None:
+        print(f"[WARN] Expected fields missing for {url}, falling back to browser.")
+    return detail
 
-async def extract_critique_with_retry(context, url, max_retries=1):
+async def extract_critique(page, url):
+    await page.goto(url, wait_until="domcontentloaded")
+    await page.wait_for_selector("div.node__content", timeout=8000)
+    fields = await page.evaluate(EXTRACT_FIELDS_JS, CRITIQUE_SELECTORS)
+    missing = [k for k, v in fields.items() if v is None]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    fields["critique"] = fields["critique"].strip()
+    return {"url": url, "scraped_at": datetime.utcnow().isoformat(), **fields}
+
+async def extract_critique_with_retry(page, url, max_retries=2, base_delay=1.0):
     for attempt in range(max_retries + 1):
         try:
-            page = await context.new_page()
-            await page.goto(url, wait_until="domcontentloaded")
-            await page.wait_for_selector("div.node__content", timeout=8000)
-
-            data = {
-                "url": url,
-                "scraped_at": datetime.utcnow().isoformat(),
-                "show_name": await page.inner_text("h1.page-title"),
-                "breed": await page.inner_text("div.field--name-field-breed span"),
-                "judge": await page.inner_text("div.field--name-field-judge span"),
-                "show_date": await page.inner_text("div.field--name-field-date span"),
-                "published_date": await page.inner_text("div.field--name-field-published span"),
-                "critique": (await page.inner_text("div.field--name-body")).strip()
-            }
-
-            await page.close()
-            return data
+            with span("browser", "critiques", kind="critique", url=url):
+                return await extract_critique(page, url)
         except Exception as e:
             print(f"[WARN] Error fetching {url} (attempt {attempt + 1}): {e}")
             if attempt == max_retries:
                 return None
+            RETRIES.inc(pipeline="critiques")
+            await asyncio.sleep(backoff_delay(attempt, base=base_delay))
 
-async def scrape_brazenbeacon_critiques():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-
-        # Remove modals early: cookie + T&Cs
-        await context.add_init_script("""
-            (() => {
-                const removeEl = (sel) => {
-                    const el = document.querySelector(sel);
-                    if (el) el.remove();
-                };
-                const observer = new MutationObserver(() => {
-                    removeEl('#qc-cmp2-container');
-                    removeEl('div#popup');
-                    removeEl('div.popup-overlay');
-                    removeEl('div.popup-content');
-                });
-                observer.observe(document, { childList: true, subtree: true });
-                // Run once in case they're already present
-                removeEl('#qc-cmp2-container');
-                removeEl('div#popup');
-                removeEl('div.popup-overlay');
-                removeEl('div.popup-content');
-            })();
-        """)
+async def extract_critiques_browser(context, urls, workers=CRITIQUE_WORKERS):
+    """Scrape `urls` with a pool of reusable browser pages. Returns {url: detail or None}."""
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    details = {}
 
+    async def worker():
         page = await context.new_page()
-        print("[INFO] Visiting site...")
-        await page.goto(f"{BASE_URL}/critique-listing/", wait_until="domcontentloaded")
+        try:
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                print(f"[SCRAPING] {url} (browser)")
+                details[url] = await extract_critique_with_retry(page, url)
+        finally:
+            await page.close()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(urls))))))
+    return details
+
+async def extract_critiques(client, browser, urls, workers=CRITIQUE_WORKERS):
+    """Fetch critiques over plain HTTP, sending only the pages that need a browser to `browser`."""
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def fetch(url):
+        async with semaphore:
+            print(f"[SCRAPING] {url}")
+            detail = await fetch_critique_http(client, url)
+            progress(advance=1)
+            return url, detail
+
+    details = dict(await asyncio.gather(*(fetch(url) for url in urls)))
+
+    fallback = [url for url in urls if details[url] is None]
+    if fallback:
+        print(f"[INFO] {len(fallback)} of {len(urls)} critiques need the browser.")
+        BROWSER_FALLBACKS.inc(len(fallback), pipeline="critiques", kind="critique")
+        details.update(await extract_critiques_browser(await browser.context(), fallback, workers))
+    return details
+
+# ---------------------------------------------
+# SEARCH RESULT LISTING
+# ---------------------------------------------
+# Remove modals early: cookie + T&Cs
+REMOVE_MODALS_JS = """
+    (() => {
+        const removeEl = (sel) => {
+            const el = document.querySelector(sel);
+            if (el) el.remove();
+        };
+        const observer = new MutationObserver(() => {
+            removeEl('#qc-cmp2-container');
+            removeEl('div#popup');
+            removeEl('div.popup-overlay');
+            removeEl('div.popup-content');
+        });
+        observer.observe(document, { childList: true, subtree: true });
+        // Run once in case they're already present
+        removeEl('#qc-cmp2-container');
+        removeEl('div#popup');
+        removeEl('div.popup-overlay');
+        removeEl('div.popup-content');
+    })();
+"""
+
+class LazyBrowser:
+    """Leases a context from the shared browser pool on first use, so runs served
+    entirely over HTTP never touch the browser."""
+
+    def __init__(self):
+        self._context = None
+
+    async def context(self):
+        if self._context is None:
+            self._context = await browser_pool.acquire(init_script=REMOVE_MODALS_JS)
+        return self._context
+
+    async def close(self):
+        if self._context is not None:
+            await browser_pool.release(self._context)
+        self._context = None
 
+def listing_url(term, page_no):
+    return f"{LISTING_URL}?{urlencode({'Keyword': term, 'page': page_no})}"
+
+def absolute_url(href):
+    return href if href.startswith("http") else BASE_URL + href
+
+def parse_listing_html(html):
+    """Critique URLs on one result page; None if this isn't a rendered listing (e.g. a consent wall)."""
+    tree = LexborHTMLParser(html)
+    rows = tree.css("div.views-row")
+    if not rows and tree.css_first('input[name="Keyword"]') is None:
+        return None
+    urls = []
+    for row in rows:
+        a_tag = row.css_first("a[href]")
+        if a_tag:
+            urls.append(absolute_url(a_tag.attributes["href"]))
+    return urls
+
+async def save_debug_dump(page):
+    await page.screenshot(path="debug.png", full_page=True)
+    content = await page.content()
+    with open("page_dump.html", "w", encoding="utf-8") as f:
+        f.write(content)
+    print("[DEBUG] Saved debug screenshot and HTML dump.")
+    upload_to_drive("debug.png", mime_type="image/png")
+    upload_to_drive("page_dump.html", mime_type="text/html")
+
+async def fetch_listing_page(client, browser, term, page_no):
+    url = listing_url(term, page_no)
+    try:
+        with span("fetch", "critiques", kind="listing", url=url):
+            resp = await client.get(url)
+        count_page("critiques", "listing", resp.status_code, len(resp.content))
+        if resp.status_code == 200:
+            with span("parse", "critiques", kind="listing"):
+                urls = parse_listing_html(resp.text)
+            if urls is not None:
+                return urls
+        print(f"[WARN] Listing for '{term}' page {page_no} not usable over HTTP ({resp.status_code}), falling back to browser.")
+    except httpx.HTTPError as e:
+        print(f"[WARN] Listing fetch failed for '{term}' page {page_no}: {e}")
+    BROWSER_FALLBACKS.inc(pipeline="critiques", kind="listing")
+
+    page = await (await browser.context()).new_page()
+    try:
+        await page.goto(url, wait_until="domcontentloaded")
         try:
-            await page.fill('input[name="Keyword"]', SEARCH_TERM)
-            await page.click('input[type="submit"][value="Search"]', force=True)
-            await page.wait_for_load_state("networkidle")
             await page.wait_for_selector("div.views-row", timeout=8000)
         except Exception as e:
-            print(f"[ERROR] Search interaction failed: {e}")
-            await page.screenshot(path="debug.png", full_page=True)
-            content = await page.content()
-            with open("page_dump.html", "w", encoding="utf-8") as f:
-                f.write(content)
-            print("[DEBUG] Saved debug screenshot and HTML dump.")
-            upload_to_drive("debug.png", mime_type="image/png")
-            upload_to_drive("page_dump.html", mime_type="text/html")
-            return
-
-        # Load seen URLs
-        seen_urls = set()
-        if os.path.exists(SEEN_FILE):
-            with open(SEEN_FILE, "r", encoding="utf-8") as f:
-                seen_urls = set(json.load(f))
-            print(f"[INFO] Loaded {len(seen_urls)} previously saved critique URLs.")
-
-        # Scrape
-        results = []
-        entries = await page.query_selector_all("div.views-row")
-        print(f"[INFO] Found {len(entries)} search results.")
-
-        for entry in entries:
-            try:
-                a_tag = await entry.query_selector("a")
-                relative_url = await a_tag.get_attribute("href")
-                full_url = BASE_URL + relative_url
-
-                if full_url in seen_urls:
-                    print(f"[SKIP] Already saved: {full_url}")
-                    continue
-
-                print(f"[SCRAPING] {full_url}")
-                detail = await extract_critique_with_retry(context, full_url)
-                if detail:
-                    results.append(detail)
-                    seen_urls.add(full_url)
-                else:
-                    print(f"[ERROR] Failed permanently: {full_url}")
-            except Exception as e:
-                print(f"[ERROR] Failed parsing entry block: {e}")
-
-        # Combine and write data
-        existing = []
-        if os.path.exists(OUTPUT_FILE):
-            with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                existing = json.load(f)
-
-        combined = existing + results
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(combined, f, indent=2, ensure_ascii=False)
-
-        with open(SEEN_FILE, "w", encoding="utf-8") as f:
-            json.dump(sorted(seen_urls), f, indent=2)
-
-        print(f"[DONE] Total saved: {len(combined)} critiques.")
-        upload_to_drive(OUTPUT_FILE, "application/json")
-        upload_to_drive(SEEN_FILE, "application/json")
+            if page_no == 0:
+                print(f"[ERROR] Search for '{term}' returned no results page: {e}")
+                await save_debug_dump(page)
+            return []
+        hrefs = await page.eval_on_selector_all(
+            "div.views-row",
+            "rows => rows.map(r => { const a = r.querySelector('a'); return a ? a.getAttribute('href') : null; })"
+        )
+        return [absolute_url(h) for h in hrefs if h]
+    finally:
+        await page.close()
+
+async def search_term(client, browser, term, seen_urls, full=False):
+    """Walk result pages for `term`, returning unseen critique URLs in listing order.
+
+    Stops at the first page with no results or, unless `full` (backfill), the
+    first page whose results are all already seen.
+    """
+    found = []
+    try:
+        for page_no in range(CRITIQUE_MAX_PAGES):
+            urls = await fetch_listing_page(client, browser, term, page_no)
+            if not urls:
+                break
+            new = [u for u in urls if u not in seen_urls]
+            found.extend(new)
+            if len(new) < len(urls):
+                SKIPS.inc(len(urls) - len(new), pipeline="critiques", reason="seen")
+            if not new and not full:
+                print(f"[INFO] '{term}' page {page_no}: nothing new, stopping.")
+                break
+    except Exception as e:
+        print(f"[ERROR] Search for '{term}' failed: {e}")
+    print(f"[INFO] '{term}': {len(found)} new critiques.")
+    return found
+
+async def scrape_brazenbeacon_critiques(full=False, terms=None):
+    terms = terms or SEARCH_TERMS
 
+    # Load seen URLs
+    log = CritiqueLog()
+    log.import_legacy(OUTPUT_FILE, SEEN_FILE)
+    seen_urls = log.seen_urls()
+    if seen_urls:
+        print(f"[INFO] Loaded {len(seen_urls)} previously saved critique URLs.")
+
+    browser = LazyBrowser()
+    policy = RequestPolicy("critiques", rate=CRITIQUE_RATE_PER_HOST, max_concurrency=CRITIQUE_WORKERS)
+    limits = httpx.Limits(max_connections=CRITIQUE_WORKERS, max_keepalive_connections=CRITIQUE_WORKERS)
+    try:
+        async with policy.client(limits=limits, follow_redirects=True) as client:
+            per_term = await asyncio.gather(*(search_term(client, browser, t, seen_urls, full) for t in terms))
+            to_scrape = list(dict.fromkeys(url for urls in per_term for url in urls))
+            print(f"[INFO] Found {len(to_scrape)} new critiques across {len(terms)} search terms.")
+            progress(done=0, total=len(to_scrape))
+            details = await extract_critiques(client, browser, to_scrape)
+    finally:
         await browser.close()
-        
+
+    # Collect results in listing order
+    results = []
+    for full_url in to_scrape:
+        detail = details.get(full_url)
+        if detail:
+            results.append(detail)
+            seen_urls.add(full_url)
+        else:
+            ERRORS.inc(pipeline="critiques", stage="extract")
+            print(f"[ERROR] Failed permanently: {full_url}")
+
+    # Append new critiques as their own segment; earlier segments never change
+    with span("write", "critiques"):
+        segment = log.append(results)
+    print(f"[DONE] Saved {len(results)} new critiques ({len(seen_urls)} total).")
+    parquet = None
+    if ANALYTICS_EXPORT and (segment or not os.path.exists(os.path.join(EXPORT_DIR, CRITIQUES_FILE))):
+        try:
+            with span("export", "critiques"):
+                parquet = await asyncio.to_thread(export_critiques, log)
+        except Exception as e:
+            print(f"[ERROR] Critiques export failed: {e}")
+    if segment or not os.path.exists(CRITIQUE_INDEX_DB):
+        try:
+            with span("index", "critiques"):
+                await asyncio.to_thread(build_critique_index, log)
+        except Exception as e:
+            print(f"[ERROR] Critique index build failed: {e}")
+    with span("drive_sync", "critiques"):
+        if segment:
+            upload_to_drive(segment, "application/gzip" if segment.endswith(".gz") else "application/x-ndjson")
+            upload_to_drive(log.index_path, "text/plain")
+        if parquet:
+            upload_to_drive(parquet, PARQUET_MIME)
+        await asyncio.to_thread(drive_sync.finish)
+
+async def _main():
+    try:
+        await scrape_brazenbeacon_critiques()
+    finally:
+        await browser_pool.stop()
+
 if __name__ == "__main__":
-    asyncio.run(scrape_brazenbeacon_critiques())
+    asyncio.run(_main())
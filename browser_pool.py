@@ -0,0 +1,181 @@
+import asyncio
+import os
+import subprocess
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from memory_guard import browser_rss_mb
+
+# One long-lived Chromium shared by every scraper. Scrapers lease a fresh
+# context per run instead of launching their own browser. The browser (and the
+# Chromium install check) waits for the first lease, so an app that only serves
+# stored data never starts it. It is relaunched after BROWSER_RECYCLE_PAGES
+# pages, when the browser processes grow past BROWSER_MAX_RSS_MB, or when it
+# has crashed.
+BROWSER_MAX_CONTEXTS = int(os.environ.get("BROWSER_MAX_CONTEXTS", "2"))
+BROWSER_RECYCLE_PAGES = int(os.environ.get("BROWSER_RECYCLE_PAGES", "200"))
+BROWSER_MAX_RSS_MB = float(os.environ.get("BROWSER_MAX_RSS_MB", "350"))
+
+# Playwright path fix (Render specific)
+os.environ["PLAYWRIGHT_BROWSERS_PATH"] = "0"
+
+_chromium_checked = False
+
+
+def ensure_chromium():
+    """Install Chromium if it is missing. Runs once, on the first browser launch."""
+    global _chromium_checked
+    if _chromium_checked:
+        return
+    _chromium_checked = True
+    if not Path("/opt/render/.cache/ms-playwright/chromium").exists():
+        print("Chromium not found, installing...")
+        try:
+            subprocess.run(["playwright", "install", "chromium"], check=True)
+        except Exception as e:
+            print(f"Chromium install error: {e}")
+    else:
+        print("Chromium is installed.")
+
+
+class BrowserPool:
+    def __init__(self, max_contexts=BROWSER_MAX_CONTEXTS, recycle_after_pages=BROWSER_RECYCLE_PAGES,
+                 max_rss_mb=BROWSER_MAX_RSS_MB):
+        self.max_contexts = max_contexts
+        self.recycle_after_pages = recycle_after_pages
+        self.max_rss_mb = max_rss_mb
+        self._playwright = None
+        self._browser = None
+        self._slots = None
+        self._launch_lock = None
+        self._active = 0
+        self._pages = 0
+        self._recycle_pending = False
+        self.launches = 0
+
+    async def start(self):
+        await self._ensure()
+
+    async def _ensure(self):
+        """Launch (or relaunch after a crash) the browser if it is not connected."""
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_contexts)
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                print("[WARN] Browser disconnected, relaunching...")
+            await self._shutdown()
+            await asyncio.to_thread(ensure_chromium)
+            from playwright.async_api import async_playwright
+            print("[INFO] Launching shared browser...")
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._pages = 0
+            self._recycle_pending = False
+            self.launches += 1
+            return self._browser
+
+    async def _shutdown(self):
+        try:
+            if self._browser is not None and self._browser.is_connected():
+                await self._browser.close()
+        except Exception as e:
+            print(f"[WARN] Error closing browser: {e}")
+        try:
+            if self._playwright is not None:
+                await self._playwright.stop()
+        except Exception as e:
+            print(f"[WARN] Error stopping Playwright: {e}")
+        self._browser = None
+        self._playwright = None
+
+    async def acquire(self, init_script=None):
+        """Lease a new browser context. Pair every call with release()."""
+        await self._ensure()
+        await self._slots.acquire()
+        try:
+            browser = await self._ensure()
+            context = await browser.new_context()
+            if init_script:
+                await context.add_init_script(init_script)
+        except Exception:
+            self._slots.release()
+            raise
+        context.on("page", self._count_page)
+        self._active += 1
+        return context
+
+    def _count_page(self, _page):
+        self._pages += 1
+        if self.recycle_after_pages and self._pages >= self.recycle_after_pages:
+            self._recycle_pending = True
+
+    async def release(self, context):
+        try:
+            await context.close()
+        except Exception as e:
+            print(f"[WARN] Error closing browser context: {e}")
+        self._active -= 1
+        self._slots.release()
+
+        rss = browser_rss_mb()
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            print(f"[INFO] Browser processes at {rss:.0f} MB, scheduling recycle.")
+            self._recycle_pending = True
+        if self._recycle_pending and self._active == 0:
+            print(f"[INFO] Recycling browser after {self._pages} pages.")
+            async with self._launch_lock:
+                await self._shutdown()
+
+    @asynccontextmanager
+    async def lease(self, init_script=None):
+        context = await self.acquire(init_script)
+        try:
+            yield context
+        finally:
+            await self.release(context)
+
+    async def stop_if_idle(self):
+        """Close the browser now if no context is leased, to give its memory back.
+
+        Nothing is lost: the next lease launches it again.
+        """
+        if self._launch_lock is None or self._active:
+            return False
+        async with self._launch_lock:
+            if self._active or self._browser is None:
+                return False
+            print(f"[INFO] Closing idle browser after {self._pages} pages.")
+            await self._shutdown()
+            return True
+
+    async def stop(self):
+        if self._launch_lock is None:
+            return
+        async with self._launch_lock:
+            await self._shutdown()
+
+    def health(self):
+        rss = browser_rss_mb()
+        return {
+            "running": self._browser is not None and self._browser.is_connected(),
+            "active_contexts": self._active,
+            "max_contexts": self.max_contexts,
+            "pages_since_launch": self._pages,
+            "launches": self.launches,
+            "child_rss_mb": round(rss, 1) if rss is not None else None,
+        }
+
+    async def check(self):
+        """Health check: relaunch the browser if it was running and has since crashed.
+
+        Does nothing before the first lease has launched it.
+        """
+        if self._browser is not None and not self._browser.is_connected():
+            await self._ensure()
+        return self.health()
+
+
+pool = BrowserPool()
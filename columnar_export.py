@@ -0,0 +1,203 @@
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from atomic_io import atomic_write
+from critique_log import CritiqueLog
+from judge_parser import normalize_date
+from judge_store import JUDGE_DB
+
+# Columnar analytics export. Appointments are flattened into one typed table
+# (parsed dates, numeric dogs_judged / breed_average) joined to the judge
+# attributes, critiques into another, and both are written as Parquet so
+# downstream analysis reads one file per dataset. pyarrow is imported on first
+# export only, keeping it off the app's import path.
+EXPORT_DIR = os.environ.get("EXPORT_DIR", "exports")
+ANALYTICS_EXPORT = os.environ.get("ANALYTICS_EXPORT", "1").lower() in ("1", "true", "yes")
+PARQUET_COMPRESSION = os.environ.get("PARQUET_COMPRESSION", "zstd")
+# Appointments are read and written this many rows at a time (one Parquet row group each).
+EXPORT_BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", "20000"))
+
+PARQUET_MIME = "application/vnd.apache.parquet"
+
+APPOINTMENTS_FILE = "appointments.parquet"
+CRITIQUES_FILE = "critiques.parquet"
+
+
+def _int(raw):
+    m = re.search(r"-?\d+", (raw or "").replace(",", ""))
+    return int(m.group(0)) if m else None
+
+
+def _float(raw):
+    m = re.search(r"-?\d+(?:\.\d+)?", (raw or "").replace(",", ""))
+    return float(m.group(0)) if m else None
+
+
+def _timestamp(raw):
+    try:
+        return datetime.fromisoformat(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def appointments_schema(pa):
+    return pa.schema([
+        ("judge_id", pa.string()),
+        ("breed", pa.dictionary(pa.int16(), pa.string())),
+        ("judge_name", pa.string()),
+        ("breed_judge_id", pa.string()),
+        ("address", pa.string()),
+        ("golden_only", pa.bool_()),
+        ("breed_only", pa.bool_()),
+        ("judge_total_appointments", pa.int32()),
+        ("judge_first_appointment", pa.date32()),
+        ("judge_last_appointment", pa.date32()),
+        ("seq", pa.int32()),
+        ("date", pa.date32()),
+        ("date_raw", pa.string()),
+        ("year", pa.int16()),
+        ("club_name", pa.dictionary(pa.int32(), pa.string())),
+        ("sex_judged", pa.dictionary(pa.int8(), pa.string())),
+        ("dogs_judged", pa.int32()),
+        ("breed_average", pa.float64()),
+    ])
+
+
+def critiques_schema(pa):
+    return pa.schema([
+        ("url", pa.string()),
+        ("show_name", pa.string()),
+        ("breed", pa.dictionary(pa.int32(), pa.string())),
+        ("judge", pa.string()),
+        ("show_date", pa.date32()),
+        ("show_date_raw", pa.string()),
+        ("published_date", pa.date32()),
+        ("year", pa.int16()),
+        ("scraped_at", pa.timestamp("us")),
+        ("critique", pa.large_string()),
+    ])
+
+
+def appointment_batches(db_path=JUDGE_DB, batch_rows=EXPORT_BATCH_ROWS):
+    """Every stored appointment with its judge's attributes, as pyarrow RecordBatches of up to `batch_rows`.
+
+    Rows are read from SQLite a batch at a time, so memory stays flat however
+    many appointments are stored.
+    """
+    import pyarrow as pa
+
+    schema = appointments_schema(pa)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(
+            """SELECT j.judge_id, j.breed, j.judge_name, j.breed_judge_id, j.address, j.golden_only, j.breed_only,
+                      j.total_appointments, span.first_date, span.last_date,
+                      a.seq, a.appointment_date, a.date, a.club_name, a.sex_judged, a.dogs_judged, a.breed_average
+               FROM appointments a
+               JOIN judges j ON j.judge_id = a.judge_id AND j.breed = a.breed
+               JOIN (SELECT judge_id, breed, MIN(appointment_date) AS first_date, MAX(appointment_date) AS last_date
+                     FROM appointments GROUP BY judge_id, breed) span
+                 ON span.judge_id = a.judge_id AND span.breed = a.breed
+               ORDER BY j.breed, j.judge_id, a.seq"""
+        )
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            yield _appointment_batch(pa, schema, rows)
+            del rows
+    finally:
+        conn.close()
+
+
+def _appointment_batch(pa, schema, rows):
+    (judge_id, breed, judge_name, breed_judge_id, address, golden_only, breed_only, total, first_date, last_date,
+     seq, iso, raw, club, sex, dogs, average) = zip(*rows)
+    dates = pa.array(iso, pa.string()).cast(pa.date32())
+    columns = [
+        judge_id, breed, judge_name, breed_judge_id, address,
+        [None if g is None else bool(g) for g in golden_only],
+        [None if b is None else bool(b) for b in breed_only],
+        total,
+        pa.array(first_date, pa.string()).cast(pa.date32()),
+        pa.array(last_date, pa.string()).cast(pa.date32()),
+        seq,
+        dates,
+        raw,
+        [int(d[:4]) if d else None for d in iso],
+        club,
+        sex,
+        [_int(d) for d in dogs],
+        [_float(b) for b in average],
+    ]
+    return pa.record_batch(
+        [col if isinstance(col, pa.Array) else pa.array(col, field.type) for col, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def critiques_table(log=None):
+    """Every critique in the critique log, as a pyarrow Table."""
+    import pyarrow as pa
+
+    log = log or CritiqueLog()
+    schema = critiques_schema(pa)
+    columns = {field.name: [] for field in schema}
+    for record in log.read_all():
+        show_date = normalize_date(record.get("show_date"))
+        columns["url"].append(record.get("url"))
+        columns["show_name"].append(record.get("show_name"))
+        columns["breed"].append(record.get("breed"))
+        columns["judge"].append(record.get("judge"))
+        columns["show_date"].append(show_date)
+        columns["show_date_raw"].append(record.get("show_date"))
+        columns["published_date"].append(normalize_date(record.get("published_date")))
+        columns["year"].append(show_date.year if show_date else None)
+        columns["scraped_at"].append(_timestamp(record.get("scraped_at")))
+        columns["critique"].append(record.get("critique"))
+    return pa.table([pa.array(columns[f.name], f.type) for f in schema], schema=schema)
+
+
+def write_parquet(table, name, export_dir=EXPORT_DIR):
+    """Write `table` to export_dir/name atomically. Returns the path."""
+    import pyarrow.parquet as pq
+
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, name)
+    with atomic_write(path, "wb") as f:
+        pq.write_table(table, f, compression=PARQUET_COMPRESSION)
+    print(f"[INFO] Exported {table.num_rows} rows to {path}.")
+    return path
+
+
+def write_parquet_batches(batches, schema, name, export_dir=EXPORT_DIR):
+    """Write RecordBatches to export_dir/name atomically, one row group per batch. Returns the path."""
+    import pyarrow.parquet as pq
+
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, name)
+    rows = 0
+    with atomic_write(path, "wb") as f:
+        with pq.ParquetWriter(f, schema, compression=PARQUET_COMPRESSION) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    print(f"[INFO] Exported {rows} rows to {path}.")
+    return path
+
+
+def export_appointments(db_path=JUDGE_DB, export_dir=EXPORT_DIR):
+    import pyarrow as pa
+
+    return write_parquet_batches(appointment_batches(db_path), appointments_schema(pa), APPOINTMENTS_FILE, export_dir)
+
+
+def export_critiques(log=None, export_dir=EXPORT_DIR):
+    return write_parquet(critiques_table(log), CRITIQUES_FILE, export_dir)
+
+
+if __name__ == "__main__":
+    export_appointments()
+    export_critiques()
@@ -0,0 +1,274 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+from critique_log import CritiqueLog
+from judge_index import QUERY_DEFAULT_LIMIT, QUERY_MAX_LIMIT
+from judge_parser import normalize_date
+from judge_store import JUDGE_DB
+
+# Search side of the critiques. Each critique is linked to the judge who wrote
+# it (by normalized name) and, where one matches, to that judge's appointment
+# (same breed, show date within CRITIQUE_DATE_TOLERANCE_DAYS, club name closest
+# to the show name), and its text goes into an SQLite FTS5 index. The index is
+# derived data: it is rebuilt from the critique log and the judge store into a
+# new file that replaces the old one, so readers never see a half-built index.
+CRITIQUE_INDEX_DB = os.environ.get("CRITIQUE_INDEX_DB", "critique_index.db")
+CRITIQUE_DATE_TOLERANCE_DAYS = int(os.environ.get("CRITIQUE_DATE_TOLERANCE_DAYS", "3"))
+
+SCHEMA = """
+CREATE TABLE critiques (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE,
+    show_name TEXT,
+    breed TEXT COLLATE NOCASE,
+    judge TEXT,
+    judge_key TEXT,
+    show_date TEXT,
+    show_date_raw TEXT,
+    published_date TEXT,
+    scraped_at TEXT,
+    judge_id TEXT,
+    judge_breed TEXT,
+    appointment_seq INTEGER,
+    club_name TEXT COLLATE NOCASE,
+    appointment_date TEXT,
+    link TEXT,
+    critique TEXT
+);
+CREATE INDEX idx_critiques_judge_key ON critiques(judge_key, show_date);
+CREATE INDEX idx_critiques_judge_id ON critiques(judge_id, show_date);
+CREATE INDEX idx_critiques_club ON critiques(club_name, show_date);
+CREATE INDEX idx_critiques_show_date ON critiques(show_date);
+CREATE VIRTUAL TABLE critique_text USING fts5(
+    show_name, judge, critique,
+    content='critiques', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value);
+"""
+
+_TITLES = {"mr", "mrs", "ms", "miss", "mx", "dr", "prof", "professor", "rev", "sir", "dame", "lady", "lord",
+           "capt", "captain", "col", "major"}
+# Words too common in show and club names to say anything about which club ran a show.
+_CLUB_NOISE = {"the", "of", "and", "club", "society", "association", "assoc", "show", "shows", "championship",
+               "ch", "open", "limited", "ltd", "dog", "dogs", "canine", "kennel"}
+
+_build_lock = threading.Lock()
+
+
+def normalize_name(raw):
+    """'Mrs. Jane  EXAMPLE' -> 'jane example': accents, punctuation and leading titles dropped."""
+    text = unicodedata.normalize("NFKD", raw or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold().replace("'", "")
+    words = re.findall(r"[a-z0-9]+", text)
+    while words and words[0] in _TITLES:
+        words.pop(0)
+    return " ".join(words)
+
+
+def _initial_key(name_key):
+    """'jane example' -> 'j example', so 'Mrs J Example' can still find 'Mrs Jane Example'."""
+    words = name_key.split()
+    return f"{words[0][0]} {words[-1]}" if len(words) >= 2 else name_key
+
+
+def _club_words(text):
+    return {w for w in re.findall(r"[a-z]+", (text or "").casefold()) if w not in _CLUB_NOISE}
+
+
+class _Judges:
+    """The judge store's names and appointments, keyed for linking."""
+
+    def __init__(self, judge_db):
+        self.names = {}
+        self.initials = {}
+        self.appointments = {}
+        if not os.path.exists(judge_db):
+            return
+        conn = sqlite3.connect(f"file:{judge_db}?mode=ro", uri=True)
+        try:
+            for judge_id, judge_name in conn.execute("SELECT DISTINCT judge_id, judge_name FROM judges"):
+                key = normalize_name(judge_name)
+                if key:
+                    self.names.setdefault(key, set()).add(judge_id)
+                    self.initials.setdefault(_initial_key(key), set()).add(judge_id)
+            for judge_id, breed, seq, date, club in conn.execute(
+                    "SELECT judge_id, breed, seq, appointment_date, club_name FROM appointments "
+                    "WHERE appointment_date IS NOT NULL"):
+                self.appointments.setdefault(judge_id, []).append(
+                    (datetime.strptime(date, "%Y-%m-%d").date(), breed, seq, club))
+        finally:
+            conn.close()
+
+    def candidates(self, name_key):
+        """Judge IDs the critique's judge name can refer to: exact name first, then initial + surname."""
+        if name_key in self.names:
+            return self.names[name_key]
+        return self.initials.get(_initial_key(name_key), set())
+
+    def appointment(self, judge_id, breed, show_date, show_name):
+        """The judge's appointment that best fits the critique, or None."""
+        if show_date is None:
+            return None
+        breed_key = (breed or "").casefold()
+        show_words = _club_words(show_name)
+        best = None
+        for date, appt_breed, seq, club in self.appointments.get(judge_id, ()):
+            if breed_key and appt_breed.casefold() != breed_key:
+                continue
+            days = abs((date - show_date).days)
+            if days > CRITIQUE_DATE_TOLERANCE_DAYS:
+                continue
+            rank = (days, -len(show_words & _club_words(club)))
+            if best is None or rank < best[0]:
+                best = (rank, appt_breed, seq, club, date)
+        return best[1:] if best else None
+
+    def link(self, record, show_date):
+        """(judge_id, breed, seq, club, date, link) for one critique.
+
+        link is "appointment", "judge", "ambiguous" (several judges share the
+        name and none has a fitting appointment) or None.
+        """
+        ids = self.candidates(normalize_name(record.get("judge")))
+        if not ids:
+            return None, None, None, None, None, None
+        matches = {}
+        for judge_id in ids:
+            appointment = self.appointment(judge_id, record.get("breed"), show_date, record.get("show_name"))
+            if appointment:
+                matches[judge_id] = appointment
+        if len(matches) == 1:
+            (judge_id, (breed, seq, club, date)), = matches.items()
+            return judge_id, breed, seq, club, date.isoformat(), "appointment"
+        if len(ids) == 1:
+            return next(iter(ids)), None, None, None, None, "judge"
+        return None, None, None, None, None, "ambiguous"
+
+
+def build_critique_index(log=None, judge_db=JUDGE_DB, path=CRITIQUE_INDEX_DB):
+    """Rebuild the critique index from the critique log and the judge store. Returns its stats."""
+    log = log or CritiqueLog()
+    with _build_lock:
+        started = time.perf_counter()
+        judges = _Judges(judge_db)
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            rows = []
+            for record in log.read_all():
+                show_date = normalize_date(record.get("show_date"))
+                published = normalize_date(record.get("published_date"))
+                rows.append((
+                    record.get("url"), record.get("show_name"), record.get("breed"), record.get("judge"),
+                    normalize_name(record.get("judge")), show_date.isoformat() if show_date else None,
+                    record.get("show_date"), published.isoformat() if published else None,
+                    record.get("scraped_at"), *judges.link(record, show_date), record.get("critique"),
+                ))
+            conn.executemany(
+                """INSERT OR REPLACE INTO critiques
+                   (url, show_name, breed, judge, judge_key, show_date, show_date_raw, published_date, scraped_at,
+                    judge_id, judge_breed, appointment_seq, club_name, appointment_date, link, critique)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+            conn.execute("INSERT INTO critique_text(critique_text) VALUES ('rebuild')")
+            conn.execute("INSERT INTO critique_text(critique_text) VALUES ('optimize')")
+            stats = _stats(conn)
+            stats["built_at"] = time.time()
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", stats.items())
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    print(f"[INFO] Critique index built: {stats['critiques']} critiques, {stats['linked_judge']} linked to a judge, "
+          f"{stats['linked_appointment']} to an appointment in {time.perf_counter() - started:.2f}s.")
+    return stats
+
+
+def _stats(conn):
+    total, judge, appointment = conn.execute(
+        "SELECT COUNT(*), COUNT(judge_id), COALESCE(SUM(link = 'appointment'), 0) FROM critiques").fetchone()
+    return {"critiques": total, "linked_judge": judge, "linked_appointment": appointment}
+
+
+def _connect(path):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def critique_index_stats(path=CRITIQUE_INDEX_DB):
+    if not os.path.exists(path):
+        return {"built": False}
+    conn = _connect(path)
+    try:
+        return {"built": True, **dict(conn.execute("SELECT key, value FROM meta"))}
+    finally:
+        conn.close()
+
+
+_RESULT_COLUMNS = ("url", "show_name", "breed", "judge", "show_date", "published_date",
+                   "judge_id", "judge_breed", "club_name", "appointment_date", "link")
+
+
+def search_critiques(q=None, judge=None, judge_id=None, breed=None, club=None, since=None, until=None,
+                     linked=None, offset=0, limit=None, path=CRITIQUE_INDEX_DB):
+    """Critiques matching every filter given, best full-text match first if `q` is given, else newest show first.
+
+    q is an FTS5 query over show name, judge and critique text. judge matches
+    the normalized judge name; club matches the linked appointment's club.
+    Raises ValueError for a malformed q.
+    """
+    offset = max(0, offset)
+    limit = QUERY_DEFAULT_LIMIT if limit is None else max(0, min(limit, QUERY_MAX_LIMIT))
+    page = {"total": 0, "offset": offset, "limit": limit, "items": []}
+    if not os.path.exists(path):
+        return page
+
+    where, params = [], []
+    if q:
+        source = "critique_text JOIN critiques c ON c.id = critique_text.rowid"
+        where.append("critique_text MATCH ?")
+        params.append(q)
+        excerpt = "snippet(critique_text, 2, '[', ']', '…', 24)"
+        order = "critique_text.rank"
+    else:
+        source = "critiques c"
+        excerpt = "substr(c.critique, 1, 300)"
+        order = "c.show_date IS NULL, c.show_date DESC, c.id"
+    for clause, value in (("c.judge_key = ?", normalize_name(judge) if judge else None),
+                          ("c.judge_id = ?", judge_id),
+                          ("c.breed = ?", breed),
+                          ("c.club_name = ?", club),
+                          ("c.show_date >= ?", since),
+                          ("c.show_date <= ?", until)):
+        if value:
+            where.append(clause)
+            params.append(value)
+    if linked is not None:
+        where.append("c.judge_id IS NOT NULL" if linked else "c.judge_id IS NULL")
+    condition = f" WHERE {' AND '.join(where)}" if where else ""
+
+    conn = _connect(path)
+    try:
+        if q:
+            try:
+                conn.execute("SELECT rowid FROM critique_text WHERE critique_text MATCH ? LIMIT 1", (q,)).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search query: {e}")
+        page["total"] = conn.execute(f"SELECT COUNT(*) FROM {source}{condition}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join('c.' + col for col in _RESULT_COLUMNS)}, {excerpt} FROM {source}{condition} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+    finally:
+        conn.close()
+    page["items"] = [dict(zip(_RESULT_COLUMNS + ("excerpt",), row)) for row in rows]
+    return page
+
+
+if __name__ == "__main__":
+    build_critique_index()
@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+from datetime import datetime
+
+from atomic_io import atomic_write
+
+# Append-only critique store. Each run that finds new critiques writes one new
+# segment file (JSON Lines, optionally gzipped) and appends the URLs to
+# seen_urls.txt, so a run's cost depends on what it found, not on the history.
+CRITIQUE_LOG_DIR = os.environ.get("CRITIQUE_LOG_DIR", "critiques")
+CRITIQUE_LOG_GZIP = os.environ.get("CRITIQUE_LOG_GZIP", "").lower() in ("1", "true", "yes")
+
+
+class CritiqueLog:
+    def __init__(self, path=CRITIQUE_LOG_DIR, gzip_segments=CRITIQUE_LOG_GZIP):
+        self.path = path
+        self.gzip_segments = gzip_segments
+        self.index_path = os.path.join(path, "seen_urls.txt")
+        os.makedirs(path, exist_ok=True)
+
+    def seen_urls(self):
+        if not os.path.exists(self.index_path):
+            return set()
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def segments(self):
+        """Segment paths in the order they were written."""
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.startswith("critiques-") and name.endswith((".jsonl", ".jsonl.gz"))
+        )
+
+    def read_all(self):
+        """Yield every stored critique, oldest segment first."""
+        for seg in self.segments():
+            opener = gzip.open if seg.endswith(".gz") else open
+            with opener(seg, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def append(self, records, name=None):
+        """Write `records` as a new segment and add their URLs to the index.
+
+        The segment is fsynced and renamed into place before the index is touched,
+        so a crash can at worst cause a critique to be re-scraped, never lost.
+        Returns the new segment's path, or None if there was nothing to write.
+        """
+        if not records:
+            return None
+        name = name or datetime.utcnow().strftime("critiques-%Y%m%dT%H%M%S%f")
+        seg_path = os.path.join(self.path, name + (".jsonl.gz" if self.gzip_segments else ".jsonl"))
+        with atomic_write(seg_path, "wb") as raw:
+            payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+            if self.gzip_segments:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                    gz.write(payload)
+            else:
+                raw.write(payload)
+
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("".join(r["url"] + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        return seg_path
+
+    def import_legacy(self, output_file, seen_file):
+        """One-off migration of the old whole-array JSON files into the log."""
+        if self.segments() or not os.path.exists(output_file):
+            return
+        try:
+            with open(output_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            seen = set()
+            if os.path.exists(seen_file):
+                with open(seen_file, "r", encoding="utf-8") as f:
+                    seen = set(json.load(f))
+        except Exception as e:
+            print(f"[WARNING] Could not read legacy critique files: {e}")
+            return
+        self.append(records, name="critiques-00000000-legacy")
+        extra = seen - {r["url"] for r in records}
+        if extra:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(url + "\n" for url in sorted(extra)))
+                f.flush()
+                os.fsync(f.fileno())
+        print(f"[INFO] Imported {len(records)} critiques from {output_file}.")
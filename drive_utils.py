@@ -1,55 +1,240 @@
 import os
 import json
+import time
+import asyncio
+import threading
 import base64
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import hashlib
+from atomic_io import atomic_write
+from metrics import DRIVE_CALLS, ERRORS
 
-# Decode and write credentials from env
-creds_b64 = os.environ.get("GOOGLE_SERVICE_ACCOUNT_BASE64")
-if creds_b64:
-    with open("credentials.json", "wb") as f:
-        f.write(base64.b64decode(creds_b64))
-
-# Build Drive service
+# The Google client libraries are imported inside the functions that use them, and
+# credentials are decoded on first use, so importing this module (and the app) is
+# cheap and does not fail when credentials are absent.
 SCOPES = ["https://www.googleapis.com/auth/drive.file"]
-credentials = service_account.Credentials.from_service_account_file(
-    "credentials.json", scopes=SCOPES
-)
-drive_service = build("drive", "v3", credentials=credentials)
 
-def upload_to_drive(local_path, mime_type):
-    fname = os.path.basename(local_path)
-    folder_id = os.environ.get("GDRIVE_FOLDER_ID")
+# Point the client at another server (e.g. a local fake Drive) instead of Google.
+DRIVE_API_ENDPOINT = os.environ.get("DRIVE_API_ENDPOINT")
+# Seconds between automatic flushes while a run is queueing files; 0 = only at end of run.
+DRIVE_FLUSH_INTERVAL = float(os.environ.get("DRIVE_FLUSH_INTERVAL", "0"))
+# Files larger than this go up as a resumable upload in chunks of this size.
+# A simple upload builds the whole multipart body in memory, several copies of
+# the file at once, which for judges.db is enough to hit the instance's memory limit.
+DRIVE_UPLOAD_CHUNK_MB = float(os.environ.get("DRIVE_UPLOAD_CHUNK_MB", "8"))
 
-    if not os.path.exists(local_path):
-        print(f"[ERROR] File not found for upload: {local_path}")
-        return
+_drive_service = None
 
-    if not folder_id:
-        print("[ERROR] GDRIVE_FOLDER_ID is not set.")
-        return
+def load_credentials():
+    """Decode and write credentials from env, then load them."""
+    from google.oauth2 import service_account
 
-    try:
-        res = drive_service.files().list(
-            q=f"name='{fname}' and trashed=false and '{folder_id}' in parents",
-            spaces="drive",
-            fields="files(id, name)"
-        ).execute()
+    creds_b64 = os.environ.get("GOOGLE_SERVICE_ACCOUNT_BASE64")
+    if creds_b64:
+        with atomic_write("credentials.json", "wb") as f:
+            f.write(base64.b64decode(creds_b64))
+    elif not os.path.exists("credentials.json"):
+        raise RuntimeError("GOOGLE_SERVICE_ACCOUNT_BASE64 is not set.")
+    return service_account.Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
 
-        if res["files"]:
-            file_id = res["files"][0]["id"]
-            drive_service.files().update(
-                fileId=file_id,
-                media_body=MediaFileUpload(local_path, mimetype=mime_type)
-            ).execute()
-            print(f"[INFO] Updated {fname} in Drive.")
+def get_drive_service():
+    """Build the Drive client once and reuse it for every upload.
+
+    Uses the discovery document bundled with google-api-python-client, so no
+    network fetch is needed to build it.
+    """
+    global _drive_service
+    if _drive_service is None:
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+
+        doc = json.loads(get_static_doc("drive", "v3"))
+        if DRIVE_API_ENDPOINT:
+            from googleapiclient.http import build_http
+
+            # build_http, not a bare httplib2.Http: resumable uploads need 308
+            # left alone rather than followed as a redirect.
+            doc["rootUrl"] = DRIVE_API_ENDPOINT.rstrip("/") + "/"
+            _drive_service = build_from_document(doc, http=build_http())
         else:
-            file = drive_service.files().create(
-                body={"name": fname, "parents": [folder_id]},
-                media_body=MediaFileUpload(local_path, mimetype=mime_type),
-                fields="id, webViewLink"
-            ).execute()
-            print(f"[INFO] Uploaded {fname}. View: {file['webViewLink']}")
+            _drive_service = build_from_document(doc, credentials=load_credentials())
+    return _drive_service
+
+def media_upload(local_path, mime_type):
+    """The media body for uploading `local_path`: one request if small, resumable chunks if large."""
+    from googleapiclient.http import MediaFileUpload
+
+    chunk = int(DRIVE_UPLOAD_CHUNK_MB * 1024 * 1024)
+    if chunk > 0 and os.path.getsize(local_path) > chunk:
+        return MediaFileUpload(local_path, mimetype=mime_type, chunksize=chunk, resumable=True)
+    return MediaFileUpload(local_path, mimetype=mime_type)
+
+def generate_md5(file_path):
+    """Generate an MD5 hash for a given file (to match Google Drive's checksum)."""
+    md5 = hashlib.md5()
+    try:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(4096), b""):
+                md5.update(chunk)
+        return md5.hexdigest()
     except Exception as e:
-        print(f"[ERROR] Failed to upload {fname}: {e}")
+        print(f"[WARNING] Could not hash {file_path}: {e}")
+        return None
+
+class DriveSync:
+    """Queues local files for upload and pushes only the changed ones to the Drive folder.
+
+    The folder is listed once into a name -> (id, md5) index, so deciding whether
+    a file needs uploading costs no API calls. Queuing the same file repeatedly
+    during a run results in a single upload of its final contents.
+
+    Uploads are blocking googleapiclient calls: from async code, run flush()
+    and finish() in asyncio.to_thread. A periodic flush triggered by queue()
+    inside an event loop runs in a thread by itself. Flushes never overlap.
+    """
+
+    def __init__(self, folder_id=None, service=None, flush_interval=DRIVE_FLUSH_INTERVAL):
+        self.folder_id = folder_id
+        self._service = service
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.index = None
+        self.api_calls = 0
+        self._last_flush = time.monotonic()
+        # _flush_lock is held for a whole flush; _pending_lock only while the
+        # queue is touched, so queuing from the event loop never waits on an upload.
+        self._flush_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._background = None
+
+    @property
+    def service(self):
+        if self._service is None:
+            self._service = get_drive_service()
+        return self._service
+
+    def _folder(self):
+        return self.folder_id or os.environ.get("GDRIVE_FOLDER_ID")
+
+    def load_index(self):
+        folder_id = self._folder()
+        index = {}
+        page_token = None
+        while True:
+            res = self.service.files().list(
+                q=f"'{folder_id}' in parents and trashed=false",
+                spaces="drive",
+                fields="nextPageToken, files(id, name, md5Checksum)",
+                pageSize=1000,
+                pageToken=page_token
+            ).execute()
+            self.api_calls += 1
+            DRIVE_CALLS.inc(method="list")
+            for f in res.get("files", []):
+                index.setdefault(f["name"], (f["id"], f.get("md5Checksum")))
+            page_token = res.get("nextPageToken")
+            if not page_token:
+                break
+        self.index = index
+        print(f"[INFO] Indexed {len(index)} files in Drive folder.")
+
+    def queue(self, local_path, mime_type="application/json"):
+        if not os.path.exists(local_path):
+            print(f"[ERROR] File not found: {local_path}")
+            return
+        with self._pending_lock:
+            self.pending[os.path.basename(local_path)] = (local_path, mime_type)
+        if self.flush_interval and time.monotonic() - self._last_flush >= self.flush_interval:
+            self._last_flush = time.monotonic()
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+                return
+            if self._background is None or self._background.done():
+                self._background = asyncio.ensure_future(asyncio.to_thread(self.flush))
+
+    def flush(self):
+        """Upload every queued file whose md5 differs from the indexed Drive copy."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        with self._pending_lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        folder_id = self._folder()
+        if not folder_id:
+            print("[ERROR] GDRIVE_FOLDER_ID not set.")
+            return
+
+        try:
+            if self.index is None:
+                self.load_index()
+        except Exception as e:
+            ERRORS.inc(pipeline="drive", stage="list")
+            print(f"[ERROR] Could not list Drive folder: {e}")
+            with self._pending_lock:
+                self.pending = {**pending, **self.pending}
+            return
+
+        for fname, (local_path, mime_type) in pending.items():
+            try:
+                self._upload(fname, local_path, mime_type, folder_id)
+            except Exception as e:
+                ERRORS.inc(pipeline="drive", stage="upload")
+                print(f"[ERROR] Failed to upload {fname}: {e}")
+
+    def _upload(self, fname, local_path, mime_type, folder_id):
+        local_md5 = generate_md5(local_path)
+        existing = self.index.get(fname)
+        if existing:
+            file_id, remote_md5 = existing
+            if remote_md5 and remote_md5 == local_md5:
+                print(f"[INFO] Skipped uploading {fname} — identical to existing file in Drive.")
+                return
+            try:
+                updated = self.service.files().update(
+                    fileId=file_id,
+                    media_body=media_upload(local_path, mime_type),
+                    fields="id, md5Checksum"
+                ).execute()
+                self.api_calls += 1
+                DRIVE_CALLS.inc(method="update")
+                self.index[fname] = (file_id, updated.get("md5Checksum", local_md5))
+                print(f"[INFO] Updated {fname} in Drive.")
+                return
+            except Exception as update_error:
+                self.api_calls += 1
+                DRIVE_CALLS.inc(method="update")
+                if "File not found" not in str(update_error):
+                    raise
+                print(f"[WARN] Ghost file detected for {fname}. Re-uploading...")
+
+        new_file = self.service.files().create(
+            body={"name": fname, "parents": [folder_id]},
+            media_body=media_upload(local_path, mime_type),
+            fields="id, md5Checksum, webViewLink"
+        ).execute()
+        self.api_calls += 1
+        DRIVE_CALLS.inc(method="create")
+        self.index[fname] = (new_file["id"], new_file.get("md5Checksum", local_md5))
+        print(f"[INFO] Uploaded {fname} to Drive.")
+        if new_file.get("webViewLink"):
+            print(f"[LINK] {new_file['webViewLink']}")
+
+    def finish(self):
+        """End of run: flush everything and drop the index so the next run relists the folder."""
+        with self._flush_lock:
+            self._flush()
+            if self.api_calls:
+                print(f"[INFO] Drive sync done ({self.api_calls} API calls).")
+            self.index = None
+            self.api_calls = 0
+
+drive_sync = DriveSync()
+
+def upload_to_drive(local_path, mime_type="application/json"):
+    """Queue a file for the shared Drive sync; it is uploaded on the next flush."""
+    drive_sync.queue(local_path, mime_type)
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import time
+
+from atomic_io import write_json
+
+# On-disk cache of conditional-GET validators (ETag / Last-Modified) keyed by URL.
+# Each URL gets one small JSON file holding its validators and last body, so a
+# lookup never has to load the whole cache. File mtimes double as LRU stamps.
+# An entry is only held in memory between a request's conditional_headers()
+# and its not_modified()/store()/discard(), so a run's memory does not grow
+# with the number of pages it fetches.
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", "http_cache")
+HTTP_CACHE_MAX_AGE_DAYS = float(os.environ.get("HTTP_CACHE_MAX_AGE_DAYS", "30"))
+HTTP_CACHE_MAX_MB = float(os.environ.get("HTTP_CACHE_MAX_MB", "100"))
+
+
+class HttpCache:
+    def __init__(self, path=HTTP_CACHE_DIR, max_age_days=HTTP_CACHE_MAX_AGE_DAYS, max_mb=HTTP_CACHE_MAX_MB):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "stored": 0, "evicted": 0}
+        self._entries = {}
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, url):
+        return os.path.join(self.path, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, url):
+        if url in self._entries:
+            return self._entries[url]
+        entry = None
+        fpath = self._file(url)
+        if os.path.exists(fpath):
+            try:
+                with open(fpath, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Could not read cache entry for {url}: {e}")
+                entry = None
+        self._entries[url] = entry
+        return entry
+
+    def conditional_headers(self, url):
+        """Validator headers for a conditional GET of `url` (empty if nothing is cached)."""
+        entry = self._load(url)
+        if not entry:
+            self.stats["misses"] += 1
+            return {}
+        self.stats["hits"] += 1
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified(self, url):
+        """Record a 304 for `url` and return the cached body."""
+        self.stats["not_modified"] += 1
+        try:
+            os.utime(self._file(url))
+        except OSError:
+            pass
+        return self._entries.pop(url)["body"]
+
+    def discard(self, url):
+        """Forget the in-memory entry for `url` after a request that neither stored nor revalidated."""
+        self._entries.pop(url, None)
+
+    def store(self, url, resp):
+        self._entries.pop(url, None)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return  # Nothing to revalidate with next time
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "body": resp.text,
+        }
+        try:
+            # Atomic so a killed run can't leave a truncated entry; no fsync, it's only a cache.
+            write_json(self._file(url), entry, fsync=False)
+            self.stats["stored"] += 1
+        except Exception as e:
+            print(f"[WARNING] Could not write cache entry for {url}: {e}")
+
+    def prune(self):
+        """Drop entries unused for longer than max_age, then least-recently-used ones until under max_bytes."""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(".json"):
+                continue
+            st = entry.stat()
+            if now - st.st_mtime > self.max_age:
+                os.remove(entry.path)
+                self.stats["evicted"] += 1
+            else:
+                files.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, fpath in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(fpath)
+            total -= size
+            self.stats["evicted"] += 1
+        self._entries.clear()
+
+    def summary(self):
+        s = self.stats
+        return f"{s['hits']} hits, {s['misses']} misses, {s['not_modified']} not modified (304), {s['stored']} stored, {s['evicted']} evicted"
@@ -0,0 +1,158 @@
+import asyncio
+import contextvars
+import time
+import traceback
+import uuid
+from metrics import JOB_LAST_FINISHED, JOB_RUNS, JOB_SECONDS, log_event
+
+# In-process background jobs for the scrape endpoints. A job runs as an asyncio
+# task; triggering a job that is already running returns the running one, and
+# jobs touching the same state files are serialised by a shared lock.
+MAX_FINISHED_JOBS = 50
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class Job:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.task = None
+
+    def to_dict(self):
+        now = self.finished_at or time.time()
+        elapsed = now - self.started_at if self.started_at else 0.0
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.status == "running" and self.total and rate > 0:
+            eta = round(max(0, self.total - self.done) / rate, 1)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": {
+                "done": self.done,
+                "total": self.total,
+                "rate_per_sec": round(rate, 2),
+                "eta_s": eta,
+            },
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def current_job():
+    """The job running in the current task, or None outside a job."""
+    return _current_job.get()
+
+
+def progress(done=None, total=None, advance=0):
+    """Report progress for the job running in the current task (no-op outside a job)."""
+    job = current_job()
+    if job is None:
+        return
+    if total is not None:
+        job.total = total
+    if done is not None:
+        job.done = done
+    job.done += advance
+
+
+class JobRunner:
+    def __init__(self):
+        self.jobs = {}
+        self._running = {}
+        self._locks = {}
+        self.last_error = {}
+        # Called with the job when it starts running and when it finishes.
+        self.listeners = []
+
+    def _lock(self, name):
+        if name not in self._locks:
+            self._locks[name] = asyncio.Lock()
+        return self._locks[name]
+
+    def start(self, name, func, *args, lock=None, **kwargs):
+        """Start `func(*args, **kwargs)` as job `name` unless one is already running.
+
+        Returns (job, started). `lock` names the shared state the job touches;
+        jobs with the same lock never run at the same time.
+        """
+        running = self._running.get(name)
+        if running is not None:
+            return running, False
+
+        job = Job(name)
+        self.jobs[job.id] = job
+        self._running[name] = job
+        job.task = asyncio.create_task(self._run(job, func, args, kwargs, lock or name))
+        self._trim()
+        return job, True
+
+    async def _run(self, job, func, args, kwargs, lock_name):
+        _current_job.set(job)
+        try:
+            async with self._lock(lock_name):
+                job.status = "running"
+                job.started_at = time.time()
+                print(f"[INFO] Job {job.name} ({job.id}) started.")
+                self._notify(job)
+                job.result = await func(*args, **kwargs)
+            job.status = "succeeded"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            self.last_error[job.name] = {"job_id": job.id, "error": job.error, "at": time.time()}
+            print(f"[ERROR] Job {job.name} ({job.id}) failed: {job.error}")
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+            self._running.pop(job.name, None)
+            JOB_RUNS.inc(job=job.name, status=job.status)
+            JOB_LAST_FINISHED.set(job.finished_at, job=job.name, status=job.status)
+            if job.started_at:
+                JOB_SECONDS.observe(job.finished_at - job.started_at, job=job.name)
+            log_event("job", job=job.name, job_id=job.id, status=job.status, error=job.error,
+                      duration_s=round(job.finished_at - (job.started_at or job.finished_at), 3))
+            print(f"[INFO] Job {job.name} ({job.id}) {job.status}.")
+            self._notify(job)
+        return job.result
+
+    def _notify(self, job):
+        for listener in self.listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                print(f"[ERROR] Job listener failed for {job.name}: {e}")
+
+    def running(self, name):
+        """The running job called `name`, or None."""
+        return self._running.get(name)
+
+    def is_running(self, name):
+        return name in self._running
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def _trim(self):
+        finished = [j for j in self.list() if j.finished_at]
+        for job in finished[MAX_FINISHED_JOBS:]:
+            self.jobs.pop(job.id, None)
+
+
+runner = JobRunner()
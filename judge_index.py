@@ -0,0 +1,331 @@
+import asyncio
+import bisect
+from array import array
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from itertools import islice
+
+from judge_parser import DEFAULT_BREED
+from judge_store import JUDGE_DB, iso_date
+
+# Read side of the judge store: every judge (one row per judge and breed) and
+# appointment held in memory with posting lists per indexed field (judge_id,
+# breed, club_name, year, sex_judged, golden_only, breed_only) and a
+# precomputed order per sortable field, so a query is a set
+# intersection plus a walk over one ordering. A refresh builds a new snapshot
+# off the event loop and swaps it in; readers never see a half-built index.
+# To keep the snapshot small, appointment rows are tuples (dicts are only made
+# for the page being returned), repeated strings are shared, and full judge
+# records are kept as their stored JSON, compressed, and parsed when asked for.
+QUERY_DEFAULT_LIMIT = int(os.environ.get("QUERY_DEFAULT_LIMIT", "50"))
+QUERY_MAX_LIMIT = int(os.environ.get("QUERY_MAX_LIMIT", "500"))
+
+# Fields left out of /judges rows; /judges/{id} returns the full record.
+_DETAIL_FIELDS = ("appointments", "approved_breeds", "other_breeds")
+
+JUDGE_SORTS = ("judge_name", "total_appointments", "last_appointment", "first_appointment")
+APPOINTMENT_SORTS = ("date", "club_name", "judge_name", "dogs_judged", "breed_average")
+APPOINTMENT_FIELDS = ("judge_id", "judge_name", "breed", "golden_only", "breed_only", "date", "date_raw", "year",
+                      "club_name", "sex_judged", "dogs_judged", "breed_average")
+
+
+def _key(value):
+    return value.casefold().strip() if isinstance(value, str) else value
+
+
+def _number(raw):
+    try:
+        return float(str(raw).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _year(date, raw):
+    if date:
+        return int(date[:4])
+    m = re.search(r"\b(\d{4})\b", raw or "")
+    return int(m.group(1)) if m else None
+
+
+class _Span:
+    """The rows asc[lo:hi] of one ordering, usable as a candidate set without building one."""
+
+    def __init__(self, asc, rank, lo, hi):
+        self.asc, self.rank, self.lo, self.hi = asc, rank, lo, hi
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def __contains__(self, i):
+        return self.lo <= self.rank[i] < self.hi
+
+    def __iter__(self):
+        return iter(self.asc[self.lo:self.hi])
+
+
+class _Orders:
+    """Ascending and descending row orders for one field, missing values last either way."""
+
+    def __init__(self, values):
+        present = sorted((i for i, v in enumerate(values) if v is not None), key=values.__getitem__)
+        missing = [i for i, v in enumerate(values) if v is None]
+        self.sorted_values = [values[i] for i in present]
+        # Machine-int arrays rather than lists of int objects: several per field, each as long as the table.
+        self.asc = array("i", present + missing)
+        self.desc = array("i", present[::-1] + missing)
+        self.rank = {"asc": self._rank(self.asc), "desc": self._rank(self.desc)}
+
+    def bounds(self, low=None, high=None):
+        """(lo, hi) such that asc[lo:hi] are the rows with low <= value <= high."""
+        lo = bisect.bisect_left(self.sorted_values, low) if low is not None else 0
+        hi = bisect.bisect_right(self.sorted_values, high) if high is not None else len(self.sorted_values)
+        return lo, max(lo, hi)
+
+    def within(self, ids, low=None, high=None):
+        """The rows of `ids` (None for all) with low <= value <= high."""
+        lo, hi = self.bounds(low, high)
+        if ids is None:
+            return _Span(self.asc, self.rank["asc"], lo, hi)
+        if hi - lo <= len(ids):
+            return ids.intersection(self.asc[lo:hi])
+        rank = self.rank["asc"]
+        return {i for i in ids if lo <= rank[i] < hi}
+
+    @staticmethod
+    def _rank(order):
+        rank = array("i", [0]) * len(order)
+        for pos, i in enumerate(order):
+            rank[i] = pos
+        return rank
+
+
+class _Table:
+    """Rows are dicts, or tuples laid out as `fields`."""
+
+    def __init__(self, rows, indexed, sortable, fields=None):
+        self.rows = rows
+        self.fields = fields
+        column = {field: i for i, field in enumerate(fields)}.__getitem__ if fields else lambda field: field
+        keys = {}
+
+        def key(value):
+            # One casefolded copy per distinct string, not one per row.
+            if not isinstance(value, str):
+                return value
+            if value not in keys:
+                keys[value] = _key(value)
+            return keys[value]
+
+        # Every posting list refers to the same int object for a row id.
+        ids = list(range(len(rows)))
+        postings = {field: {} for field in indexed}
+        for field in indexed:
+            col = column(field)
+            for i, row in zip(ids, rows):
+                postings[field].setdefault(key(row[col]), []).append(i)
+        self.postings = {
+            field: {value: frozenset(ids) for value, ids in values.items()}
+            for field, values in postings.items()
+        }
+        self.orders = {field: _Orders([key(row[column(field)]) for row in rows]) for field in sortable}
+
+    def row(self, i):
+        return dict(zip(self.fields, self.rows[i])) if self.fields else self.rows[i]
+
+    def candidates(self, filters):
+        """Row ids matching every indexed equality filter, or None for "all rows"."""
+        sets = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            sets.append(self.postings[field].get(_key(value), frozenset()))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = sets[0]
+        for ids in sets[1:]:
+            result = result & ids
+            if not result:
+                break
+        return result
+
+    def ordered(self, ids, sort, needed):
+        """`ids` (None for all rows) lazily in `sort` order ("field" ascending, "-field" descending).
+
+        Only the first `needed` are guaranteed to be produced cheaply.
+        """
+        direction = "desc" if sort.startswith("-") else "asc"
+        orders = self.orders[sort.lstrip("-")]
+        order = orders.asc if direction == "asc" else orders.desc
+        if ids is None:
+            return order
+        # Walking the precomputed order until the page is full takes about
+        # needed * rows / matches steps; sorting the matches takes about
+        # matches * log(matches). Pick whichever is cheaper.
+        if ids and needed * len(order) < len(ids) * len(ids).bit_length() * len(ids):
+            return (i for i in order if i in ids)
+        return sorted(ids, key=orders.rank[direction].__getitem__)
+
+    def page(self, ids, sort, offset, limit):
+        offset = max(0, offset)
+        limit = QUERY_DEFAULT_LIMIT if limit is None else max(0, min(limit, QUERY_MAX_LIMIT))
+        total = len(self.rows) if ids is None else len(ids)
+        ordered = self.ordered(ids, sort, offset + limit)
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "items": [self.row(i) for i in islice(ordered, offset, offset + limit)],
+        }
+
+
+def _check_sort(sort, allowed):
+    if sort.lstrip("-") not in allowed:
+        raise ValueError(f"sort must be one of {', '.join(allowed)} (prefix '-' for descending)")
+
+
+def _with_breed(result):
+    # Results stored before breeds were tracked are Golden Retriever ones.
+    result.setdefault("breed", DEFAULT_BREED)
+    result.setdefault("breed_only", result["golden_only"])
+    return result
+
+
+class Snapshot:
+    def __init__(self, results, loaded_at=None):
+        """`results` are stored judge results as JSON text."""
+        self.loaded_at = loaded_at or time.time()
+        self.details = {}
+        judges = []
+        appointments = []
+        shared = {}
+        share = lambda value: shared.setdefault(value, value)
+        for result_json in results:
+            result = _with_breed(json.loads(result_json))
+            judge_id = share(result["judge_id"])
+            judge_name, breed = share(result["judge_name"]), share(result["breed"])
+            self.details.setdefault(judge_id, {})[_key(breed)] = zlib.compress(result_json.encode("utf-8"), 1)
+            dates = []
+            for a in result.get("appointments", []):
+                date = share(iso_date(a.get("date")))
+                if date:
+                    dates.append(date)
+                appointments.append((
+                    judge_id, judge_name, breed, result["golden_only"], result["breed_only"],
+                    date, share(a.get("date")), _year(date, a.get("date")), share(a.get("club_name")),
+                    share(a.get("sex_judged")), _number(a.get("dogs_judged")), _number(a.get("breed_average")),
+                ))
+            row = {k: v for k, v in result.items() if k not in _DETAIL_FIELDS}
+            row["first_appointment"] = min(dates, default=None)
+            row["last_appointment"] = max(dates, default=None)
+            judges.append(row)
+
+        self.judges = _Table(judges, ("judge_id", "breed", "golden_only", "breed_only"), JUDGE_SORTS)
+        self.appointments = _Table(
+            appointments, ("judge_id", "breed", "club_name", "year", "sex_judged", "golden_only", "breed_only"),
+            APPOINTMENT_SORTS, APPOINTMENT_FIELDS)
+        judge_pos = {(row["judge_id"], row["breed"]): i for i, row in enumerate(judges)}
+        self._appointment_judge = [judge_pos[a[0], a[2]] for a in appointments]
+
+    def _appointment_ids(self, judge_id=None, breed=None, club=None, year=None, sex_judged=None, golden_only=None,
+                         breed_only=None, since=None, until=None):
+        ids = self.appointments.candidates({
+            "judge_id": judge_id, "breed": breed, "club_name": club, "year": year,
+            "sex_judged": sex_judged, "golden_only": golden_only, "breed_only": breed_only,
+        })
+        if since or until:
+            ids = self.appointments.orders["date"].within(ids, since or None, until or None)
+        return ids
+
+    def appointments_query(self, sort="-date", offset=0, limit=None, **filters):
+        _check_sort(sort, APPOINTMENT_SORTS)
+        ids = self._appointment_ids(**filters)
+        return self.appointments.page(ids, sort, offset, limit)
+
+    def judges_query(self, breed=None, golden_only=None, breed_only=None, name=None, min_appointments=None,
+                     max_appointments=None, club=None, year=None, sex_judged=None, since=None, until=None,
+                     sort="judge_name", offset=0, limit=None):
+        """Judge rows (one per judge and breed) matching the judge-level filters and, if any
+        appointment filter is given, with at least one appointment for that breed matching all of them."""
+        _check_sort(sort, JUDGE_SORTS)
+        ids = self.judges.candidates({"breed": breed, "golden_only": golden_only, "breed_only": breed_only})
+        if club is None and year is None and sex_judged is None and bool(since) != bool(until):
+            # A lone date bound only needs each judge's first or last appointment.
+            if since:
+                ids = self.judges.orders["last_appointment"].within(ids, since)
+            else:
+                ids = self.judges.orders["first_appointment"].within(ids, None, until)
+        elif any(v is not None for v in (club, year, sex_judged, since, until)):
+            appointment_ids = self._appointment_ids(breed=breed, club=club, year=year, sex_judged=sex_judged,
+                                                    golden_only=golden_only, breed_only=breed_only,
+                                                    since=since, until=until)
+            matched = set(map(self._appointment_judge.__getitem__, appointment_ids))
+            ids = matched if ids is None else ids & matched
+        if name or min_appointments is not None or max_appointments is not None:
+            rows = self.judges.rows
+            needle = _key(name) if name else None
+            scan = range(len(rows)) if ids is None else ids
+            ids = {
+                i for i in scan
+                if (needle is None or needle in _key(rows[i]["judge_name"] or ""))
+                and (min_appointments is None or rows[i]["total_appointments"] >= min_appointments)
+                and (max_appointments is None or rows[i]["total_appointments"] <= max_appointments)
+            }
+        return self.judges.page(ids, sort, offset, limit)
+
+    def judge(self, judge_id, breed=None, preferred=()):
+        """A judge's full result for `breed`; without one, for the first of `preferred` it has, else any."""
+        results = self.details.get(judge_id, {})
+        if breed is not None:
+            found = results.get(_key(breed))
+        else:
+            found = next((results[_key(name)] for name in preferred if _key(name) in results),
+                         next(iter(results.values()), None))
+        return _with_breed(json.loads(zlib.decompress(found))) if found is not None else None
+
+
+def load_results(path=JUDGE_DB):
+    """Every stored judge result as JSON text, read one row at a time. A missing database is an empty index."""
+    if not os.path.exists(path):
+        return
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for (result_json,) in conn.execute("SELECT result_json FROM judges"):
+            yield result_json
+    finally:
+        conn.close()
+
+
+class JudgeIndex:
+    def __init__(self, path=JUDGE_DB):
+        self.path = path
+        self.snapshot = Snapshot([])
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    async def refresh(self):
+        """Rebuild from the judge store in a worker thread and swap the new snapshot in."""
+        async with self._lock:
+            started = time.perf_counter()
+            snapshot = await asyncio.to_thread(lambda: Snapshot(load_results(self.path)))
+            self.snapshot = snapshot
+            self.loaded = True
+            print(f"[INFO] Judge index loaded: {len(snapshot.details)} judges, {len(snapshot.judges.rows)} judge breeds, "
+                  f"{len(snapshot.appointments.rows)} appointments in {time.perf_counter() - started:.2f}s.")
+        return snapshot
+
+    def stats(self):
+        return {
+            "loaded": self.loaded,
+            "loaded_at": self.snapshot.loaded_at if self.loaded else None,
+            "judges": len(self.snapshot.details),
+            "judge_breeds": len(self.snapshot.judges.rows),
+            "appointments": len(self.snapshot.appointments.rows),
+        }
+
+
+judge_index = JudgeIndex()
@@ -0,0 +1,212 @@
+import re
+from datetime import date, datetime
+from selectolax.lexbor import LexborHTMLParser
+
+# Parsers for the Kennel Club judge profile and appointment pages, built on
+# selectolax (lexbor). They produce exactly what the original BeautifulSoup
+# code produced; text extraction mimics BeautifulSoup's get_text(strip=True),
+# which skips comments, script/style contents and whitespace-only strings.
+DEFAULT_BREED = "Retriever (Golden)"
+GOLDEN = DEFAULT_BREED.lower()
+# A judge counts as "<breed> only" if approved for that breed and at most this many others.
+MAX_OTHER_BREEDS = 2
+
+_SKIP_PARENTS = {"script", "style", "template"}
+# Written date forms on the critique site, tried after dd/mm/yyyy once ordinals and weekdays are dropped.
+_DATE_FORMATS = ("%d %B %Y", "%d %b %Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%B %d %Y", "%b %d %Y")
+
+
+def _strings(node):
+    for child in node.traverse(include_text=True):
+        if child.tag != "-text":
+            continue
+        parent = child.parent
+        if parent is not None and parent.tag in _SKIP_PARENTS:
+            continue
+        text = child.text_content.strip()
+        if text:
+            yield text
+
+
+def get_text(node, separator=""):
+    return separator.join(_strings(node))
+
+
+def _next_element(node):
+    sibling = node.next
+    while sibling is not None and sibling.tag.startswith("-"):
+        sibling = sibling.next
+    return sibling
+
+
+def _descendants(node, tags):
+    return [n for n in node.traverse() if n is not node and n.tag in tags]
+
+
+def _first(node, tag):
+    for n in node.traverse():
+        if n is not node and n.tag == tag:
+            return n
+    return None
+
+
+def _classes(node):
+    return (node.attributes.get("class") or "").split()
+
+
+def parse_date(raw):
+    """An appointment date as shown on the site ('dd/mm/yyyy') -> date; None if unparseable."""
+    m = re.match(r"^\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*$", raw or "")
+    if not m:
+        return None
+    day, month, year = (int(g) for g in m.groups())
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def normalize_date(raw):
+    """A show date as the critique site or the KC site writes it -> date; None if unparseable."""
+    parsed = parse_date(raw)
+    if parsed:
+        return parsed
+    text = re.sub(r"(?<=\d)(st|nd|rd|th)\b", "", (raw or "").strip().replace(",", ""))
+    text = re.sub(r"^[A-Za-z]+day\s+", "", text)
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_profile(html):
+    """Name, breed judge ID, address and approved breeds from a judge profile page."""
+    tree = LexborHTMLParser(html)
+
+    name_tag = tree.css_first("div.t-judge-profile__name")
+    raw_name = get_text(name_tag) if name_tag is not None else ""
+    match = re.match(r"^(.*?)(?:\s*Breed Judge ID\s*(\d+))?$", raw_name)
+    judge_name = match.group(1).strip() if match else "Unknown"
+    breed_judge_id = match.group(2) if match else None
+
+    # Equivalent of the soupsieve selector "dt:contains('Address') + dd"
+    address = None
+    for dt in tree.css("dt"):
+        if "Address" not in dt.text():
+            continue
+        dd = _next_element(dt)
+        if dd is not None and dd.tag == "dd":
+            address = get_text(dd, separator=", ")
+            break
+
+    approved_breeds = []
+    for group in tree.css("h4"):
+        group_name = get_text(group)
+        ul = _next_element(group)
+        while ul is not None and not (ul.tag == "ul" and "t-judge-profile__long-list" in _classes(ul)):
+            ul = _next_element(ul)
+        if ul is None:
+            continue
+        for li in _descendants(ul, {"li"}):
+            breed = _first(li, "a")
+            if breed is None:
+                breed = _first(li, "label")
+            level = _descendants(li, {"label"})[-1]
+            if breed is not None and level is not None:
+                approved_breeds.append({
+                    "group": group_name,
+                    "breed": get_text(breed),
+                    "level": get_text(level)
+                })
+
+    return {
+        "judge_name": judge_name,
+        "breed_judge_id": breed_judge_id,
+        "address": address,
+        "approved_breeds": approved_breeds,
+    }
+
+
+def parse_appointments(html):
+    """Rows of the appointment table on a judge's appointment page."""
+    tree = LexborHTMLParser(html)
+    appointments = []
+    for row in tree.css("table.a-table__table tbody tr"):
+        cols = _descendants(row, {"td", "th"})
+        if len(cols) < 5:
+            continue
+        sex_icon = _first(cols[2], "svg")
+        sex = None
+        if sex_icon is not None:
+            if "a-icon--female" in _classes(sex_icon):
+                sex = "Bitch"
+            elif "a-icon--male" in _classes(sex_icon):
+                sex = "Dog"
+        appointments.append({
+            "date": get_text(cols[0]),
+            "club_name": get_text(cols[1]),
+            "sex_judged": sex,
+            "dogs_judged": get_text(cols[3]),
+            "breed_average": get_text(cols[4])
+        })
+    return appointments
+
+
+def _breed_key(name):
+    return name.lower().strip()
+
+
+def breed_only(approved_breeds, breed):
+    """Approved for `breed` and for at most MAX_OTHER_BREEDS other breeds."""
+    key = _breed_key(breed)
+    found = any(_breed_key(b["breed"]) == key for b in approved_breeds)
+    others = sum(1 for b in approved_breeds if _breed_key(b["breed"]) != key)
+    return found and others <= MAX_OTHER_BREEDS
+
+
+def build_result(judge_id, profile, appointments, breed=DEFAULT_BREED):
+    """One judge's result for one breed: the shared profile plus that breed's appointments.
+
+    golden_only stays a Golden Retriever attribute whatever `breed` is;
+    breed_only and other_breeds are relative to `breed`.
+    """
+    dated = [(d, a["date"]) for a in appointments if (d := parse_date(a.get("date")))]
+    approved_breeds = profile["approved_breeds"]
+    other_breeds = [
+        b for b in approved_breeds
+        if _breed_key(b["breed"]) != _breed_key(breed)
+    ]
+
+    return {
+        "judge_name": profile["judge_name"],
+        "judge_id": judge_id,
+        "breed": breed,
+        "breed_judge_id": profile["breed_judge_id"],
+        "address": profile["address"],
+        "approved_breeds": approved_breeds,
+        "total_appointments": len(appointments),
+        "years_active": sorted({
+            int(m.group(1)) for a in appointments if (m := re.search(r"\b(\d{4})\b", a["date"]))
+        }),
+        "clubs_judged": sorted({a["club_name"] for a in appointments if a.get("club_name")}),
+        "golden_only": breed_only(approved_breeds, GOLDEN),
+        "breed_only": breed_only(approved_breeds, breed),
+        "other_breeds": other_breeds,
+        "appointments": appointments,
+        # Latest by calendar date, kept in the site's dd/mm/yyyy form.
+        "last_appointment": max(dated)[1] if dated else None
+    }
+
+
+def parse_judge(judge_id, profile_html, appointment_pages):
+    """A judge's profile page plus {breed: appointments page} -> {breed: result}.
+
+    Module-level and free of shared state so it can run in a parser process.
+    """
+    profile = parse_profile(profile_html)
+    return {
+        breed: build_result(judge_id, profile, parse_appointments(html), breed)
+        for breed, html in appointment_pages.items()
+    }
@@ -0,0 +1,474 @@
+import hashlib
+import json
+import os
+import sqlite3
+import re
+import time
+
+from atomic_io import write_json
+from judge_parser import DEFAULT_BREED, parse_date
+
+# Single SQLite database holding every scraped judge. Replaces the per-judge
+# judge_<id>_appointments.json files and processed_judges.json as the source of
+# truth; the JSON files can still be produced with export_json().
+JUDGE_DB = os.environ.get("JUDGE_DB", "judges.db")
+JUDGE_DB_BATCH = int(os.environ.get("JUDGE_DB_BATCH", "50"))
+# How many finished runs keep their per-judge run log.
+JUDGE_RUNS_KEPT = int(os.environ.get("JUDGE_RUNS_KEPT", "20"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS judges (
+    judge_id TEXT NOT NULL,
+    breed TEXT NOT NULL,
+    judge_name TEXT,
+    breed_judge_id TEXT,
+    address TEXT,
+    golden_only INTEGER,
+    breed_only INTEGER,
+    total_appointments INTEGER,
+    last_appointment TEXT,
+    content_hash TEXT NOT NULL,
+    result_json TEXT NOT NULL,
+    updated_at REAL,
+    PRIMARY KEY (judge_id, breed)
+);
+CREATE TABLE IF NOT EXISTS approved_breeds (
+    judge_id TEXT NOT NULL,
+    group_name TEXT,
+    breed TEXT,
+    level TEXT
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    judge_id TEXT NOT NULL,
+    breed TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    date TEXT,
+    appointment_date TEXT,
+    club_name TEXT,
+    sex_judged TEXT,
+    dogs_judged TEXT,
+    breed_average TEXT,
+    PRIMARY KEY (judge_id, breed, seq)
+);
+CREATE TABLE IF NOT EXISTS scrape_state (
+    judge_id TEXT PRIMARY KEY,
+    data_hash TEXT,
+    scraped_at REAL
+);
+CREATE TABLE IF NOT EXISTS retry_queue (
+    profile_url TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL
+);
+CREATE TABLE IF NOT EXISTS judge_listing (
+    profile_url TEXT PRIMARY KEY,
+    judge_id TEXT,
+    card_hash TEXT,
+    first_seen REAL,
+    last_seen REAL,
+    last_fetched REAL,
+    last_appointment TEXT
+);
+CREATE TABLE IF NOT EXISTS listing_breeds (
+    profile_url TEXT NOT NULL,
+    breed TEXT NOT NULL,
+    last_seen REAL,
+    PRIMARY KEY (profile_url, breed)
+);
+CREATE TABLE IF NOT EXISTS judge_runs (
+    run_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    params_json TEXT,
+    stats_json TEXT,
+    started_at REAL,
+    updated_at REAL,
+    finished_at REAL,
+    planned_at REAL
+);
+CREATE TABLE IF NOT EXISTS run_targets (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    profile_url TEXT NOT NULL,
+    card_hash TEXT,
+    reason TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_run_targets_url ON run_targets(run_id, profile_url);
+CREATE INDEX IF NOT EXISTS idx_approved_breeds_judge ON approved_breeds(judge_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_club ON appointments(club_name);
+CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments(appointment_date);
+CREATE INDEX IF NOT EXISTS idx_listing_breeds_breed ON listing_breeds(breed);
+"""
+
+# Stores written before judges were partitioned by breed hold Golden Retriever
+# results only, keyed by judge_id alone. They are rebuilt under the new keys.
+_MIGRATE_BREEDS = """
+ALTER TABLE judges RENAME TO judges_v1;
+ALTER TABLE appointments RENAME TO appointments_v1;
+DROP INDEX IF EXISTS idx_appointments_club;
+DROP INDEX IF EXISTS idx_appointments_date;
+"""
+_COPY_BREEDS = """
+INSERT INTO judges
+    (judge_id, breed, judge_name, breed_judge_id, address, golden_only, breed_only, total_appointments,
+     last_appointment, content_hash, result_json, updated_at)
+SELECT judge_id, :breed, judge_name, breed_judge_id, address, golden_only, golden_only, total_appointments,
+       last_appointment, content_hash,
+       json_set(result_json, '$.breed', :breed, '$.breed_only', json(CASE WHEN golden_only THEN 'true' ELSE 'false' END)),
+       updated_at
+FROM judges_v1;
+INSERT INTO appointments
+    (judge_id, breed, seq, date, appointment_date, club_name, sex_judged, dogs_judged, breed_average)
+SELECT judge_id, :breed, seq, date, appointment_date, club_name, sex_judged, dogs_judged, breed_average
+FROM appointments_v1;
+"""
+
+
+def content_hash(result):
+    return hashlib.sha256(json.dumps(result, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def iso_date(raw):
+    """'dd/mm/yyyy' -> 'yyyy-mm-dd' so dates sort and range-filter correctly; None if unparseable."""
+    parsed = parse_date(raw)
+    return parsed.isoformat() if parsed else None
+
+
+class JudgeStore:
+    def __init__(self, path=JUDGE_DB, batch_size=JUDGE_DB_BATCH):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        migrate = self._needs_breed_migration()
+        if migrate:
+            self.conn.executescript(_MIGRATE_BREEDS)
+        self.conn.executescript(SCHEMA)
+        if migrate:
+            self._copy_breeds()
+        if "planned_at" not in [row[1] for row in self.conn.execute("PRAGMA table_info(judge_runs)")]:
+            # Runs logged before discovery completion was tracked count as not planned in full.
+            self.conn.execute("ALTER TABLE judge_runs ADD COLUMN planned_at REAL")
+        self._pending = 0
+
+    def _needs_breed_migration(self):
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(judges)")]
+        return bool(columns) and "breed" not in columns
+
+    def _copy_breeds(self):
+        with self.conn:
+            for statement in _COPY_BREEDS.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement, {"breed": DEFAULT_BREED})
+            self.conn.execute("DROP TABLE judges_v1")
+            self.conn.execute("DROP TABLE appointments_v1")
+        print(f"[INFO] Migrated stored judges to per-breed results ({DEFAULT_BREED}).")
+
+    def import_processed_file(self, processed_file):
+        """One-off migration of an old processed_judges.json into scrape_state."""
+        if not os.path.exists(processed_file):
+            return
+        if self.conn.execute("SELECT 1 FROM scrape_state LIMIT 1").fetchone():
+            return
+        try:
+            with open(processed_file, "r") as f:
+                processed = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Could not read {processed_file} for import: {e}")
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scrape_state (judge_id, data_hash, scraped_at) VALUES (?, ?, NULL)",
+                [(jid, v.get("data_hash")) for jid, v in processed.items()]
+            )
+        print(f"[INFO] Imported {len(processed)} judges from {processed_file}.")
+
+    def data_hash(self, judge_id):
+        """The profile hash the judge was last scraped with, or None."""
+        row = self.conn.execute("SELECT data_hash FROM scrape_state WHERE judge_id = ?", (judge_id,)).fetchone()
+        return row[0] if row else None
+
+    def processed_hashes(self):
+        """scrape_state in the shape processed_judges.json used: {judge_id: {"data_hash": ...}}."""
+        return {
+            jid: {"data_hash": data_hash}
+            for jid, data_hash in self.conn.execute("SELECT judge_id, data_hash FROM scrape_state")
+        }
+
+    def upsert_judge(self, judge_id, data_hash, result):
+        """Record a scraped judge's result for result["breed"]. Returns True if its stored content changed.
+
+        The profile (approved breeds, data_hash) is shared by all of a judge's breeds.
+        """
+        breed = result["breed"]
+        new_hash = content_hash(result)
+        row = self.conn.execute(
+            "SELECT content_hash FROM judges WHERE judge_id = ? AND breed = ?", (judge_id, breed)).fetchone()
+        changed = row is None or row[0] != new_hash
+        now = time.time()
+
+        if changed:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO judges
+                   (judge_id, breed, judge_name, breed_judge_id, address, golden_only, breed_only,
+                    total_appointments, last_appointment, content_hash, result_json, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (judge_id, breed, result["judge_name"], result["breed_judge_id"], result["address"],
+                 int(bool(result["golden_only"])), int(bool(result["breed_only"])), result["total_appointments"],
+                 result["last_appointment"], new_hash, json.dumps(result), now)
+            )
+            self.conn.execute("DELETE FROM approved_breeds WHERE judge_id = ?", (judge_id,))
+            self.conn.executemany(
+                "INSERT INTO approved_breeds (judge_id, group_name, breed, level) VALUES (?, ?, ?, ?)",
+                [(judge_id, b["group"], b["breed"], b["level"]) for b in result["approved_breeds"]]
+            )
+            self.conn.execute("DELETE FROM appointments WHERE judge_id = ? AND breed = ?", (judge_id, breed))
+            self.conn.executemany(
+                """INSERT INTO appointments
+                   (judge_id, breed, seq, date, appointment_date, club_name, sex_judged, dogs_judged, breed_average)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(judge_id, breed, i, a["date"], iso_date(a["date"]), a["club_name"], a["sex_judged"],
+                  a["dogs_judged"], a["breed_average"]) for i, a in enumerate(result["appointments"])]
+            )
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO scrape_state (judge_id, data_hash, scraped_at) VALUES (?, ?, ?)",
+            (judge_id, data_hash, now)
+        )
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+        return changed
+
+    def stored_breeds(self, judge_id):
+        """The breeds a result is stored for the judge under."""
+        return {breed for (breed,) in self.conn.execute("SELECT breed FROM judges WHERE judge_id = ?", (judge_id,))}
+
+    def retry_queue(self):
+        """Profile URLs of judges that failed in an earlier run, oldest failure first."""
+        return [url for (url,) in self.conn.execute("SELECT profile_url FROM retry_queue ORDER BY failed_at")]
+
+    def queue_retry(self, profile_url, error):
+        self.conn.execute(
+            """INSERT INTO retry_queue (profile_url, attempts, last_error, failed_at) VALUES (?, 1, ?, ?)
+               ON CONFLICT(profile_url) DO UPDATE SET
+                   attempts = attempts + 1, last_error = excluded.last_error, failed_at = excluded.failed_at""",
+            (profile_url, error, time.time())
+        )
+
+    def clear_retry(self, profile_url):
+        self.conn.execute("DELETE FROM retry_queue WHERE profile_url = ?", (profile_url,))
+
+    def listing_entry(self, profile_url):
+        """{"card_hash", "last_fetched"} for a judge seen on the listing before, else None.
+
+        card_hash is the card as it was when the profile was last fetched, so a
+        card that changed while its fetch failed still counts as changed next run.
+        """
+        row = self.conn.execute(
+            "SELECT card_hash, last_fetched FROM judge_listing WHERE profile_url = ?", (profile_url,)).fetchone()
+        return {"card_hash": row[0], "last_fetched": row[1]} if row else None
+
+    def record_listing(self, profile_url, judge_id, breeds, seen_at):
+        """Mark a judge as seen on the listing of each of `breeds` at `seen_at`.
+
+        Committed with the next batch. Once a breed's listing has been walked in
+        full, prune_listing_breeds() drops the judges it no longer lists.
+        """
+        self.conn.execute(
+            """INSERT INTO judge_listing (profile_url, judge_id, first_seen, last_seen) VALUES (?, ?, ?, ?)
+               ON CONFLICT(profile_url) DO UPDATE SET last_seen = excluded.last_seen""",
+            (profile_url, judge_id, seen_at, seen_at)
+        )
+        self.conn.executemany(
+            """INSERT INTO listing_breeds (profile_url, breed, last_seen) VALUES (?, ?, ?)
+               ON CONFLICT(profile_url, breed) DO UPDATE SET last_seen = excluded.last_seen""",
+            [(profile_url, breed, seen_at) for breed in breeds]
+        )
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+
+    def prune_listing_breeds(self, breeds, before):
+        """Forget the membership of judges not seen on a breed's listing since `before`."""
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM listing_breeds WHERE breed = ? AND last_seen < ?", [(breed, before) for breed in breeds])
+
+    def listing_breeds(self, profile_urls=None):
+        """{profile_url: [breeds]} from the last listing of each breed, for `profile_urls` or everyone."""
+        memberships = {}
+        for url, breed in self.conn.execute("SELECT profile_url, breed FROM listing_breeds ORDER BY breed"):
+            memberships.setdefault(url, []).append(breed)
+        if profile_urls is None:
+            return memberships
+        return {url: memberships[url] for url in profile_urls if url in memberships}
+
+    def mark_fetched(self, profile_url, card_hash, last_appointment=None):
+        """Record a successful profile check; last_appointment is kept if not given."""
+        self.conn.execute(
+            """UPDATE judge_listing SET card_hash = ?, last_fetched = ?,
+                   last_appointment = COALESCE(?, last_appointment)
+               WHERE profile_url = ?""",
+            (card_hash, time.time(), iso_date(last_appointment), profile_url)
+        )
+
+    # Run log: the target list of each judge run and which targets are done.
+    # Completions are written on the same connection as the judge upserts, so
+    # a batch commit checkpoints both together; after a crash, resuming
+    # re-scrapes at most the last uncommitted batch.
+
+    def start_run(self, run_id, targets, params):
+        """Record a new run. `targets` is a list of (profile_url, card_hash, reason); more can be
+        added with add_run_targets().
+
+        Earlier runs that never finished are marked superseded.
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE judge_runs SET status = 'superseded', updated_at = ? WHERE status = 'running'", (now,))
+            self.conn.execute(
+                """INSERT INTO judge_runs (run_id, status, params_json, started_at, updated_at)
+                   VALUES (?, 'running', ?, ?, ?)""",
+                (run_id, json.dumps(params), now, now)
+            )
+            self.add_run_targets(run_id, 0, targets)
+            stale = [run_id for (run_id,) in self.conn.execute(
+                "SELECT run_id FROM judge_runs WHERE status != 'running' ORDER BY started_at DESC LIMIT -1 OFFSET ?",
+                (JUDGE_RUNS_KEPT,))]
+            self.conn.executemany("DELETE FROM run_targets WHERE run_id = ?", [(r,) for r in stale])
+            self.conn.executemany("DELETE FROM judge_runs WHERE run_id = ?", [(r,) for r in stale])
+
+    def add_run_targets(self, run_id, first_seq, targets):
+        """Append (profile_url, card_hash, reason) targets to a run, numbered from `first_seq`.
+
+        Committed with the next batch, which is never later than the targets'
+        own completions.
+        """
+        self.conn.executemany(
+            "INSERT INTO run_targets (run_id, seq, profile_url, card_hash, reason) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, first_seq + i, url, card, reason) for i, (url, card, reason) in enumerate(targets)]
+        )
+
+    def mark_run_planned(self, run_id):
+        """Record that every target of the run has been added, i.e. its discovery finished.
+
+        Committed with the next batch, so never before the last targets themselves.
+        """
+        self.conn.execute("UPDATE judge_runs SET planned_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def run_target_urls(self, run_id):
+        return {url for (url,) in self.conn.execute("SELECT profile_url FROM run_targets WHERE run_id = ?", (run_id,))}
+
+    def get_run(self, run_id):
+        """A run's record with progress counts, or None. run_id "latest" is the newest unfinished run."""
+        if run_id == "latest":
+            row = self.conn.execute(
+                "SELECT run_id FROM judge_runs WHERE status = 'running' ORDER BY started_at DESC LIMIT 1").fetchone()
+            if row is None:
+                return None
+            run_id = row[0]
+        row = self.conn.execute(
+            """SELECT run_id, status, params_json, stats_json, started_at, updated_at, finished_at, planned_at
+               FROM judge_runs WHERE run_id = ?""", (run_id,)).fetchone()
+        if row is None:
+            return None
+        total, done = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(done), 0) FROM run_targets WHERE run_id = ?", (run_id,)).fetchone()
+        return {
+            "run_id": row[0],
+            "status": row[1],
+            "params": json.loads(row[2]) if row[2] else {},
+            "stats": json.loads(row[3]) if row[3] else None,
+            "started_at": row[4],
+            "updated_at": row[5],
+            "finished_at": row[6],
+            "planned": row[7] is not None,
+            "targets": total,
+            "done": done,
+        }
+
+    def list_runs(self, limit=20):
+        run_ids = [r for (r,) in self.conn.execute(
+            "SELECT run_id FROM judge_runs ORDER BY started_at DESC LIMIT ?", (limit,))]
+        return [self.get_run(run_id) for run_id in run_ids]
+
+    def pending_targets(self, run_id):
+        """The run's targets not yet done, in their original order, as (profile_url, card_hash, reason)."""
+        return self.conn.execute(
+            "SELECT profile_url, card_hash, reason FROM run_targets WHERE run_id = ? AND done = 0 ORDER BY seq",
+            (run_id,)
+        ).fetchall()
+
+    def mark_done(self, run_id, profile_url):
+        self.conn.execute(
+            "UPDATE run_targets SET done = 1 WHERE run_id = ? AND profile_url = ?", (run_id, profile_url))
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+
+    def finish_run(self, run_id, status, stats=None):
+        now = time.time()
+        self.conn.execute(
+            "UPDATE judge_runs SET status = ?, stats_json = ?, updated_at = ?, finished_at = ? WHERE run_id = ?",
+            (status, json.dumps(stats) if stats is not None else None, now, now, run_id)
+        )
+        self.commit()
+
+    def update_run_stats(self, run_id, stats):
+        """Merge `stats` into a run's recorded stats."""
+        row = self.conn.execute("SELECT stats_json FROM judge_runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return
+        merged = {**(json.loads(row[0]) if row[0] else {}), **stats}
+        with self.conn:
+            self.conn.execute("UPDATE judge_runs SET stats_json = ? WHERE run_id = ?", (json.dumps(merged), run_id))
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def get_result(self, judge_id, breed=DEFAULT_BREED):
+        row = self.conn.execute(
+            "SELECT result_json FROM judges WHERE judge_id = ? AND breed = ?", (judge_id, breed)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def checkpoint(self):
+        """Fold the WAL back into the main file so the .db can be copied on its own."""
+        self.commit()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+def export_filename(judge_id, breed=DEFAULT_BREED):
+    """judge_<id>_appointments.json for the default breed (the legacy name), judge_<id>_<breed>_appointments.json otherwise."""
+    if breed == DEFAULT_BREED:
+        return f"judge_{judge_id}_appointments.json"
+    slug = re.sub(r"[^a-z0-9]+", "-", breed.lower()).strip("-")
+    return f"judge_{judge_id}_{slug}_appointments.json"
+
+
+def export_json(store, judge_breeds, processed_file="processed_judges.json"):
+    """Write the per-judge JSON files for `judge_breeds` ((judge_id, breed) pairs) plus processed_judges.json.
+
+    Returns the paths written.
+    """
+    written = []
+    for judge_id, breed in judge_breeds:
+        result = store.get_result(judge_id, breed)
+        if result is None:
+            continue
+        fname = export_filename(judge_id, breed)
+        write_json(fname, result, indent=2)
+        written.append(fname)
+
+    write_json(processed_file, store.processed_hashes(), indent=2)
+    written.append(processed_file)
+    return written
@@ -1,326 +1,1065 @@
-from fastapi import FastAPI
-import json
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 import asyncio
-import base64
+import json
 import os
 import re
-import subprocess
-from pathlib import Path
 import hashlib
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import math
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import quote_plus
+from selectolax.lexbor import LexborHTMLParser
 import httpx
+from atomic_io import write_json
+from browser_pool import pool as browser_pool
+from columnar_export import ANALYTICS_EXPORT, APPOINTMENTS_FILE, EXPORT_DIR, PARQUET_MIME, export_appointments
+from critique_index import CRITIQUE_INDEX_DB, build_critique_index, critique_index_stats, search_critiques
+from critique_log import CritiqueLog
+from drive_utils import drive_sync, upload_to_drive
+from http_cache import HttpCache
+from judge_index import judge_index
+from judge_parser import DEFAULT_BREED, parse_date, parse_judge
+from judge_store import JudgeStore, export_json
+from jobs import current_job, progress, runner
+from memory_guard import MemoryGuard
+from metrics import SKIPS, count_page, registry, span
+from parse_pool import pool as parse_pool
+from request_policy import AimdLimiter, RequestPolicy
+from scheduler import scheduler
 from brazenbeacon_critiques_scraper import scrape_brazenbeacon_critiques
 
-app = FastAPI()
+# How often the lifespan task checks the shared browser and relaunches it if it crashed.
+# The browser is launched on the first lease, not at startup; until then the check is a no-op.
+BROWSER_HEALTH_INTERVAL = float(os.environ.get("BROWSER_HEALTH_INTERVAL", "60"))
 
-BASE_URL = "https://www.thekennelclub.org.uk"
-JUDGE_URL = "https://www.thekennelclub.org.uk/search/find-a-judge/?Breed=Retriever+(Golden)&SelectedChampionshipActivities=&SelectedNonChampionshipActivities=&SelectedPanelAFieldTrials=&SelectedPanelBFieldTrials=&SelectedSearchOptions=&SelectedSearchOptionsNotActivity=Dog+showing&Championship=False&NonChampionship=False&PanelA=False&PanelB=False&Distance=15&TotalResults=0&SearchProfile=True&SelectedBestInBreedGroups=&SelectedBestInSubGroups="
+# Built-in periodic runs (see scheduler): an interval such as "6h", "1d" or
+# "@daily", empty to leave runs to GET /run/judges and /run/critiques. The
+# offsets place each job within its interval; keep them apart so the two
+# scrapes start at different times.
+JUDGE_SCHEDULE = os.environ.get("JUDGE_SCHEDULE", "")
+JUDGE_SCHEDULE_OFFSET = os.environ.get("JUDGE_SCHEDULE_OFFSET", "2h")
+CRITIQUE_SCHEDULE = os.environ.get("CRITIQUE_SCHEDULE", "")
+CRITIQUE_SCHEDULE_OFFSET = os.environ.get("CRITIQUE_SCHEDULE_OFFSET", "5h")
 
-# Playwright path fix (Render specific)
-os.environ["PLAYWRIGHT_BROWSERS_PATH"] = "0"
-if not Path("/opt/render/.cache/ms-playwright/chromium").exists():
-    print("Chromium not found, installing...")
+async def browser_health_loop():
+    while True:
+        await asyncio.sleep(BROWSER_HEALTH_INTERVAL)
+        try:
+            await browser_pool.check()
+        except Exception as e:
+            print(f"[ERROR] Browser health check failed: {e}")
+
+async def load_judge_index():
     try:
-        subprocess.run(["playwright", "install", "chromium"], check=True)
+        await judge_index.refresh()
     except Exception as e:
-        print(f"Chromium install error: {e}")
-else:
-    print("Chromium is installed.")
-
-# Google Drive setup
-creds_b64 = os.environ.get("GOOGLE_SERVICE_ACCOUNT_BASE64")
-if creds_b64:
-    with open("credentials.json", "wb") as f:
-        f.write(base64.b64decode(creds_b64))
-else:
-    print("GOOGLE_SERVICE_ACCOUNT_BASE64 is not set.")
-
-SCOPES = ["https://www.googleapis.com/auth/drive.file"]
-credentials = service_account.Credentials.from_service_account_file("credentials.json", scopes=SCOPES)
-drive_service = build("drive", "v3", credentials=credentials)
-
-def upload_to_drive(local_path, mime_type="application/json"):
-    fname = os.path.basename(local_path)
-    folder_id = os.environ.get("GDRIVE_FOLDER_ID")
-    if not os.path.exists(local_path):
-        print(f"[ERROR] File not found: {local_path}")
-        return
-    if not folder_id:
-        print("[ERROR] GDRIVE_FOLDER_ID not set.")
+        print(f"[ERROR] Could not load judge index: {e}")
+
+async def build_missing_critique_index():
+    """Build the critique search index at startup if there is none yet but there are critiques."""
+    if os.path.exists(CRITIQUE_INDEX_DB) or not CritiqueLog().segments():
         return
+    try:
+        await asyncio.to_thread(build_critique_index)
+    except Exception as e:
+        print(f"[ERROR] Could not build critique index: {e}")
 
+async def run_schedule():
     try:
-        existing = drive_service.files().list(
-            q=f"name='{fname}' and trashed=false and '{folder_id}' in parents",
-            spaces="drive",
-            fields="files(id)"
-        ).execute()
+        if JUDGE_SCHEDULE:
+            scheduler.add("judges", fetch_golden_judges, JUDGE_SCHEDULE, offset=JUDGE_SCHEDULE_OFFSET,
+                          lock="judges-state")
+        if CRITIQUE_SCHEDULE:
+            scheduler.add("critiques", scrape_brazenbeacon_critiques, CRITIQUE_SCHEDULE,
+                          offset=CRITIQUE_SCHEDULE_OFFSET, lock="critiques-state")
+        await scheduler.run()
+    except ValueError as e:
+        print(f"[ERROR] Scheduler not started: {e}")
 
-        force_reupload = False
-        if existing["files"]:
-            file_id = existing["files"][0]["id"]
+@asynccontextmanager
+async def lifespan(app):
+    background = [
+        asyncio.create_task(browser_health_loop()),
+        asyncio.create_task(load_judge_index()),
+        asyncio.create_task(build_missing_critique_index()),
+        asyncio.create_task(run_schedule()),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    await browser_pool.stop()
+    parse_pool.shutdown()
 
-           # Get existing file metadata for comparison
-            existing_metadata = drive_service.files().get(fileId=file_id, fields="size, md5Checksum").execute()
-            local_md5 = generate_md5(local_path)
+app = FastAPI(lifespan=lifespan)
 
-            if existing_metadata.get("md5Checksum") == local_md5:
-                print(f"[INFO] Skipped uploading {fname} — identical to existing file in Drive.")
-                return  # Stop here, no need to update
-            print(f"[INFO] {fname} exists but content changed — overwriting.")
+BASE_URL = "https://www.thekennelclub.org.uk"
+JUDGE_URL = "https://www.thekennelclub.org.uk/search/find-a-judge/?Breed=Retriever+(Golden)&SelectedChampionshipActivities=&SelectedNonChampionshipActivities=&SelectedPanelAFieldTrials=&SelectedPanelBFieldTrials=&SelectedSearchOptions=&SelectedSearchOptionsNotActivity=Dog+showing&Championship=False&NonChampionship=False&PanelA=False&PanelB=False&Distance=15&TotalResults=0&SearchProfile=True&SelectedBestInBreedGroups=&SelectedBestInSubGroups="
 
-            try:
-                drive_service.files().update(
-                    fileId=file_id,
-                    media_body=MediaFileUpload(local_path, mimetype=mime_type)
-                ).execute()
-                print(f"[INFO] Updated {fname} in Drive.")
-            except Exception as update_error:
-                if "File not found" in str(update_error):
-                    print(f"[WARN] Ghost file detected for {fname}. Deleting and re-uploading...")
-                    try:
-                        drive_service.files().delete(fileId=file_id).execute()
-                        force_reupload = True
-                    except Exception as delete_error:
-                        print(f"[ERROR] Could not delete ghost file {fname}: {delete_error}")
-                        return
-                else:
-                    print(f"[ERROR] Update failed for {fname}: {update_error}")
-                    return
-        else:
-            force_reupload = True
+# Breeds to track, as {breed name: KC breed GUID}; the name is the listing's
+# Breed filter and the GUID the appointment page's SelectedBreed. Each breed is
+# discovered separately, but a judge listed under several breeds has its
+# profile fetched once and only the appointment pages are fetched per breed.
+# The first breed is the default for /judges/{id}.
+JUDGE_BREEDS = json.loads(os.environ.get("JUDGE_BREEDS") or "null") or {
+    DEFAULT_BREED: "14feb8f2-55ee-e811-a8a3-002248005d25",
+}
 
-        if force_reupload:
-            new_file = drive_service.files().create(
-                body={"name": fname, "parents": [folder_id]},
-                media_body=MediaFileUpload(local_path, mimetype=mime_type),
-                fields="id, webViewLink"
-            ).execute()
-            print(f"[INFO] Uploaded {fname} to Drive.")
-            print(f"[LINK] {new_file['webViewLink']}")
+# Judge scrape tuning: how many judges are fetched at once, and the maximum
+# requests per second sent to any single host (0 disables the rate limit).
+JUDGE_CONCURRENCY = int(os.environ.get("JUDGE_CONCURRENCY", "8"))
+JUDGE_RATE_PER_HOST = float(os.environ.get("JUDGE_RATE_PER_HOST", "5"))
 
-    except Exception as e:
-        print(f"[ERROR] Failed to upload {fname}: {e}")
+# Judge list discovery: "http" pages the listing's TotalResults parameter directly,
+# "browser" scrolls the page in Chromium, "auto" tries HTTP and falls back to the browser.
+JUDGE_DISCOVERY = os.environ.get("JUDGE_DISCOVERY", "auto")
+DISCOVERY_MODES = ("http", "browser", "auto")
+JUDGE_LIST_MAX_PAGES = int(os.environ.get("JUDGE_LIST_MAX_PAGES", "200"))
+
+# Judges that still fail after the request-level retries get this many more
+# passes at the end of the run; any left over are retried first next run.
+JUDGE_RETRY_PASSES = int(os.environ.get("JUDGE_RETRY_PASSES", "1"))
+JUDGE_RETRY_DELAY = float(os.environ.get("JUDGE_RETRY_DELAY", "5"))
+
+# Fetched judges waiting to be parsed, and parsed ones waiting to be saved,
+# are capped at JUDGE_PARSE_QUEUE each; at most JUDGE_PIPELINE_WINDOW judges
+# are between fetch and save at once. Fetchers wait when either is full.
+JUDGE_PARSE_QUEUE = int(os.environ.get("JUDGE_PARSE_QUEUE", "32"))
+JUDGE_PIPELINE_WINDOW = int(os.environ.get("JUDGE_PIPELINE_WINDOW", "256"))
+# Resident memory ceiling for a judge run, counting parser processes and the
+# browser; above it fetch concurrency is cut (see memory_guard). Sized for a
+# 512 MB instance; 0 only measures.
+JUDGE_MAX_RSS_MB = float(os.environ.get("JUDGE_MAX_RSS_MB", "450"))
+
+# Incremental refresh: "incremental" fetches only new judges, judges whose
+# listing card changed, judges not fetched for JUDGE_FULL_REFRESH_DAYS, and the
+# JUDGE_REFRESH_SLICE share of the rest that was fetched longest ago; "full"
+# fetches every listed judge. The default slice spreads one full pass over the
+# refresh interval for a daily run, so no judge is ever older than the interval.
+JUDGE_REFRESH = os.environ.get("JUDGE_REFRESH", "incremental")
+JUDGE_FULL_REFRESH_DAYS = float(os.environ.get("JUDGE_FULL_REFRESH_DAYS", "7"))
+JUDGE_REFRESH_SLICE = float(os.environ.get("JUDGE_REFRESH_SLICE", str(1 / max(1.0, JUDGE_FULL_REFRESH_DAYS))))
+
+# Also write the legacy judge_<id>_appointments.json / processed_judges.json files.
+EXPORT_JSON = os.environ.get("EXPORT_JSON", "").lower() in ("1", "true", "yes")
 
 def generate_data_hash(data: str) -> str:
     return hashlib.sha256(data.encode('utf-8')).hexdigest()
 
-def generate_md5(file_path):
-    """Generate an MD5 hash for a given file (to match Google Drive's checksum)."""
-    md5 = hashlib.md5()
-    try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                md5.update(chunk)
-        return md5.hexdigest()
-    except Exception as e:
-        print(f"[WARNING] Could not hash {file_path}: {e}")
-        return None
+# ---------------------------------------------
+# FETCH JUDGE LINKS
+# ---------------------------------------------
+def is_profile_link(href):
+    return bool(href) and "judge-profile/" in href and "judge-appointment" not in href
+
+def judge_list_url(total_results, breed=None):
+    """JUDGE_URL with its TotalResults paging offset and, if given, its Breed filter set."""
+    url = re.sub(r"TotalResults=\d*", f"TotalResults={total_results}", JUDGE_URL)
+    if breed is not None:
+        url = re.sub(r"(?<=[?&])Breed=[^&]*", lambda _: f"Breed={quote_plus(breed)}", url)
+    return url
+
+def appointment_url(judge_id, breed_guid):
+    return f"{BASE_URL}/search/find-a-judge/judge-profile/judge-appointment/?JudgeId={judge_id}&SelectedBreed={breed_guid}"
+
+def judge_id_from_url(profile_url):
+    match = re.search(r'judgeid=([a-f0-9\-]+)', profile_url, re.IGNORECASE)
+    return match.group(1) if match else None
+
+def card_hash(text):
+    """Hash of a listing card's visible text (name, location, tags), whitespace-insensitive."""
+    return generate_data_hash(" ".join(text.split())) if text else None
+
+def parse_judge_cards(html):
+    """{profile URL: card hash} for every judge card on a listing page."""
+    tree = LexborHTMLParser(html)
+    cards = {}
+    for a_tag in tree.css("a.m-judge-card__link"):
+        href = a_tag.attributes.get("href")
+        if not is_profile_link(href):
+            continue
+        card = a_tag.parent
+        while card is not None and "m-judge-card" not in (card.attributes.get("class") or "").split():
+            card = card.parent
+        cards[BASE_URL + href] = card_hash((card or a_tag).text(separator=" "))
+    return cards
+
+async def discover_judges_http(concurrency=JUDGE_CONCURRENCY, breed=None, policy=None):
+    """Walk the listing's TotalResults pages over plain HTTP, a window of pages at a time.
 
-def should_update_file(local_path, new_data):
-    if not os.path.exists(local_path):
-        return True  # No file yet
+    The first page tells us the page size; later windows are fetched
+    concurrently until a page adds no new judges. Yields each page's new
+    {profile URL: card hash} as soon as it is parsed. Raises RuntimeError if a
+    later page repeats the first one, i.e. the site ignored the paging offset
+    and the walk would silently stop at one page.
+    """
+    policy = policy or RequestPolicy("judges", rate=JUDGE_RATE_PER_HOST, max_concurrency=concurrency)
+    stats = {"pages": 0}
+    seen = set()
+    async with policy.client(follow_redirects=True) as client:
+        first_html, _ = await fetch_page(client, judge_list_url(0, breed), stats, kind="listing")
+        with span("parse", "judges", kind="listing"):
+            cards = parse_judge_cards(first_html)
+        page_size = len(cards)
+        if not page_size:
+            return
+        seen.update(cards)
+        first_page = set(cards)
+        yield cards
+
+        window = max(1, int(concurrency))
+        next_page = 1
+        while next_page < JUDGE_LIST_MAX_PAGES:
+            offsets = [n * page_size for n in range(next_page, min(next_page + window, JUDGE_LIST_MAX_PAGES))]
+            pages = await asyncio.gather(*(
+                fetch_page(client, judge_list_url(offset, breed), stats, kind="listing") for offset in offsets
+            ))
+            exhausted = False
+            for html, _ in pages:
+                with span("parse", "judges", kind="listing"):
+                    found = parse_judge_cards(html)
+                if found.keys() == first_page:
+                    raise RuntimeError("the judge listing ignored its paging offset and repeated the first page")
+                new = {url: card for url, card in found.items() if url not in seen}
+                if not new:
+                    exhausted = True
+                    continue
+                seen.update(new)
+                yield new
+            del pages
+            if exhausted:
+                break
+            next_page += window
+    print(f"[INFO] HTTP discovery read {stats['pages']} listing pages.")
+
+# Profile cards the listing has loaded from index `start` on, as [href, card text] pairs.
+_CARDS_FROM_JS = """start => Array.from(document.querySelectorAll('a.m-judge-card__link')).slice(start)
+    .map(a => [a.getAttribute('href'), (a.closest('.m-judge-card') || a).textContent])"""
+
+async def discover_judges_browser(breed=None):
+    """Original discovery: load the listing in Chromium and scroll until it stops growing.
+
+    Yields the cards each scroll loads as {profile URL: card hash}.
+    """
+    async with browser_pool.lease() as context:
+        page = await context.new_page()
+        await page.goto(judge_list_url(0, breed), wait_until="networkidle")
+
+        # Scroll until all judge cards are loaded, handing on the new ones after each scroll.
+        loaded = 0
+        previous_height = None
+        while True:
+            links = await page.evaluate(_CARDS_FROM_JS, loaded)
+            loaded += len(links)
+            # Filter: profile links only
+            cards = {BASE_URL + href: card_hash(text) for href, text in links if is_profile_link(href)}
+            if cards:
+                yield cards
+            current_height = await page.evaluate("document.body.scrollHeight")
+            if previous_height == current_height:
+                break
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            await asyncio.sleep(1)
+            previous_height = current_height
+
+async def stream_judge_links(mode=JUDGE_DISCOVERY, concurrency=JUDGE_CONCURRENCY, breed=None, policy=None,
+                             report=None):
+    """Yield batches of {profile URL: card hash} as one breed's listing is walked.
+
+    mode is "http", "browser", or "auto" (HTTP first, browser if it finds
+    nothing or fails); anything else raises ValueError. `breed` overrides the
+    listing's Breed filter. `report`, if given, is filled in with the mode
+    actually used, seconds taken and judges listed.
+    """
+    if mode not in DISCOVERY_MODES:
+        raise ValueError(f"discovery must be one of {', '.join(DISCOVERY_MODES)}, not {mode!r}")
+    started = time.perf_counter()
+    report = {} if report is None else report
+    seen = set()
+    used = mode
+    label = breed or "listing"
+    with span("discovery", "judges", mode=mode):
+        if mode in ("http", "auto"):
+            try:
+                async for cards in discover_judges_http(concurrency, breed, policy):
+                    used = "http"
+                    seen.update(cards)
+                    yield cards
+            except Exception as e:
+                if mode == "http":
+                    raise
+                print(f"[WARN] HTTP judge discovery failed: {e}")
+                used = mode
+            if not seen and mode == "auto":
+                print("[WARN] HTTP judge discovery found no judges, falling back to browser.")
+        if mode == "browser" or (mode == "auto" and used != "http"):
+            print("[INFO] Using Playwright to fetch filtered judge list...")
+            used = "browser"
+            # After a failed HTTP walk only the judges it had not reached yet are new.
+            async for cards in discover_judges_browser(breed):
+                new = {url: card for url, card in cards.items() if url not in seen}
+                if new:
+                    seen.update(new)
+                    yield new
+    elapsed = time.perf_counter() - started
+    report.update(mode=used, elapsed_s=round(elapsed, 2), listed=len(seen))
+    print(f"[INFO] Judge discovery ({used}, {label}) found {len(seen)} judges in {elapsed:.1f}s.")
+
+async def discover_judge_links(mode=JUDGE_DISCOVERY, concurrency=JUDGE_CONCURRENCY, breed=None, policy=None):
+    """Returns ({profile URL: card hash} sorted by URL, mode actually used, seconds taken)."""
+    report = {}
+    judge_links = {}
+    async for cards in stream_judge_links(mode, concurrency, breed, policy, report):
+        judge_links.update(cards)
+    return dict(sorted(judge_links.items())), report["mode"], report["elapsed_s"]
+
+async def stream_breeds(mode=JUDGE_DISCOVERY, concurrency=JUDGE_CONCURRENCY, breeds=JUDGE_BREEDS, report=None,
+                        policy=None):
+    """Walk every breed's listing concurrently and yield (profile URL, card hash, [breeds]) per judge.
+
+    A judge is yielded once every breed has either listed it or finished, so
+    its breeds (in `breeds` order) are complete; with one breed that is as
+    soon as it is found. A judge's card hash covers the breeds it is listed
+    under, so joining or leaving a breed counts as a card change. `report` is
+    filled in with {"breeds": {breed: stream_judge_links report}, "elapsed_s"}.
+    The shared browser is closed as soon as every listing is walked. `policy`
+    is the run's RequestPolicy, shared with the scrape.
+    """
+    started = time.perf_counter()
+    report = {} if report is None else report
+    breeds = list(breeds)
+    reports = report.setdefault("breeds", {breed: {} for breed in breeds})
+    # One policy for all breeds, so they share the per-host rate limit.
+    policy = policy or RequestPolicy("judges", rate=JUDGE_RATE_PER_HOST, max_concurrency=concurrency)
+    if len(breeds) == 1:
+        async for cards in stream_judge_links(mode, concurrency, breeds[0], policy, reports[breeds[0]]):
+            for url, card in cards.items():
+                yield url, card, breeds
+    else:
+        found = asyncio.Queue()
+
+        async def walk(breed):
+            try:
+                async for cards in stream_judge_links(mode, concurrency, breed, policy, reports[breed]):
+                    await found.put((breed, cards))
+                await found.put((breed, None))
+            except Exception as e:
+                await found.put((breed, e))
+
+        walks = [asyncio.create_task(walk(breed)) for breed in breeds]
+        listed = {}
+        finished = set()
+        try:
+            while len(finished) < len(breeds):
+                breed, cards = await found.get()
+                if isinstance(cards, Exception):
+                    raise cards
+                if cards is None:
+                    finished.add(breed)
+                    ready = list(listed)
+                else:
+                    for url, card in cards.items():
+                        listed.setdefault(url, {})[breed] = card
+                    ready = list(cards)
+                for url in ready:
+                    entries = listed[url]
+                    if all(b in entries or b in finished for b in breeds):
+                        del listed[url]
+                        yield (url, card_hash(" ".join(sorted(f"{b}={card}" for b, card in entries.items()))),
+                               [b for b in breeds if b in entries])
+        finally:
+            for task in walks:
+                task.cancel()
+            await asyncio.gather(*walks, return_exceptions=True)
+    report["elapsed_s"] = round(time.perf_counter() - started, 2)
+    await browser_pool.stop_if_idle()
+
+async def fetch_golden_judges(concurrency=JUDGE_CONCURRENCY, discovery=JUDGE_DISCOVERY, refresh=JUDGE_REFRESH,
+                              resume=None):
+    """Discover and scrape judges. With `resume` (a run ID, or "latest"), finish that
+    interrupted run's remaining judges instead; discovery is walked again only if
+    the run stopped before it finished.
+
+    Judges are scraped while discovery is still walking the listing. The whole
+    run, index reload included, is watched by a MemoryGuard: fetch concurrency
+    is cut while memory is over JUDGE_MAX_RSS_MB, and the peak is reported in
+    the run's stats.
+    """
+    guard = MemoryGuard("judges", JUDGE_MAX_RSS_MB)
+    # Discovery and the scrape run at the same time against the same host, so
+    # they share one policy: one rate limit, and a 429, Retry-After or open
+    # circuit seen by either slows both.
+    policy = RequestPolicy("judges", rate=JUDGE_RATE_PER_HOST, max_concurrency=concurrency)
     try:
-        with open(local_path, 'r') as f:
-            existing_data = json.load(f)
-        return existing_data != new_data  # Only update if the content has changed
+        with guard:
+            report = {}
+            listing = stream_breeds(discovery, concurrency, JUDGE_BREEDS, report, policy)
+            stats = await scrape_appointments_from_html(listing, concurrency=concurrency, refresh=refresh,
+                                                        resume=resume, guard=guard, policy=policy)
+            if report.get("breeds"):
+                stats["discovery"] = {
+                    "mode": ", ".join(sorted({r["mode"] for r in report["breeds"].values()})),
+                    "elapsed_s": report.get("elapsed_s"),
+                    "listed": {breed: r["listed"] for breed, r in report["breeds"].items()},
+                }
+            await load_judge_index()
+        stats["memory"] = guard.stats()
+        print(f"[INFO] Judge run peak memory {guard.peak_mb:.0f} MB "
+              f"(this process {guard.peak_process_mb:.0f} MB, ceiling {JUDGE_MAX_RSS_MB:.0f} MB).")
+        store = JudgeStore()
+        try:
+            store.update_run_stats(stats["run_id"], {"memory": stats["memory"]})
+        finally:
+            store.close()
+        return stats
+
     except Exception as e:
-        print(f"[WARNING] Could not read existing file {local_path}: {e}")
-        return True  # If unreadable, play it safe and overwrite
+        print(f"[ERROR] Judge fetch failed: {e}")
+        raise
+    finally:
+        await asyncio.to_thread(drive_sync.finish)
 
 # ---------------------------------------------
-# FETCH JUDGE LINKS WITH PLAYWRIGHT ONLY
+# SCRAPE APPOINTMENTS FOR FILTERED JUDGES
 # ---------------------------------------------
-async def fetch_golden_judges():
-    print("[INFO] Launching Playwright to fetch filtered judge list...")
-    judge_links = set()
+async def fetch_page(client, url, stats, cache=None, kind="page"):
+    """GET `url`, revalidating against `cache` if given. Returns (text, not_modified).
+
+    Rate limiting and retries happen in the client's RequestPolicy.
+    """
+    headers = cache.conditional_headers(url) if cache else {}
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            await page.goto(JUDGE_URL, wait_until="networkidle")
-
-            # Scroll until all judge cards are loaded
-            previous_height = None
-            while True:
-                current_height = await page.evaluate("document.body.scrollHeight")
-                if previous_height == current_height:
-                    break
-                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                await asyncio.sleep(1)
-                previous_height = current_height
+        with span("fetch", "judges", kind=kind, url=url):
+            resp = await client.get(url, headers=headers)
+    except BaseException:
+        if cache:
+            cache.discard(url)
+        raise
+    stats["pages"] += 1
+    count_page("judges", kind, resp.status_code, len(resp.content))
+    if cache and resp.status_code == 304:
+        return cache.not_modified(url), True
+    if cache and not resp.is_success:
+        cache.discard(url)
+    resp.raise_for_status()
+    if cache:
+        cache.store(url, resp)
+    return resp.text, False
 
-            # Filter: profile links only
-            elements = await page.query_selector_all("a.m-judge-card__link")
-            for el in elements:
-                href = await el.get_attribute("href")
-                if href and "judge-profile/" in href and "judge-appointment" not in href:
-                    judge_links.add(BASE_URL + href)
+async def fetch_judge(client, profile_url, breeds, store, stats, cache=None, force=False):
+    """Fetch one judge's pages for `breeds` ({breed: GUID}); parsing is left to the parse stage.
+
+    The profile is fetched once and each breed's appointments page concurrently.
+    Returns (judge_id, data_hash, profile_html, {breed: appointments html}), or
+    None if skipped. An unchanged profile only fetches the breeds not yet
+    stored for the judge, unless `force` is set.
+    """
+    judge_id = judge_id_from_url(profile_url)
+    if not judge_id:
+        print(f"[ERROR] Could not extract judge ID from: {profile_url}")
+        return None
+
+    # A 304 hands back the cached body, which still goes through the hash check
+    # so a judge whose last save failed is not skipped by mistake.
+    profile_html, _ = await fetch_page(client, profile_url, stats, cache, kind="profile")
+    with span("diff", "judges"):
+        current_data_hash = generate_data_hash(profile_html)
+        unchanged = store.data_hash(judge_id) == current_data_hash
 
-            await browser.close()
+    wanted = breeds
+    if unchanged and not force:
+        stored = store.stored_breeds(judge_id)
+        wanted = {breed: guid for breed, guid in breeds.items() if breed not in stored}
+        if not wanted:
+            SKIPS.inc(pipeline="judges", reason="unchanged")
+            print(f"[INFO] Skipping unchanged judge: {judge_id}")
+            return None
 
-        judge_links = sorted(judge_links)
-        with open("judge_profile_links.json", "w") as f:
-            json.dump(judge_links, f, indent=2)
+    pages = await asyncio.gather(*(
+        fetch_page(client, appointment_url(judge_id, guid), stats, cache, kind="appointments")
+        for guid in wanted.values()
+    ))
+    return judge_id, current_data_hash, profile_html, {breed: html for breed, (html, _) in zip(wanted, pages)}
 
-        print(f"[INFO] Extracted {len(judge_links)} filtered Golden Retriever judge links.")
+def refresh_reason(seen, card, now=None):
+    """Why an incremental run fetches a listed judge ("new", "card_changed" or "stale"), or
+    None if it is not due and only a candidate for this run's rotation slice.
+
+    `seen` is the judge's JudgeStore.listing_entry() from before this run.
+    """
+    now = time.time() if now is None else now
+    if not seen or seen["last_fetched"] is None:
+        return "new"
+    if card and card != seen["card_hash"]:
+        return "card_changed"
+    if now - seen["last_fetched"] >= JUDGE_FULL_REFRESH_DAYS * 86400:
+        return "stale"
+    return None
+
+def rotation_slice(rest):
+    """The rotation picks among `rest` ((last_fetched, ...) for judges not due): longest since last fetch first."""
+    rest.sort(key=lambda entry: entry[0])
+    return rest[:math.ceil(len(rest) * max(0.0, JUDGE_REFRESH_SLICE))]
+
+def target_breeds(store, urls):
+    """{profile URL: {breed: GUID}}: the configured breeds each judge was last listed under.
+
+    A judge with no recorded listing (e.g. queued for retry before breeds were
+    tracked) gets the first configured breed.
+    """
+    listed = store.listing_breeds(urls)
+    first = next(iter(JUDGE_BREEDS))
+    targets = {}
+    for url in urls:
+        breeds = {breed: guid for breed, guid in JUDGE_BREEDS.items() if breed in listed.get(url, ())}
+        targets[url] = breeds or {first: JUDGE_BREEDS[first]}
+    return targets
+
+async def plan_targets(store, listing, refresh, retry_queue, report):
+    """This run's judges, yielded as discovery finds them: the listing (or, when incremental, the
+    part of it that is due) and then the retry queue.
+
+    `listing` yields (profile URL, card hash, [breeds]) from stream_breeds();
+    each judge's listing is recorded as it arrives. Targets are
+    (profile URL, card hash, reason, {breed: GUID}); reason is None on a full
+    refresh. New, changed and stale judges go straight to the scrape; the
+    rotation slice can only be picked once the whole listing is known, so it
+    follows. `report` is filled in with the judges listed and the reasons.
+
+    A breed whose listing came back empty keeps its stored memberships, and
+    judge_profile_links.json is then left as it was: an empty page is far
+    more likely a broken listing than every judge retiring at once.
+    """
+    incremental = refresh == "incremental"
+    seen_at = time.time()
+    links = []
+    per_breed = {breed: 0 for breed in JUDGE_BREEDS}
+    rest = []
+    targeted = set()
+    reasons = {}
+    report["listed"] = 0
+
+    def target(url, card, reason, breeds):
+        targeted.add(url)
+        if reason:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        return url, card, reason, breeds
+
+    async for url, card, listed_breeds in listing:
+        report["listed"] += 1
+        links.append(url)
+        for breed in listed_breeds:
+            per_breed[breed] = per_breed.get(breed, 0) + 1
+        seen = store.listing_entry(url)
+        store.record_listing(url, judge_id_from_url(url), listed_breeds, seen_at)
+        breeds = {breed: JUDGE_BREEDS[breed] for breed in listed_breeds}
+        reason = refresh_reason(seen, card, seen_at) if incremental else None
+        if incremental and reason is None:
+            rest.append((seen["last_fetched"], url, card, breeds))
+        else:
+            yield target(url, card, reason, breeds)
+
+    # Every breed has been walked in full, so judges a listing no longer shows can be dropped from it.
+    empty = [breed for breed, count in per_breed.items() if not count]
+    store.prune_listing_breeds([breed for breed in per_breed if breed not in empty], seen_at)
+    if empty:
+        print(f"[WARN] No judges listed for {', '.join(empty)}; keeping their stored listing "
+              f"and the previous judge_profile_links.json.")
+    else:
+        links.sort()
+        write_json("judge_profile_links.json", links, indent=2)
         upload_to_drive("judge_profile_links.json")
-        await scrape_appointments_from_html(judge_links)
+    print(f"[INFO] Extracted {len(links)} filtered judge links across {len(JUDGE_BREEDS)} breeds.")
 
-    except Exception as e:
-        print(f"[ERROR] Playwright judge fetch failed: {e}")
+    not_due = {}
+    if incremental:
+        picked = rotation_slice(rest)
+        for _, url, card, breeds in picked:
+            yield target(url, card, "rotation", breeds)
+        not_due = {url: (card, breeds) for _, url, card, breeds in rest[len(picked):]}
+        if not_due:
+            SKIPS.inc(len(not_due), pipeline="judges", reason="not_due")
+        print(f"[INFO] Incremental refresh: fetching {len(targeted)} of {len(links)} judges {reasons}.")
+    del links, rest
 
-# ---------------------------------------------
-# SCRAPE APPOINTMENTS FOR FILTERED JUDGES
-# ---------------------------------------------
-async def scrape_appointments_from_html(judge_links):
+    # Judges that failed last run go to the back of this run's list.
+    queued = [url for url in retry_queue if url not in targeted]
+    if queued:
+        print(f"[INFO] Retrying {len(queued)} judges that failed in an earlier run.")
+        breeds = target_breeds(store, queued)
+        for url in queued:
+            card, listed_breeds = not_due.get(url, (None, breeds[url]))
+            yield target(url, card, "retry" if incremental else None, listed_breeds)
+
+async def _each(items):
+    for item in items:
+        yield item
+
+async def resume_targets(logged, known, planned):
+    """An interrupted run's remaining `logged` targets, then those of `planned` whose URL is not in `known`."""
+    for target in logged:
+        yield target
+    async for target in planned:
+        if target[0] not in known:
+            yield target
+
+async def scrape_appointments_from_html(listing, concurrency=JUDGE_CONCURRENCY, refresh="full", resume=None,
+                                        guard=None, policy=None):
+    """Scrape the judges `listing` (from stream_breeds()) yields into the judge store, as they arrive.
+
+    In "incremental" refresh mode only the judges plan_targets() picks are
+    fetched. A judge is scraped for every configured breed it is listed under.
+
+    Every run logs its target list in the store as targets are planned, and
+    that the list is complete once discovery finishes, and marks judges done
+    as they are saved. `resume` (a run ID or "latest") continues an
+    unfinished run from its remaining targets; `listing` is only walked if
+    the run's discovery had not finished, for the judges not yet in its log.
+    `guard` (a MemoryGuard) throttles fetch concurrency while memory is over its ceiling.
+    `policy` is the RequestPolicy shared with discovery; by default the scrape gets its own.
+    """
     PROCESSED_FILE = "processed_judges.json"
-    if os.path.exists(PROCESSED_FILE):
-        with open(PROCESSED_FILE, "r") as f:
-            processed_judges = json.load(f)
-    else:
-        processed_judges = {}
+    store = JudgeStore()
+    try:
+        store.import_processed_file(PROCESSED_FILE)
+        retry_queue = store.retry_queue()
+        retrying = set(retry_queue)
+        guard = guard or MemoryGuard("judges", 0)
+        planned = {}
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        for profile_url in judge_links:
-            try:
-                judge_id_match = re.search(r'judgeid=([a-f0-9\-]+)', profile_url, re.IGNORECASE)
-                if not judge_id_match:
-                    print(f"[ERROR] Could not extract judge ID from: {profile_url}")
-                    continue
-                judge_id = judge_id_match.group(1)
-
-                profile_resp = await client.get(profile_url)
-                profile_resp.raise_for_status()
-                profile_soup = BeautifulSoup(profile_resp.text, "html.parser")
-                current_data_hash = generate_data_hash(profile_resp.text)
-
-                if judge_id in processed_judges:
-                    if processed_judges[judge_id].get("data_hash") == current_data_hash:
-                        print(f"[INFO] Skipping unchanged judge: {judge_id}")
-                        continue
-
-                name_tag = profile_soup.select_one("div.t-judge-profile__name")
-                raw_name = name_tag.get_text(strip=True) if name_tag else ""
-                match = re.match(r"^(.*?)(?:\s*Breed Judge ID\s*(\d+))?$", raw_name)
-                judge_name = match.group(1).strip() if match else "Unknown"
-                breed_judge_id = match.group(2) if match else None
-
-                address_tag = profile_soup.select_one("dt:contains('Address') + dd")
-                address = address_tag.get_text(separator=", ", strip=True) if address_tag else None
-
-                approved_breeds = []
-                group_headers = profile_soup.select("h4")
-                for group in group_headers:
-                    group_name = group.get_text(strip=True)
-                    ul = group.find_next_sibling("ul", class_="t-judge-profile__long-list")
-                    if ul:
-                        for li in ul.find_all("li"):
-                            breed = li.find("a") or li.find("label")
-                            level = li.find_all("label")[-1]
-                            if breed and level:
-                                approved_breeds.append({
-                                    "group": group_name,
-                                    "breed": breed.get_text(strip=True),
-                                    "level": level.get_text(strip=True)
-                                })
-
-                appt_url = f"{BASE_URL}/search/find-a-judge/judge-profile/judge-appointment/?JudgeId={judge_id}&SelectedBreed=14feb8f2-55ee-e811-a8a3-002248005d25"
-                appt_resp = await client.get(appt_url)
-                appt_resp.raise_for_status()
-                appt_soup = BeautifulSoup(appt_resp.text, "html.parser")
-
-                appointments = []
-                rows = appt_soup.select("table.a-table__table tbody tr")
-                for row in rows:
-                    cols = row.find_all(["td", "th"])
-                    if len(cols) < 5:
-                        continue
-                    sex_icon = cols[2].find("svg")
-                    sex = None
-                    if sex_icon:
-                        if "a-icon--female" in sex_icon.get("class", []):
-                            sex = "Bitch"
-                        elif "a-icon--male" in sex_icon.get("class", []):
-                            sex = "Dog"
-                    appointments.append({
-                        "date": cols[0].get_text(strip=True),
-                        "club_name": cols[1].get_text(strip=True),
-                        "sex_judged": sex,
-                        "dogs_judged": cols[3].get_text(strip=True),
-                        "breed_average": cols[4].get_text(strip=True)
-                    })
-
-                golden_found = any(
-                    b["breed"].lower().strip() == "retriever (golden)"
-                    for b in approved_breeds
-                )
-                other_breeds = [
-                    b for b in approved_breeds
-                    if b["breed"].lower().strip() != "retriever (golden)"
-                ]
-
-                result = {
-                    "judge_name": judge_name,
-                    "judge_id": judge_id,
-                    "breed_judge_id": breed_judge_id,
-                    "address": address,
-                    "approved_breeds": approved_breeds,
-                    "total_appointments": len(appointments),
-                    "years_active": sorted({
-                        int(m.group(1)) for a in appointments if (m := re.search(r"\b(\d{4})\b", a["date"]))
-                    }),
-                    "clubs_judged": sorted({a["club_name"] for a in appointments if a.get("club_name")}),
-                    "golden_only": golden_found and len(other_breeds) <= 2,
-                    "other_breeds": other_breeds,
-                    "appointments": appointments,
-                    "last_appointment": max((a["date"] for a in appointments if a.get("date")), default=None)
-                }
+        if resume:
+            run = store.get_run(resume)
+            if run is None or run["status"] != "running":
+                raise ValueError(f"No unfinished judge run {resume}")
+            run_id = run["run_id"]
+            pending = store.pending_targets(run_id)
+            breeds = target_breeds(store, [url for url, _, _ in pending])
+            resumed = [(url, card, reason, breeds[url]) for url, card, reason in pending]
+            refresh = run["params"].get("refresh", "full")
+            print(f"[INFO] Resuming judge run {run_id}: {run['done']} of {run['targets']} judges already done, "
+                  f"{len(pending)} to go.")
+            progress(done=run["done"], total=run["targets"])
+            if run["planned"]:
+                targets = _each(resumed)
+                log_targets = None
+            else:
+                # The run stopped during discovery: after its logged targets, walk
+                # the listing again for the judges it had not reached yet.
+                print(f"[INFO] Judge run {run_id} stopped before discovery finished; walking the listing again.")
+                targets = resume_targets(resumed, store.run_target_urls(run_id),
+                                         plan_targets(store, listing, refresh, retry_queue, planned))
+                log_targets = (len(resumed), run["targets"])
+            del pending, breeds, resumed
+        else:
+            job = current_job()
+            run_id = job.id if job else uuid.uuid4().hex[:12]
+            store.start_run(run_id, [], {"refresh": refresh, "concurrency": concurrency})
+            print(f"[INFO] Judge run {run_id}: scraping judges as discovery finds them.")
+            targets = plan_targets(store, listing, refresh, retry_queue, planned)
+            log_targets = (0, 0)
+            progress(done=0, total=0)
 
-                fname = f"judge_{judge_id}_appointments.json"
-                if should_update_file(fname, result):
-                    with open(fname, "w") as f:
-                        json.dump(result, f, indent=2)
-                    print(f"[INFO] Scraped {len(appointments)} appointments for {judge_name} (Breed Judge ID: {breed_judge_id}).")
-                    upload_to_drive(fname)
-                else:
-                    print(f"[INFO] Skipped updating {fname} — no changes detected.")
+        # A run is four stages: discovery (or the resumed run's log) feeds targets
+        # in, up to `concurrency` fetchers download each judge's pages, parser
+        # processes turn them into results, and one writer saves them strictly in
+        # target order so the store matches a serial run exactly. Each parsed page
+        # is dropped as soon as its result exists, and each result once saved.
+        concurrency = max(1, int(concurrency))
+        parsers = max(1, parse_pool.workers)
+        window = max(JUDGE_PIPELINE_WINDOW, concurrency + 2 * JUDGE_PARSE_QUEUE)
+        policy = policy or RequestPolicy("judges", rate=JUDGE_RATE_PER_HOST, max_concurrency=concurrency)
+        limiter = AimdLimiter(concurrency)
+        stats = {"pages": 0}
+        cache = HttpCache()
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        changed = []
+        failed = {}
+        listed_breeds = {breed: 0 for breed in JUDGE_BREEDS}
+        started = time.perf_counter()
 
-                processed_judges[judge_id] = {"data_hash": current_data_hash}
-                if should_update_file(PROCESSED_FILE, processed_judges):
-                    with open(PROCESSED_FILE, "w") as f:
-                        json.dump(processed_judges, f, indent=2)
-                    upload_to_drive(PROCESSED_FILE)
-                else:
-                    print(f"[INFO] Skipped updating {PROCESSED_FILE} — no changes detected.")
+        async with policy.client(limits=limits) as client:
+            async def fetch(target):
+                profile_url, _, reason, breeds = target
+                try:
+                    # Stale and rotation picks exist to bound staleness, so they
+                    # re-read the appointments even if the profile is unchanged.
+                    async with guard.throttle(limiter):
+                        return await fetch_judge(client, profile_url, breeds, store, stats, cache,
+                                                 force=reason in ("stale", "rotation"))
+                except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+                    print(f"[TIMEOUT] Judge timed out, queued for retry: {profile_url}")
+                    failed[profile_url] = f"timeout: {type(e).__name__}"
+                except Exception as e:
+                    print(f"[ERROR] Failed to process judge, queued for retry: {profile_url}\nReason: {e}")
+                    failed[profile_url] = f"{type(e).__name__}: {e}"
+                return None
 
-            except asyncio.TimeoutError:
-                print(f"[TIMEOUT] Skipped judge due to timeout: {profile_url}")
-            except Exception as e:
-                print(f"[ERROR] Failed to process judge: {profile_url}\nReason: {e}")
+            async def parse(target, fetched):
+                judge_id, data_hash, profile_html, pages = fetched
+                try:
+                    with span("parse", "judges", kind="judge"):
+                        results = await parse_pool.run(parse_judge, judge_id, profile_html, pages)
+                    return judge_id, data_hash, results
+                except Exception as e:
+                    print(f"[ERROR] Failed to parse judge, queued for retry: {target[0]}\nReason: {e}")
+                    failed[target[0]] = f"{type(e).__name__}: {e}"
+                    return None
+
+            def save(target, scraped):
+                profile_url, card, _, _ = target
+                if profile_url in failed:
+                    return
+                if not scraped:
+                    if card:
+                        store.mark_fetched(profile_url, card)
+                    store.mark_done(run_id, profile_url)
+                    if profile_url in retrying:
+                        store.clear_retry(profile_url)
+                    return
+                judge_id, data_hash, results = scraped
+                try:
+                    with span("write", "judges"):
+                        saved = {breed: store.upsert_judge(judge_id, data_hash, result)
+                                 for breed, result in results.items()}
+                        if card:
+                            last = max((r["last_appointment"] for r in results.values() if r["last_appointment"]),
+                                       key=parse_date, default=None)
+                            store.mark_fetched(profile_url, card, last)
+                        store.mark_done(run_id, profile_url)
+                        if profile_url in retrying:
+                            store.clear_retry(profile_url)
+                    for breed, result in results.items():
+                        if saved[breed]:
+                            changed.append((judge_id, breed))
+                            print(f"[INFO] Scraped {result['total_appointments']} {breed} appointments for {result['judge_name']} (Breed Judge ID: {result['breed_judge_id']}).")
+                        else:
+                            SKIPS.inc(pipeline="judges", reason="no_change")
+                            print(f"[INFO] Skipped updating judge {judge_id} ({breed}) — no changes detected.")
+                except Exception as e:
+                    print(f"[ERROR] Failed to save judge, queued for retry: {profile_url}\nReason: {e}")
+                    failed[profile_url] = f"{type(e).__name__}: {e}"
+
+            async def scrape_all(targets, first_pass=True):
+                """Run `targets` (an async iterable) through fetch -> parse -> save.
+
+                Returns (number of targets, the targets that failed).
+
+                The feeder never waits on the scrape, so discovery keeps walking
+                the listing at its own pace; its targets queue up as a few short
+                strings each. A judge takes a window slot before it is fetched and
+                gives it back once saved, so when parsing or saving falls behind
+                the fetchers stop instead of piling up pages in memory. Slots are
+                taken in target order, so the judge the writer is waiting for
+                always has one. On a run's first pass, targets from `log_targets`
+                (skip, first seq) on are added to the run log and the job's
+                progress total as they arrive, and the log is marked complete
+                once they run out.
+                """
+                incoming = asyncio.Queue()
+                slots = asyncio.Semaphore(window)
+                parse_queue = asyncio.Queue(JUDGE_PARSE_QUEUE)
+                write_queue = asyncio.Queue(JUDGE_PARSE_QUEUE)
+                total = None
+                retry = []
+
+                async def feeder():
+                    nonlocal total
+                    seq = 0
+                    logging = first_pass and log_targets is not None
+                    async for target in targets:
+                        if logging and seq >= log_targets[0]:
+                            logged = log_targets[1] + seq - log_targets[0]
+                            store.add_run_targets(run_id, logged, [target[:3]])
+                            progress(total=logged + 1)
+                        if first_pass:
+                            for breed in target[3]:
+                                listed_breeds[breed] = listed_breeds.get(breed, 0) + 1
+                        incoming.put_nowait((seq, target))
+                        seq += 1
+                    total = seq
+                    if logging:
+                        store.mark_run_planned(run_id)
+                    for _ in range(concurrency):
+                        incoming.put_nowait(None)
+                    # Wake the writer so it sees the total.
+                    await write_queue.put(None)
+
+                async def fetcher():
+                    while True:
+                        await slots.acquire()
+                        item = await incoming.get()
+                        if item is None:
+                            slots.release()
+                            return
+                        seq, target = item
+                        fetched = await fetch(target)
+                        if fetched is None:
+                            await write_queue.put((seq, target, None))
+                        else:
+                            await parse_queue.put((seq, target, fetched))
+                        del item, fetched
+
+                async def parser():
+                    while True:
+                        seq, target, fetched = await parse_queue.get()
+                        scraped = await parse(target, fetched)
+                        del fetched
+                        await write_queue.put((seq, target, scraped))
 
-    with open(PROCESSED_FILE, "w") as f:
-        json.dump(processed_judges, f, indent=2)
-    upload_to_drive(PROCESSED_FILE)
+                async def writer():
+                    ready = {}
+                    seq = 0
+                    while total is None or seq < total:
+                        if seq not in ready:
+                            item = await write_queue.get()
+                            if item is not None:
+                                ready[item[0]] = item[1:]
+                            continue
+                        target, scraped = ready.pop(seq)
+                        save(target, scraped)
+                        if target[0] in failed:
+                            retry.append(target)
+                        if first_pass:
+                            progress(advance=1)
+                        slots.release()
+                        seq += 1
+
+                stages = [asyncio.create_task(feeder()), asyncio.create_task(writer())]
+                stages += [asyncio.create_task(fetcher()) for _ in range(concurrency)]
+                finishing = list(stages)
+                stages += [asyncio.create_task(parser()) for _ in range(parsers)]
+                try:
+                    await asyncio.gather(*finishing)
+                finally:
+                    for task in stages:
+                        task.cancel()
+                    await asyncio.gather(*stages, return_exceptions=True)
+                return total, retry
+
+            judges, retry = await scrape_all(targets)
+            for retry_pass in range(JUDGE_RETRY_PASSES):
+                if not retry:
+                    break
+                print(f"[INFO] Retry pass {retry_pass + 1}: {len(retry)} failed judges in {JUDGE_RETRY_DELAY:.0f}s.")
+                await asyncio.sleep(JUDGE_RETRY_DELAY)
+                for target in retry:
+                    failed.pop(target[0])
+                _, retry = await scrape_all(_each(retry), first_pass=False)
+
+        for url, error in failed.items():
+            store.queue_retry(url, error)
+        if failed:
+            print(f"[WARN] {len(failed)} judges still failing; they will be retried first next run.")
+        store.finish_run(run_id, "finished", {"changed": len(changed), "failed": len(failed)})
+
+        with span("write", "judges"):
+            store.checkpoint()
+            exported = export_json(store, changed, PROCESSED_FILE) if EXPORT_JSON else []
+    finally:
+        store.close()
+    parquet = None
+    if ANALYTICS_EXPORT and (changed or not os.path.exists(os.path.join(EXPORT_DIR, APPOINTMENTS_FILE))):
+        try:
+            with span("export", "judges"):
+                parquet = await asyncio.to_thread(export_appointments, store.path)
+        except Exception as e:
+            print(f"[ERROR] Appointments export failed: {e}")
+    # Critique links point at judges and appointments, so they follow judge changes.
+    if changed and CritiqueLog().segments():
+        try:
+            with span("index", "judges"):
+                await asyncio.to_thread(build_critique_index, judge_db=store.path)
+        except Exception as e:
+            print(f"[ERROR] Critique index build failed: {e}")
+    with span("drive_sync", "judges"):
+        for path in exported:
+            upload_to_drive(path)
+        upload_to_drive(store.path, "application/x-sqlite3")
+        if parquet:
+            upload_to_drive(parquet, PARQUET_MIME)
+        await asyncio.to_thread(drive_sync.finish)
+
+    cache.prune()
+    elapsed = time.perf_counter() - started
+    rate = stats["pages"] / elapsed if elapsed else 0.0
+    print(f"[INFO] Judge scrape finished: {judges} judges, {stats['pages']} pages in {elapsed:.1f}s ({rate:.1f} pages/sec, concurrency {concurrency}).")
+    print(f"[INFO] HTTP cache: {cache.summary()}.")
+    return {
+        "run_id": run_id,
+        "resumed": bool(resume),
+        "judges": judges,
+        "listed": planned.get("listed", 0),
+        "refresh": refresh,
+        "pages": stats["pages"],
+        "elapsed_s": round(elapsed, 2),
+        "pages_per_sec": round(rate, 2),
+        "changed": len(changed),
+        "breeds": {
+            breed: {
+                "judges": listed_breeds.get(breed, 0),
+                "changed": sum(1 for _, b in changed if b == breed),
+            }
+            for breed in JUDGE_BREEDS
+        },
+        "failed": len(failed),
+        "http_cache": dict(cache.stats),
+    }
 
 # API endpoints
 @app.get("/")
 def root():
     return {"message": "Welcome to the Standfast Revival API"}
 
+def job_response(job, started, message):
+    return {
+        "message": message if started else f"{job.name} already running",
+        "job_id": job.id,
+        "status": job.status,
+        "coalesced": not started,
+    }
+
+async def wait_for_job(job, message, result_field=None):
+    """Wait for `job` to end. Returns its response, with the job's result under `result_field`
+    if given; raises a 500 carrying the job's error if it failed."""
+    await asyncio.shield(job.task)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=500, detail={
+            "message": f"{job.name} {job.status}", "job_id": job.id, "status": job.status, "error": job.error})
+    response = {"message": message, "job_id": job.id, "status": job.status}
+    if result_field:
+        response[result_field] = job.result
+    return response
+
 @app.get("/run/judges")
-async def run_judges():
-    await fetch_golden_judges()
-    return {"message": "Judges scrape complete"}
+async def run_judges(concurrency: int = JUDGE_CONCURRENCY, discovery: str = JUDGE_DISCOVERY,
+                     refresh: str = JUDGE_REFRESH, resume: Optional[str] = None, wait: bool = False):
+    """Start a judges scrape. resume=<run_id> (or "latest") finishes an interrupted run instead."""
+    if refresh not in ("incremental", "full"):
+        raise HTTPException(status_code=400, detail="refresh must be 'incremental' or 'full'")
+    if discovery not in DISCOVERY_MODES:
+        raise HTTPException(status_code=400, detail="discovery must be 'http', 'browser' or 'auto'")
+    if resume and not runner.is_running("judges"):
+        run = await asyncio.to_thread(read_judge_runs, lambda store: store.get_run(resume))
+        if run is None:
+            raise HTTPException(status_code=404, detail=f"No judge run {resume}")
+        if run["status"] != "running":
+            raise HTTPException(status_code=409, detail=f"Judge run {run['run_id']} is {run['status']}, nothing to resume")
+        resume = run["run_id"]
+    job, started = runner.start("judges", fetch_golden_judges, concurrency=concurrency, discovery=discovery,
+                                refresh=refresh, resume=resume, lock="judges-state")
+    if wait:
+        return await wait_for_job(job, "Judges scrape complete", result_field="stats")
+    return job_response(job, started, "Judges scrape started")
+
+def read_judge_runs(read):
+    store = JudgeStore()
+    try:
+        return read(store)
+    finally:
+        store.close()
+
+@app.get("/runs/judges")
+def list_judge_runs(limit: int = 20):
+    """Recent judge runs from the run log. A "running" run that no job is executing was interrupted."""
+    return {"runs": read_judge_runs(lambda store: store.list_runs(limit))}
+
+@app.get("/runs/judges/{run_id}")
+def get_judge_run(run_id: str):
+    run = read_judge_runs(lambda store: store.get_run(run_id))
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"No judge run {run_id}")
+    return run
 
 @app.get("/run/critiques")
-async def run_critiques():
-    await scrape_brazenbeacon_critiques()
-    return {"message": "Critiques scrape complete"}
+async def run_critiques(full: bool = False, wait: bool = False):
+    job, started = runner.start("critiques", scrape_brazenbeacon_critiques, full=full, lock="critiques-state")
+    if wait:
+        return await wait_for_job(job, "Critiques scrape complete")
+    return job_response(job, started, "Critiques scrape started")
+
+def query_result(query, **params):
+    try:
+        return query(**params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/judges")
+def list_judges(breed: Optional[str] = None, golden_only: Optional[bool] = None, breed_only: Optional[bool] = None,
+                name: Optional[str] = None, min_appointments: Optional[int] = None,
+                max_appointments: Optional[int] = None, club: Optional[str] = None, year: Optional[int] = None,
+                sex_judged: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                sort: str = "judge_name", offset: int = 0, limit: Optional[int] = None):
+    """Judges from the in-memory index, one row per judge and breed. club/year/sex_judged/since/until
+    (ISO dates) select judges with at least one appointment for that breed matching all of them."""
+    return query_result(judge_index.snapshot.judges_query, breed=breed, golden_only=golden_only,
+                        breed_only=breed_only, name=name,
+                        min_appointments=min_appointments, max_appointments=max_appointments,
+                        club=club, year=year, sex_judged=sex_judged, since=since, until=until,
+                        sort=sort, offset=offset, limit=limit)
+
+@app.get("/judges/{judge_id}")
+def get_judge(judge_id: str, breed: Optional[str] = None):
+    """A judge's result for `breed`, by default the first configured breed the judge has."""
+    result = judge_index.snapshot.judge(judge_id, breed, preferred=JUDGE_BREEDS)
+    if result is None:
+        detail = f"No judge {judge_id}" + (f" for {breed}" if breed else "")
+        raise HTTPException(status_code=404, detail=detail)
+    return result
+
+@app.get("/appointments")
+def list_appointments(judge_id: Optional[str] = None, breed: Optional[str] = None, club: Optional[str] = None,
+                      year: Optional[int] = None, sex_judged: Optional[str] = None,
+                      golden_only: Optional[bool] = None, breed_only: Optional[bool] = None,
+                      since: Optional[str] = None, until: Optional[str] = None,
+                      sort: str = "-date", offset: int = 0, limit: Optional[int] = None):
+    return query_result(judge_index.snapshot.appointments_query, judge_id=judge_id, breed=breed, club=club,
+                        year=year, sex_judged=sex_judged, golden_only=golden_only, breed_only=breed_only,
+                        since=since, until=until,
+                        sort=sort, offset=offset, limit=limit)
+
+@app.get("/critiques/search")
+def critiques_search(q: Optional[str] = None, judge: Optional[str] = None, judge_id: Optional[str] = None,
+                     breed: Optional[str] = None, club: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None, linked: Optional[bool] = None,
+                     offset: int = 0, limit: Optional[int] = None):
+    """Full-text search over critiques (q is an FTS5 query), filtered by judge name or ID,
+    breed, the linked appointment's club, and show date (ISO since/until)."""
+    return query_result(search_critiques, q=q, judge=judge, judge_id=judge_id, breed=breed, club=club,
+                        since=since, until=until, linked=linked, offset=offset, limit=limit)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of the scrape counters and histograms."""
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/health")
+async def health():
+    return {
+        "browser": await browser_pool.check(),
+        "judge_index": judge_index.stats(),
+        "critique_index": critique_index_stats(),
+    }
+
+@app.get("/jobs")
+def list_jobs():
+    return {
+        "jobs": [job.to_dict() for job in runner.list()],
+        "last_error": runner.last_error,
+    }
+
+@app.get("/schedule")
+def get_schedule():
+    """Scheduled jobs with their interval, next due time and last run."""
+    return {"jobs": scheduler.to_dict()}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job {job_id}")
+    return job.to_dict()
 
 if __name__ == "__main__":
     import uvicorn
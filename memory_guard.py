@@ -0,0 +1,156 @@
+import os
+import threading
+from contextlib import asynccontextmanager
+
+from metrics import RUN_PEAK_RSS
+
+# Memory ceiling for a scrape run. While a run is going, a MemoryGuard samples
+# the resident memory of this process plus its children (parser processes, the
+# Playwright driver and Chromium) every MEMORY_SAMPLE_INTERVAL seconds and keeps
+# the peak. Work throttled through it halves its concurrency limit while the
+# total is above the ceiling and grows it back, one success at a time, once the
+# total is below MEMORY_RESUME_FRACTION of it. 0 disables the ceiling; the
+# peak is still measured.
+MEMORY_SAMPLE_INTERVAL = float(os.environ.get("MEMORY_SAMPLE_INTERVAL", "0.2"))
+MEMORY_RESUME_FRACTION = float(os.environ.get("MEMORY_RESUME_FRACTION", "0.85"))
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024) if hasattr(os, "sysconf") else 0
+
+
+def process_rss_mb():
+    """Resident memory of this process in MB; None where /proc is not available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _processes():
+    """{pid: (parent pid, resident pages)} for every process in /proc, or None where there is no /proc."""
+    if not os.path.isdir("/proc"):
+        return None
+    table = {}
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            table[int(pid)] = (int(fields[1]), int(fields[21]))
+        except (OSError, IndexError, ValueError):
+            continue
+    return table
+
+
+def _tree_rss_mb(table, roots):
+    """Resident memory of `roots` and all their descendants, in MB."""
+    tree = set(roots)
+    frontier = set(roots)
+    while frontier:
+        frontier = {pid for pid, (ppid, _) in table.items() if ppid in frontier and pid not in tree}
+        tree |= frontier
+    return sum(table[pid][1] for pid in tree if pid in table) * _PAGE_MB
+
+
+def _cmdline(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().split(b"\0")
+    except OSError:
+        return []
+
+
+def child_rss_mb():
+    """Resident memory of all descendant processes (parser processes, the Playwright driver and
+    Chromium), in MB.
+
+    Linux only; returns None where /proc is not available.
+    """
+    table = _processes()
+    if table is None:
+        return None
+    return _tree_rss_mb(table, {pid for pid, (ppid, _) in table.items() if ppid == os.getpid()})
+
+
+def browser_rss_mb():
+    """Resident memory of the Playwright driver (a `run-driver` child) and the browsers under it, in MB.
+
+    Linux only; returns None where /proc is not available.
+    """
+    table = _processes()
+    if table is None:
+        return None
+    drivers = {pid for pid, (ppid, _) in table.items() if ppid == os.getpid() and b"run-driver" in _cmdline(pid)}
+    return _tree_rss_mb(table, drivers)
+
+
+class MemoryGuard:
+    def __init__(self, pipeline, max_mb, interval=MEMORY_SAMPLE_INTERVAL):
+        self.pipeline = pipeline
+        self.max_mb = max_mb
+        self.interval = interval
+        self.current_mb = 0.0
+        self.peak_mb = 0.0
+        self.peak_process_mb = 0.0
+        self.throttled = 0
+        self.min_limit = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        own = process_rss_mb()
+        if own is None:
+            return None
+        total = own + (child_rss_mb() or 0.0)
+        self.current_mb = total
+        self.peak_mb = max(self.peak_mb, total)
+        self.peak_process_mb = max(self.peak_process_mb, own)
+        return total
+
+    def _run(self):
+        # A thread rather than a task, so blocking stages (SQLite writes, the
+        # Parquet export, Drive uploads) are sampled too.
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name=f"memory-guard-{self.pipeline}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        RUN_PEAK_RSS.set(round(self.peak_mb * 1024 * 1024), pipeline=self.pipeline)
+
+    def over(self):
+        return bool(self.max_mb) and self.current_mb > self.max_mb
+
+    @asynccontextmanager
+    async def throttle(self, limiter):
+        """Hold a slot of `limiter` (a request_policy.AimdLimiter), adjusting its limit to memory use."""
+        if self.over() and limiter.decrease():
+            self.throttled += 1
+            print(f"[WARN] {self.pipeline}: {self.current_mb:.0f} MB resident, over the {self.max_mb:.0f} MB "
+                  f"ceiling; concurrency cut to {int(limiter.limit)}.")
+        self.min_limit = int(limiter.limit) if self.min_limit is None else min(self.min_limit, int(limiter.limit))
+        await limiter.acquire()
+        try:
+            yield
+        finally:
+            await limiter.release()
+            if not self.max_mb or self.current_mb < self.max_mb * MEMORY_RESUME_FRACTION:
+                limiter.increase()
+
+    def stats(self):
+        return {
+            "peak_rss_mb": round(self.peak_mb, 1),
+            "peak_process_rss_mb": round(self.peak_process_mb, 1),
+            "max_rss_mb": self.max_mb or None,
+            "throttled": self.throttled,
+            "min_concurrency": self.min_limit,
+        }
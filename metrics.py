@@ -0,0 +1,218 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process counters, gauges and histograms for scrape runs, served in the
+# Prometheus text format at /metrics. Recording is a lock, a dict update and
+# (for histograms) a bisect, so instrumentation stays on in production.
+#
+# METRICS_JSON_LOG additionally writes every span and run event as one JSON
+# line: "-" for stdout, otherwise a file path to append to.
+METRICS_JSON_LOG = os.environ.get("METRICS_JSON_LOG", "")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_labels(self.labels, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = 'le="%s"' % _number(bound)
+            lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def expose(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+PAGES_FETCHED = registry.counter(
+    "scrape_pages_fetched_total", "HTTP responses received, by page kind and status.", ("pipeline", "kind", "status"))
+BYTES_FETCHED = registry.counter(
+    "scrape_bytes_fetched_total", "Response body bytes received.", ("pipeline",))
+SKIPS = registry.counter(
+    "scrape_skips_total", "Items skipped because they were unchanged or already seen.", ("pipeline", "reason"))
+RETRIES = registry.counter(
+    "scrape_retries_total", "Retried fetches.", ("pipeline",))
+BROWSER_FALLBACKS = registry.counter(
+    "scrape_browser_fallbacks_total", "Pages that needed Playwright after the HTTP path failed.", ("pipeline", "kind"))
+THROTTLED = registry.counter(
+    "scrape_throttled_total", "429/503 responses that cut a host's concurrency limit.", ("pipeline", "host"))
+CIRCUIT_OPENS = registry.counter(
+    "scrape_circuit_opens_total", "Times a host was paused after sustained failures.", ("pipeline", "host"))
+CONCURRENCY_LIMIT = registry.gauge(
+    "scrape_concurrency_limit", "Current adaptive (AIMD) concurrency limit per host.", ("pipeline", "host"))
+ERRORS = registry.counter(
+    "scrape_errors_total", "Failures, by the stage they happened in.", ("pipeline", "stage"))
+STAGE_SECONDS = registry.histogram(
+    "scrape_stage_seconds", "Time spent per stage call (fetch, parse, diff, write, drive_sync, ...).",
+    ("pipeline", "stage", "kind"))
+DRIVE_CALLS = registry.counter(
+    "drive_api_calls_total", "Google Drive API requests.", ("method",))
+RUN_PEAK_RSS = registry.gauge(
+    "scrape_run_peak_rss_bytes", "Peak resident memory of the app and its child processes during the last run.",
+    ("pipeline",))
+JOB_RUNS = registry.counter(
+    "scrape_job_runs_total", "Finished background jobs, by outcome.", ("job", "status"))
+JOB_SECONDS = registry.histogram(
+    "scrape_job_seconds", "Background job duration.", ("job",))
+JOB_LAST_FINISHED = registry.gauge(
+    "scrape_job_last_finished_timestamp_seconds", "When each job last finished.", ("job", "status"))
+SCHEDULED_RUNS = registry.counter(
+    "scrape_scheduled_runs_total", "Scheduler ticks, by what happened (started, skipped, covered).", ("job", "outcome"))
+
+
+def count_page(pipeline, kind, status, size):
+    PAGES_FETCHED.inc(pipeline=pipeline, kind=kind, status=status)
+    if size:
+        BYTES_FETCHED.inc(size, pipeline=pipeline)
+
+
+_log_file = None
+_log_lock = threading.Lock()
+
+
+def log_event(event, **fields):
+    """Write one structured log line if METRICS_JSON_LOG is set."""
+    global _log_file
+    if not METRICS_JSON_LOG:
+        return
+    record = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str)
+    with _log_lock:
+        if _log_file is None:
+            _log_file = sys.stdout if METRICS_JSON_LOG == "-" else open(METRICS_JSON_LOG, "a", buffering=1)
+        _log_file.write(record + "\n")
+
+
+@contextmanager
+def span(stage, pipeline, kind="", **fields):
+    """Time a stage into scrape_stage_seconds, counting an error if it raises.
+
+    `kind` (the page type, for fetch/parse) is a metric label; other keyword
+    fields only go to the JSON log.
+    """
+    started = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except Exception:
+        ok = False
+        ERRORS.inc(pipeline=pipeline, stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, pipeline=pipeline, stage=stage, kind=kind)
+        if METRICS_JSON_LOG:
+            log_event("span", pipeline=pipeline, stage=stage, kind=kind, duration_ms=round(elapsed * 1000, 3),
+                      ok=ok, **fields)
@@ -0,0 +1,74 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# CPU-bound HTML parsing off the event loop. One pool of parser processes is
+# started on first use and shared by every run, so parse throughput scales
+# with cores and the API keeps answering while a scrape is parsing.
+# PARSE_WORKERS=0 parses inline on the event loop instead.
+#
+# By default one worker per CPU this process may run on, at most
+# PARSE_MAX_DEFAULT_WORKERS: each worker is a full interpreter, the pool does
+# not shrink under memory pressure, and in a container os.cpu_count() is the
+# host's core count. Set PARSE_WORKERS to go past it.
+PARSE_MAX_DEFAULT_WORKERS = 2
+
+
+def _usable_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", str(min(_usable_cpus(), PARSE_MAX_DEFAULT_WORKERS))))
+
+
+def _exit_with_parent(parent_pid):
+    """Parser process initializer: exit once the parent is gone, even if it was SIGKILLed."""
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+class ParsePool:
+    def __init__(self, workers=PARSE_WORKERS):
+        self.workers = max(0, workers)
+        self._executor = None
+
+    def _ensure(self):
+        if self._executor is None:
+            # spawn, not fork: the parent has event loop and HTTP client threads
+            # that a forked child would inherit in an undefined state.
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_exit_with_parent, initargs=(os.getpid(),))
+        return self._executor
+
+    async def run(self, fn, *args):
+        """fn(*args) in a parser process. fn and its arguments must be picklable."""
+        if not self.workers:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._ensure(), fn, *args)
+        except BrokenProcessPool:
+            # A parser process died (OOM kill, crash): start a fresh pool and try once more.
+            print("[WARN] Parser pool broke, restarting it.")
+            self.shutdown(wait=False)
+            return await loop.run_in_executor(self._ensure(), fn, *args)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+pool = ParsePool()
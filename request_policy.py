@@ -0,0 +1,270 @@
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from metrics import CIRCUIT_OPENS, CONCURRENCY_LIMIT, RETRIES, THROTTLED
+
+# Shared policy for every scraper HTTP request, applied per host by an httpx
+# transport so callers just use client.get():
+#   - token bucket rate limit (the pipeline's rate per second, REQUEST_BURST deep; 0 = unlimited)
+#   - AIMD concurrency: starts at the caller's concurrency, halves on 429/503,
+#     creeps back up by one slot per window of successes
+#   - Retry-After on 429/503 pauses the whole host
+#   - jittered exponential retries on timeouts, connection errors, 429 and 5xx
+#   - circuit breaker: after REQUEST_BREAKER_FAILURES consecutive failures
+#     (timeouts, connection errors, 5xx other than 503) the host is paused for
+#     REQUEST_BREAKER_COOLDOWN seconds, then probed with one request
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "15"))
+REQUEST_MAX_RETRIES = int(os.environ.get("REQUEST_MAX_RETRIES", "3"))
+REQUEST_BACKOFF_BASE = float(os.environ.get("REQUEST_BACKOFF_BASE", "0.5"))
+REQUEST_BACKOFF_MAX = float(os.environ.get("REQUEST_BACKOFF_MAX", "30"))
+REQUEST_BURST = float(os.environ.get("REQUEST_BURST", "1"))
+REQUEST_BREAKER_FAILURES = int(os.environ.get("REQUEST_BREAKER_FAILURES", "8"))
+REQUEST_BREAKER_COOLDOWN = float(os.environ.get("REQUEST_BREAKER_COOLDOWN", "30"))
+# Longest Retry-After we are willing to honour; longer values are clamped.
+RETRY_AFTER_MAX = float(os.environ.get("RETRY_AFTER_MAX", "300"))
+
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt, base=REQUEST_BACKOFF_BASE, cap=REQUEST_BACKOFF_MAX):
+    """Exponential backoff with full jitter for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date); None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), RETRY_AFTER_MAX)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=REQUEST_BURST):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    async def take(self):
+        if not self.rate or self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Reserve the token now (possibly going negative) so concurrent callers queue up in order.
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class AimdLimiter:
+    """Concurrency limit that halves on throttling and grows additively on success."""
+
+    # Throttle responses within this many seconds of a decrease count as the same event.
+    DECREASE_INTERVAL = 1.0
+
+    def __init__(self, max_limit, min_limit=1):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.limit = float(self.max_limit)
+        self.active = 0
+        self._cond = asyncio.Condition()
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    async def release(self):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def increase(self):
+        if self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.DECREASE_INTERVAL:
+            return False
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        return True
+
+
+class HostState:
+    def __init__(self, host, rate, max_concurrency, pipeline,
+                 breaker_failures=REQUEST_BREAKER_FAILURES, breaker_cooldown=REQUEST_BREAKER_COOLDOWN):
+        self.host = host
+        self.pipeline = pipeline
+        self.bucket = TokenBucket(rate)
+        self.aimd = AimdLimiter(max_concurrency)
+        self.breaker_failures = breaker_failures
+        self.base_cooldown = breaker_cooldown
+        self.cooldown = breaker_cooldown
+        self.failures = 0
+        self.paused_until = 0.0
+        self.open_until = 0.0
+        self.probing = False
+
+    async def ready(self):
+        """Wait out any Retry-After pause or open circuit. With the circuit half-open, one probe goes first.
+
+        Returns True if the caller is that probe; it must then record an outcome or call abandon_probe().
+        """
+        while True:
+            now = time.monotonic()
+            until = max(self.paused_until, self.open_until)
+            if until > now:
+                await asyncio.sleep(until - now)
+                continue
+            if self.open_until:
+                if self.probing:
+                    await asyncio.sleep(min(1.0, self.cooldown))
+                    continue
+                self.probing = True
+                return True
+            return False
+
+    def abandon_probe(self):
+        """The probe ended without an outcome (cancelled, or an unexpected error): let another request probe."""
+        self.probing = False
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def success(self):
+        self.aimd.increase()
+        self.failures = 0
+        if self.open_until:
+            print(f"[INFO] {self.host}: circuit closed.")
+        self.open_until = 0.0
+        self.probing = False
+        self.cooldown = self.base_cooldown
+        self._report()
+
+    def throttled(self):
+        """429/503: halve concurrency. Not a breaker failure; the site is up, just asking us to slow down."""
+        if self.aimd.decrease():
+            THROTTLED.inc(pipeline=self.pipeline, host=self.host)
+            print(f"[WARN] {self.host}: throttled, concurrency limit now {int(self.aimd.limit)}.")
+        if self.probing:
+            self.probing = False
+            self.open_until = time.monotonic()
+        self._report()
+
+    def failure(self):
+        self.failures += 1
+        if self.probing or (not self.open_until and self.breaker_failures and self.failures >= self.breaker_failures):
+            if self.probing:
+                self.cooldown = min(self.cooldown * 2, RETRY_AFTER_MAX)
+            self.open_until = time.monotonic() + self.cooldown
+            self.probing = False
+            CIRCUIT_OPENS.inc(pipeline=self.pipeline, host=self.host)
+            print(f"[WARN] {self.host}: {self.failures} consecutive failures, pausing for {self.cooldown:.1f}s.")
+        self._report()
+
+    def _report(self):
+        CONCURRENCY_LIMIT.set(int(self.aimd.limit), pipeline=self.pipeline, host=self.host)
+
+
+class RequestPolicy:
+    """Per-host rate, concurrency, retry and circuit-breaker state for one scrape run."""
+
+    def __init__(self, pipeline, rate=0, max_concurrency=8, max_retries=REQUEST_MAX_RETRIES):
+        self.pipeline = pipeline
+        self.rate = rate
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.hosts = {}
+
+    def host(self, name):
+        if name not in self.hosts:
+            self.hosts[name] = HostState(name, self.rate, self.max_concurrency, self.pipeline)
+        return self.hosts[name]
+
+    async def send(self, request, send):
+        host = self.host(request.url.host)
+        for attempt in range(self.max_retries + 1):
+            probe = await host.ready()
+            recorded = False
+            try:
+                resp = error = None
+                await host.aimd.acquire()
+                try:
+                    await host.bucket.take()
+                    resp = await send(request)
+                except httpx.TransportError as e:
+                    error = e
+                finally:
+                    await host.aimd.release()
+
+                if resp is not None and resp.status_code not in RETRY_STATUSES:
+                    host.success()
+                    recorded = True
+                    return resp
+
+                throttled = resp is not None and resp.status_code in THROTTLE_STATUSES
+                retry_after = parse_retry_after(resp.headers.get("Retry-After")) if resp is not None else None
+                if retry_after:
+                    host.pause(retry_after)
+                if throttled:
+                    host.throttled()
+                else:
+                    host.failure()
+                recorded = True
+            finally:
+                if probe and not recorded:
+                    host.abandon_probe()
+
+            if attempt == self.max_retries:
+                if resp is not None:
+                    return resp
+                raise error
+            if resp is not None:
+                await resp.aread()
+                await resp.aclose()
+            reason = f"HTTP {resp.status_code}" if resp is not None else type(error).__name__
+            delay = max(backoff_delay(attempt), retry_after or 0)
+            print(f"[RETRY] {request.url} ({reason}), attempt {attempt + 2} in {delay:.1f}s.")
+            RETRIES.inc(pipeline=self.pipeline)
+            await asyncio.sleep(delay)
+
+    def client(self, limits=None, **kwargs):
+        """An httpx.AsyncClient whose requests all go through this policy."""
+        transport = PolicyTransport(self, httpx.AsyncHTTPTransport(limits=limits or httpx.Limits()))
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        kwargs.setdefault("headers", HTTP_HEADERS)
+        return httpx.AsyncClient(transport=transport, **kwargs)
+
+
+class PolicyTransport(httpx.AsyncBaseTransport):
+    def __init__(self, policy, transport):
+        self.policy = policy
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        return await self.policy.send(request, self.transport.handle_async_request)
+
+    async def aclose(self):
+        await self.transport.aclose()
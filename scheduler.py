@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from atomic_io import write_json
+from jobs import runner
+from metrics import SCHEDULED_RUNS, log_event
+
+# Built-in periodic runs for the background jobs. Each scheduled job has an
+# interval and an offset: it is due at every multiple of the interval since
+# the Unix epoch, shifted by the offset (so "1d" with offset "3h" is 03:00 UTC
+# daily), plus a random jitter of up to SCHEDULE_JITTER. Different offsets
+# stagger the jobs; on top of that, a scheduled job waits for any other
+# scheduled job that is still running, so they never overlap.
+#
+# A tick is skipped if the job is still running from before, or if it already
+# ran (scheduled or not) since the tick was due. The last start and finish of
+# each job are kept in SCHEDULE_STATE_FILE, so a restart neither repeats a run
+# that just happened nor forgets one that was missed while the app was down;
+# a missed run is made up once, not once per missed tick.
+SCHEDULE_JITTER = os.environ.get("SCHEDULE_JITTER", "5m")
+SCHEDULE_STATE_FILE = os.environ.get("SCHEDULE_STATE_FILE", "schedule_state.json")
+
+_ALIASES = {"@hourly": "1h", "@daily": "1d", "@weekly": "7d"}
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)([smhd])")
+
+
+def parse_duration(text):
+    """Seconds in a duration like "90s", "30m", "1h30m", "1d" or "@daily"; a bare number is seconds."""
+    text = _ALIASES.get(str(text).strip().lower(), str(text).strip().lower())
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        raise ValueError(f"Bad duration {text!r}; expected e.g. 30m, 6h, 1d or @daily")
+    return sum(float(n) * _UNITS[u] for n, u in parts)
+
+
+def _when(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(ts)) if ts else None
+
+
+class ScheduledJob:
+    def __init__(self, name, func, every, offset=0, jitter=SCHEDULE_JITTER, lock=None, kwargs=None):
+        self.name = name
+        self.func = func
+        self.every = parse_duration(every)
+        if self.every <= 0:
+            raise ValueError(f"Schedule interval for {name} must be positive")
+        self.offset = parse_duration(offset) % self.every
+        # Jitter beyond half the interval would let consecutive runs bunch up.
+        self.jitter = min(parse_duration(jitter), self.every / 2)
+        self.lock = lock
+        self.kwargs = kwargs or {}
+        self.next_due = None
+
+    def next_tick(self, after):
+        """The first tick strictly after `after`."""
+        return ((after - self.offset) // self.every + 1) * self.every + self.offset
+
+    def to_dict(self):
+        return {
+            "every_s": self.every,
+            "offset_s": self.offset,
+            "jitter_s": self.jitter,
+            "next_due": self.next_due,
+            "next_due_at": _when(self.next_due),
+            "running": runner.is_running(self.name),
+        }
+
+
+class Scheduler:
+    def __init__(self, state_file=SCHEDULE_STATE_FILE):
+        self.state_file = state_file
+        self.jobs = {}
+        self.state = self._load()
+        # Held from the moment a tick decides to run until its job has started,
+        # so two ticks waiting on the same running job cannot both start.
+        self._gate = asyncio.Lock()
+        runner.listeners.append(self._record)
+
+    def _load(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not read {self.state_file} ({e}); schedule starts afresh.")
+            return {}
+
+    def _record(self, job):
+        # Runs triggered through the API count too: a manual run covers the next tick.
+        if job.name not in self.jobs:
+            return
+        entry = self.state.setdefault(job.name, {})
+        if job.finished_at:
+            entry.update(last_finished=job.finished_at, last_status=job.status, last_job_id=job.id)
+        else:
+            entry.update(last_started=job.started_at, last_job_id=job.id)
+        write_json(self.state_file, self.state, indent=2)
+
+    def add(self, name, func, every, offset=0, jitter=SCHEDULE_JITTER, lock=None, **kwargs):
+        """Run job `name` (`func(**kwargs)` through jobs.runner, with `lock`) every `every`."""
+        self.jobs[name] = ScheduledJob(name, func, every, offset, jitter, lock, kwargs)
+        return self.jobs[name]
+
+    def last_started(self, name):
+        return self.state.get(name, {}).get("last_started")
+
+    def first_tick(self, job, now=None):
+        """The first tick to act on: the next one after the last run, or after now if there was none.
+
+        A tick already in the past (missed while the app was down) is returned as is and run promptly.
+        """
+        now = now if now is not None else time.time()
+        last = self.last_started(job.name)
+        return job.next_tick(last if last is not None else now)
+
+    async def run(self):
+        if not self.jobs:
+            return
+        for job in self.jobs.values():
+            print(f"[INFO] Scheduled {job.name} every {job.every:.0f}s (offset {job.offset:.0f}s, "
+                  f"jitter up to {job.jitter:.0f}s); last run {_when(self.last_started(job.name)) or 'never'}.")
+        await asyncio.gather(*(self._loop(job) for job in self.jobs.values()))
+
+    async def _loop(self, job):
+        tick = self.first_tick(job)
+        while True:
+            job.next_due = max(tick, time.time()) + random.uniform(0, job.jitter)
+            await asyncio.sleep(max(0.0, job.next_due - time.time()))
+            try:
+                await self._fire(job, tick)
+            except Exception as e:
+                print(f"[ERROR] Scheduled {job.name} run failed to start: {e}")
+            tick = job.next_tick(max(tick, time.time()))
+
+    async def _fire(self, job, tick):
+        last = self.last_started(job.name)
+        if last is not None and last >= tick:
+            return self._outcome(job, tick, "covered", f"already ran at {_when(last)}")
+        if runner.is_running(job.name):
+            return self._outcome(job, tick, "skipped", "previous run still going")
+        async with self._gate:
+            while True:
+                others = [runner.running(name) for name in self.jobs if name != job.name]
+                others = [other for other in others if other is not None]
+                if not others:
+                    break
+                print(f"[INFO] Scheduled {job.name} run waiting for "
+                      f"{', '.join(other.name for other in others)} to finish.")
+                await asyncio.wait([other.task for other in others])
+            if runner.is_running(job.name):
+                return self._outcome(job, tick, "skipped", "previous run still going")
+            started = runner.start(job.name, job.func, lock=job.lock, **job.kwargs)[1]
+        self._outcome(job, tick, "started" if started else "skipped", "")
+
+    def _outcome(self, job, tick, outcome, reason):
+        SCHEDULED_RUNS.inc(job=job.name, outcome=outcome)
+        log_event("schedule", job=job.name, tick=tick, outcome=outcome, reason=reason or None)
+        if outcome == "started":
+            print(f"[INFO] Scheduled {job.name} run for {_when(tick)} started.")
+        else:
+            print(f"[INFO] Scheduled {job.name} run for {_when(tick)} {outcome}: {reason}.")
+
+    def to_dict(self):
+        return {name: {**job.to_dict(), **self.state.get(name, {})} for name, job in self.jobs.items()}
+
+
+scheduler = Scheduler()
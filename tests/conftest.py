@@ -0,0 +1,90 @@
+"""Shared test setup: every test runs offline, in its own working directory.
+
+The app's modules read their settings from the environment at import time,
+so the fake Drive is started and the environment set before any of them is
+imported. The Kennel Club and critique sites are the benchmark fixture site
+(benchmarks/fixture_server.py); a corpus of N judges is served under /kc/<N>.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from fixture_server import serve_drive, serve_site  # noqa: E402
+
+_drive = serve_drive()
+os.environ.update(
+    DRIVE_API_ENDPOINT=_drive.url,
+    GDRIVE_FOLDER_ID="tests",
+    JUDGE_RATE_PER_HOST="0",
+    JUDGE_RETRY_DELAY="0",
+    JUDGE_MAX_RSS_MB="0",
+    PARSE_WORKERS="0",
+    REQUEST_BACKOFF_BASE="0.01",
+    SCHEDULE_JITTER="0",
+)
+
+import pytest  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+KC_ORIGIN = "https://www.thekennelclub.org.uk"
+# The judge in the recorded pages.
+JUDGE_ID = "3f2a9c1e-0b7d-e811-a8a3-002248005d25"
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run each test in an empty directory: the stores and exports use relative paths."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def site():
+    server = serve_site()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def drive():
+    _drive.reset()
+    return _drive
+
+
+@pytest.fixture
+def kc(site, drive, monkeypatch):
+    """Point the judge scraper at the fixture site; call with the number of judges to list."""
+    import main
+
+    judge_url = main.JUDGE_URL
+
+    def point(judges):
+        base = f"{site.url}/kc/{judges}"
+        monkeypatch.setattr(main, "BASE_URL", base)
+        monkeypatch.setattr(main, "JUDGE_URL", judge_url.replace(KC_ORIGIN, base))
+        return base
+
+    site.reset()
+    return point
+
+
+@pytest.fixture(scope="session")
+def judge_pages():
+    """The recorded judge profile and appointments pages, as (profile HTML, appointments HTML)."""
+    return read_fixture("judge_profile.html"), read_fixture("judge_appointments.html")
+
+
+@pytest.fixture
+def judge_result(judge_pages):
+    """The recorded judge parsed for the default breed; each test gets its own copy."""
+    from judge_parser import DEFAULT_BREED, parse_judge
+
+    profile, appointments = judge_pages
+    return parse_judge(JUDGE_ID, profile, {DEFAULT_BREED: appointments})[DEFAULT_BREED]
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import browser_pool
+import main
+from browser_pool import BrowserPool
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.listeners = []
+
+    def on(self, event, callback):
+        self.listeners.append(callback)
+
+    async def add_init_script(self, script):
+        pass
+
+    async def new_page(self):
+        for callback in self.listeners:
+            callback(object())
+
+    async def close(self):
+        self.browser.contexts -= 1
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        self.contexts += 1
+        return FakeContext(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    """Stands in for async_playwright(); records every browser it launches."""
+
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+
+    def __call__(self):
+        return self
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+    async def launch(self, headless=True):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+    monkeypatch.setattr("playwright.async_api.async_playwright", fake)
+    monkeypatch.setattr(browser_pool, "ensure_chromium", lambda: None)
+    return fake
+
+
+def test_app_startup_does_not_launch_the_browser(playwright):
+    with TestClient(main.app) as client:
+        health = client.get("/health").json()["browser"]
+    assert not playwright.browsers
+    assert health["running"] is False and health["launches"] == 0
+
+
+def test_the_first_lease_launches_one_shared_browser(playwright):
+    pool = BrowserPool(max_contexts=2, max_rss_mb=0)
+
+    async def run():
+        assert (await pool.check())["running"] is False
+        async with pool.lease() as first, pool.lease() as second:
+            assert first.browser is second.browser
+            assert pool.health()["active_contexts"] == 2
+        await pool.stop()
+
+    asyncio.run(run())
+    assert len(playwright.browsers) == 1 and pool.launches == 1
+
+
+def test_leases_beyond_max_contexts_wait_for_a_release(playwright):
+    pool = BrowserPool(max_contexts=2, max_rss_mb=0)
+    peak = 0
+
+    async def use():
+        nonlocal peak
+        async with pool.lease():
+            peak = max(peak, pool.health()["active_contexts"])
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(use() for _ in range(5)))
+        await pool.stop()
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_browser_is_recycled_after_its_page_budget(playwright):
+    pool = BrowserPool(recycle_after_pages=3, max_rss_mb=0)
+
+    async def run():
+        for _ in range(2):
+            async with pool.lease() as context:
+                for _ in range(3):
+                    await context.new_page()
+        await pool.stop()
+
+    asyncio.run(run())
+    assert pool.launches == 2
+    assert not playwright.browsers[0].connected
+
+
+def test_health_check_relaunches_a_crashed_browser(playwright):
+    pool = BrowserPool(max_rss_mb=0)
+
+    async def run():
+        async with pool.lease():
+            pass
+        playwright.browsers[0].connected = False
+        health = await pool.check()
+        await pool.stop()
+        return health
+
+    assert asyncio.run(run())["running"] is True
+    assert pool.launches == 2
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pyarrow.parquet as pq
+import pytest
+
+import columnar_export
+from critique_log import CritiqueLog
+from judge_parser import normalize_date, parse_date
+from judge_store import JudgeStore
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("05/03/2019", date(2019, 3, 5)),
+    (" 5/3/2019 ", date(2019, 3, 5)),
+    ("31/02/2019", None),
+    ("2019-03-05", None),
+    (None, None),
+])
+def test_parse_date_reads_the_kc_format_only(raw, expected):
+    assert parse_date(raw) == expected
+
+
+@pytest.mark.parametrize("raw", [
+    "05/03/2019", "5th March 2019", "Tuesday 5th March 2019", "5 Mar 2019", "March 5th, 2019", "2019-03-05",
+    "05.03.2019",
+])
+def test_normalize_date_reads_written_show_dates(raw):
+    assert normalize_date(raw) == date(2019, 3, 5)
+
+
+def test_normalize_date_gives_up_on_free_text():
+    assert normalize_date("sometime in spring") is None
+
+
+def test_appointments_export_is_typed_and_batched(judge_result):
+    store = JudgeStore()
+    for n in range(3):
+        store.upsert_judge(f"judge-{n}", "hash", dict(judge_result, judge_id=f"judge-{n}"))
+    store.close()
+    expected = 3 * len(judge_result["appointments"])
+
+    batches = list(columnar_export.appointment_batches(batch_rows=5))
+    assert all(batch.num_rows <= 5 for batch in batches) and sum(b.num_rows for b in batches) == expected
+
+    path = columnar_export.export_appointments(export_dir="exports")
+    table = pq.read_table(path)
+    assert table.num_rows == expected
+    assert table.schema.field("date").type == "date32[day]"
+    first = judge_result["appointments"][0]
+    row = table.slice(0, 1).to_pylist()[0]
+    assert row["date"] == parse_date(first["date"]) and row["year"] == row["date"].year
+    assert row["date_raw"] == first["date"] and row["judge_id"] == "judge-0"
+
+
+def test_critiques_export_parses_show_dates():
+    log = CritiqueLog()
+    log.append([
+        {"url": "https://critiques.test/1", "show_date": "Saturday 1st June 2024", "published_date": "03/06/2024",
+         "scraped_at": "2024-06-04T10:00:00", "critique": "Lovely dog."},
+        {"url": "https://critiques.test/2", "show_date": "not given", "critique": "Nice bitch."},
+    ])
+    rows = pq.read_table(columnar_export.export_critiques(log, export_dir="exports")).to_pylist()
+    assert [(r["show_date"], r["year"]) for r in rows] == [(date(2024, 6, 1), 2024), (None, None)]
+    assert rows[0]["published_date"] == date(2024, 6, 3) and rows[1]["show_date_raw"] == "not given"
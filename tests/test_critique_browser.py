@@ -0,0 +1,67 @@
+import asyncio
+
+import brazenbeacon_critiques_scraper as critiques
+
+
+class FakePage:
+    """Just enough of a Playwright page for extract_critique(): every URL has all fields,
+    except those in `broken`, whose body never renders."""
+
+    def __init__(self, context):
+        self.context = context
+        self.urls = []
+
+    async def goto(self, url, wait_until=None):
+        self.urls.append(url)
+        await asyncio.sleep(0.001)
+
+    async def wait_for_selector(self, selector, timeout=None):
+        if self.urls[-1] in self.context.broken:
+            raise TimeoutError(f"{selector} not found")
+
+    async def evaluate(self, script, selectors):
+        return {name: f"{name} of {self.urls[-1]}\n" for name in selectors}
+
+    async def close(self):
+        self.context.open -= 1
+
+
+class FakeContext:
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.pages = []
+        self.open = 0
+        self.peak = 0
+
+    async def new_page(self):
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+        self.pages.append(FakePage(self))
+        return self.pages[-1]
+
+
+def test_browser_pool_reuses_a_fixed_set_of_pages():
+    urls = [f"https://critiques.test/critique/{n}" for n in range(10)]
+    context = FakeContext()
+    details = asyncio.run(critiques.extract_critiques_browser(context, urls, workers=3))
+    assert set(details) == set(urls)
+    assert details[urls[4]]["critique"] == f"critique of {urls[4]}"
+    assert details[urls[4]]["show_name"] == f"show_name of {urls[4]}\n"
+    assert len(context.pages) == 3 and context.peak == 3 and context.open == 0
+    assert sorted(url for page in context.pages for url in page.urls) == sorted(urls)
+
+
+def test_never_more_pages_than_urls():
+    context = FakeContext()
+    asyncio.run(critiques.extract_critiques_browser(context, ["https://critiques.test/critique/1"], workers=4))
+    assert len(context.pages) == 1
+
+
+def test_a_page_that_keeps_failing_gives_none_after_its_retries(monkeypatch):
+    monkeypatch.setattr(critiques, "backoff_delay", lambda attempt, base: 0)
+    urls = [f"https://critiques.test/critique/{n}" for n in range(4)]
+    context = FakeContext(broken=[urls[1]])
+    details = asyncio.run(critiques.extract_critiques_browser(context, urls, workers=2))
+    assert details[urls[1]] is None
+    assert all(details[url] for url in urls if url != urls[1])
+    assert sum(page.urls.count(urls[1]) for page in context.pages) == 3
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+import pytest
+from selectolax.lexbor import LexborHTMLParser
+
+import brazenbeacon_critiques_scraper as critiques
+from conftest import read_fixture
+
+
+def inner_text(html):
+    return critiques.inner_text(LexborHTMLParser(html).css_first("div.body"))
+
+
+def test_recorded_critique_page_parses_over_http():
+    detail = critiques.parse_critique_html(read_fixture("critique.html"), "https://critiques.test/critique/1")
+    assert detail["url"] == "https://critiques.test/critique/1"
+    assert {k: detail[k] for k in ("show_name", "breed", "judge", "show_date", "published_date")} == {
+        "show_name": "Example Championship Show 2024",
+        "breed": "Retriever (Golden)",
+        "judge": "Mrs Jane Example",
+        "show_date": "14/09/2024",
+        "published_date": "02/10/2024",
+    }
+    assert detail["critique"].startswith("What a lovely entry")
+    assert detail["critique"] == detail["critique"].strip()
+
+
+def test_a_page_without_the_critique_node_needs_the_browser():
+    assert critiques.parse_critique_html(read_fixture("critique_listing.html"), "x") is None
+    assert critiques.parse_critique_html("<html><body>Please accept cookies</body></html>", "x") is None
+
+
+def test_inner_text_lays_out_blocks_like_the_browser():
+    html = ('<div class="body">\n  <p>First  para,\n  two lines.</p><p>Second<br>line <b>bold</b> end.</p>'
+            '<ul><li>one</li><li>two</li></ul><script>var x;</script><!-- note -->Tail&nbsp;&nbsp;kept </div>')
+    assert inner_text(html) == "First para, two lines.\n\nSecond\nline bold end.\n\none\ntwo\nTail\xa0\xa0kept"
+
+
+def test_every_field_is_read_as_inner_text():
+    detail = critiques.parse_critique_html(read_fixture("critique_mixed.html"), "x")
+    assert detail["show_date"] == "Saturday, 14th September 2024"
+    assert detail["critique"].startswith("DOGS\n\nIntro para. A strong entry of good quality overall.\n\nOpen Dog (5)\n")
+    assert "Masculine head, \xa0good bone.\n2nd Standfast Hollyberry." in detail["critique"]
+
+
+class NoBrowser:
+    async def context(self):
+        raise AssertionError("the browser should not be needed")
+
+
+@pytest.fixture
+def critique_site(site):
+    site.reset()
+    return f"{site.url}/critiques/5"
+
+
+def test_critiques_served_over_http_never_start_the_browser(critique_site):
+    urls = [f"{critique_site}/critique/{n}" for n in range(5)]
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await critiques.extract_critiques(client, NoBrowser(), urls, workers=2)
+
+    details = asyncio.run(run())
+    assert [details[url]["show_name"] for url in urls] == [f"Show {n}" for n in range(5)]
+
+
+def test_a_failed_http_fetch_falls_back(critique_site):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await critiques.fetch_critique_http(client, f"{critique_site}/critique/99")
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,88 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from critique_index import build_critique_index, critique_index_stats, normalize_name, search_critiques
+from critique_log import CritiqueLog
+from judge_index import QUERY_DEFAULT_LIMIT
+from judge_parser import DEFAULT_BREED, build_result
+from judge_store import JudgeStore
+
+
+def judge(judge_id, name, *appointments):
+    profile = {"judge_name": name, "breed_judge_id": judge_id, "address": None, "approved_breeds": []}
+    rows = [{"date": d, "club_name": club, "sex_judged": None, "dogs_judged": "10", "breed_average": "10"}
+            for d, club in appointments]
+    return build_result(judge_id, profile, rows, DEFAULT_BREED)
+
+
+def critique(n, judge_name, show_date, show_name, text):
+    return {"url": f"https://critiques.test/{n}", "show_name": show_name, "breed": DEFAULT_BREED,
+            "judge": judge_name, "show_date": show_date, "critique": text}
+
+
+@pytest.fixture
+def index():
+    store = JudgeStore()
+    for result in (
+        judge("jane", "Mrs Jane Example", ("01/06/2024", "Golden Retriever Club of Scotland"),
+              ("02/06/2024", "Birmingham National")),
+        judge("smith-1", "John Smith", ("10/03/2023", "Crufts")),
+        judge("smith-2", "Mr John Smith"),
+        judge("ann", "Ann Other"),
+    ):
+        store.upsert_judge(result["judge_id"], "hash", result)
+    store.close()
+    CritiqueLog().append([
+        critique(1, "Mrs. J. EXAMPLE", "Saturday 1st June 2024", "Golden Retriever Club of Scotland Ch Show",
+                 "Lovely head, excellent movement."),
+        critique(2, "John Smith", "11th March 2023", "Crufts", "Good bone, moved well."),
+        critique(3, "John Smith", "1st January 2020", "Some Open Show", "Sound mover."),
+        critique(4, "Ann Other", "5th May 2022", "Open Show", "Excellent coat."),
+        critique(5, "Somebody Unknown", "not given", "Open Show", "Excellent temperament."),
+    ])
+    return build_critique_index()
+
+
+def test_normalize_name_drops_titles_accents_and_punctuation():
+    assert normalize_name("Mrs.  Jáne O'EXAMPLE") == "jane oexample"
+    assert normalize_name("Dr") == ""
+
+
+def test_critiques_link_to_judges_and_appointments(index):
+    assert index["critiques"] == 5 and index["linked_judge"] == 3 and index["linked_appointment"] == 2
+    links = {item["url"][-1]: item for item in search_critiques(limit=10)["items"]}
+    assert (links["1"]["judge_id"], links["1"]["link"], links["1"]["club_name"]) == (
+        "jane", "appointment", "Golden Retriever Club of Scotland")
+    assert (links["2"]["judge_id"], links["2"]["appointment_date"]) == ("smith-1", "2023-03-10")
+    assert (links["3"]["judge_id"], links["3"]["link"]) == (None, "ambiguous")
+    assert (links["4"]["judge_id"], links["4"]["link"]) == ("ann", "judge")
+    assert links["5"]["link"] is None
+    assert critique_index_stats()["critiques"] == 5
+
+
+def test_search_filters_and_ranks(index):
+    def urls(page):
+        return [item["url"][-1] for item in page["items"]]
+
+    assert sorted(urls(search_critiques(q="excellent"))) == ["1", "4", "5"]
+    assert urls(search_critiques(q="excellent coat")) == ["4"]
+    assert search_critiques(q="coat")["items"][0]["excerpt"] == "Excellent [coat]."
+    assert urls(search_critiques(judge="Mr John Smith")) == ["2", "3"]
+    assert urls(search_critiques(since="2022-01-01", until="2023-12-31")) == ["2", "4"]
+    assert urls(search_critiques(linked=False)) == ["3", "5"]
+    page = search_critiques(offset=1, limit=2)
+    assert page["total"] == 5 and urls(page) == ["2", "4"]
+    with pytest.raises(ValueError):
+        search_critiques(q='"unbalanced')
+
+
+def test_search_endpoint(index):
+    with TestClient(main.app) as client:
+        assert client.get("/critiques/search?q=bone").json()["items"][0]["judge_id"] == "smith-1"
+        assert client.get("/critiques/search?q=%22unbalanced").status_code == 400
+        assert client.get("/health").json()["critique_index"]["built"] is True
+
+
+def test_no_index_means_no_results():
+    assert search_critiques(q="anything") == {"total": 0, "offset": 0, "limit": QUERY_DEFAULT_LIMIT, "items": []}
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from critique_log import CritiqueLog
+
+
+def critique(n):
+    return {"url": f"https://critiques.test/critique/{n}", "show_name": f"Show {n}", "critique": "Lovely\xa0dog."}
+
+
+@pytest.mark.parametrize("gzip_segments", [False, True])
+def test_each_append_is_a_new_segment_and_nothing_is_rewritten(gzip_segments):
+    log = CritiqueLog(gzip_segments=gzip_segments)
+    first = log.append([critique(0), critique(1)])
+    with open(first, "rb") as f:
+        written = f.read()
+    second = log.append([critique(2)])
+    assert log.segments() == [first, second]
+    assert first.endswith(".jsonl.gz" if gzip_segments else ".jsonl")
+    with open(first, "rb") as f:
+        assert f.read() == written
+
+    log = CritiqueLog()
+    assert list(log.read_all()) == [critique(0), critique(1), critique(2)]
+    assert log.seen_urls() == {critique(n)["url"] for n in range(3)}
+
+
+def test_nothing_to_append_writes_nothing():
+    log = CritiqueLog()
+    assert log.append([]) is None
+    assert log.segments() == [] and log.seen_urls() == set()
+
+
+def test_legacy_json_files_are_imported_once():
+    with open("critiques.json", "w") as f:
+        json.dump([critique(0), critique(1)], f)
+    with open("seen.json", "w") as f:
+        json.dump([critique(1)["url"], "https://critiques.test/critique/old"], f)
+    log = CritiqueLog()
+    log.import_legacy("critiques.json", "seen.json")
+    log.import_legacy("critiques.json", "seen.json")
+    assert [os.path.basename(s) for s in log.segments()] == ["critiques-00000000-legacy.jsonl"]
+    assert list(log.read_all()) == [critique(0), critique(1)]
+    assert "https://critiques.test/critique/old" in log.seen_urls()
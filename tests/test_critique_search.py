@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+
+import brazenbeacon_critiques_scraper as critiques
+from critique_log import CritiqueLog
+
+
+@pytest.fixture
+def critique_site(site, drive, monkeypatch):
+    """Point the critique scraper at the fixture site; call with the number of critiques listed.
+
+    The fixture site lists the same critiques whatever the search term.
+    """
+    def point(count):
+        base = f"{site.url}/critiques/{count}"
+        monkeypatch.setattr(critiques, "BASE_URL", base)
+        monkeypatch.setattr(critiques, "LISTING_URL", f"{base}/critique-listing/")
+        return base
+
+    site.reset()
+    return point
+
+
+def search(seen=(), full=False):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await critiques.search_term(client, None, "Brazenbeacon Artemis", set(seen), full)
+
+    return asyncio.run(run())
+
+
+def test_search_walks_result_pages_until_one_is_empty(critique_site, site):
+    base = critique_site(45)
+    assert search() == [f"{base}/critique/{n}" for n in range(45)]
+    assert site.calls["critique_listing"] == 4
+
+
+def test_search_stops_at_the_first_page_with_nothing_new(critique_site, site):
+    base = critique_site(45)
+    seen = [f"{base}/critique/{n}" for n in range(20)]
+    assert search(seen) == []
+    assert site.calls["critique_listing"] == 1
+
+
+def test_backfill_walks_past_seen_pages(critique_site):
+    base = critique_site(45)
+    seen = [f"{base}/critique/{n}" for n in range(20)]
+    assert search(seen, full=True) == [f"{base}/critique/{n}" for n in range(20, 45)]
+
+
+def test_listing_url_carries_the_term_and_page():
+    assert critiques.listing_url("Brazenbeacon Artemis", 2).endswith(
+        "/critique-listing/?Keyword=Brazenbeacon+Artemis&page=2")
+
+
+def test_a_critique_found_by_several_terms_is_scraped_once(critique_site, site):
+    critique_site(25)
+    asyncio.run(critiques.scrape_brazenbeacon_critiques(terms=["Brazenbeacon", "Standfast"]))
+    assert site.calls["critique"] == 25
+    assert len(list(CritiqueLog().read_all())) == 25
+
+    site.reset()
+    asyncio.run(critiques.scrape_brazenbeacon_critiques(terms=["Brazenbeacon", "Standfast"]))
+    assert site.calls["critique"] == 0
+    assert site.calls["critique_listing"] == 2
@@ -0,0 +1,60 @@
+import hashlib
+
+import drive_utils
+from drive_utils import DriveSync
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_a_file_queued_repeatedly_is_uploaded_once_with_its_final_contents(drive):
+    sync = DriveSync(folder_id="tests")
+    for n in range(3):
+        write("judges.json", b'{"run": %d}' % n)
+        sync.queue("judges.json")
+    sync.finish()
+    assert drive.calls["create"] == 1
+    [uploaded] = drive.files.values()
+    assert uploaded["name"] == "judges.json"
+    assert uploaded["md5"] == hashlib.md5(b'{"run": 2}').hexdigest()
+
+
+def test_unchanged_files_are_skipped_and_changed_ones_updated(drive):
+    write("a.json", b"a")
+    write("b.json", b"b")
+    sync = DriveSync(folder_id="tests")
+    sync.queue("a.json")
+    sync.queue("b.json")
+    sync.finish()
+
+    drive.calls.clear()
+    write("b.json", b"b2")
+    sync.queue("a.json")
+    sync.queue("b.json")
+    sync.finish()
+    # The folder is listed once per run; only the changed file goes up.
+    assert dict(drive.calls) == {"list": 1, "update": 1}
+    assert len(drive.files) == 2
+
+
+def test_large_files_go_up_as_resumable_chunks(drive, monkeypatch):
+    monkeypatch.setattr(drive_utils, "DRIVE_UPLOAD_CHUNK_MB", 0.25)
+    data = bytes(range(256)) * 4096  # 1 MB
+    write("judges.db", data)
+    sync = DriveSync(folder_id="tests")
+    sync.queue("judges.db", "application/x-sqlite3")
+    sync.finish()
+    assert drive.calls["chunk"] == 4
+    [uploaded] = drive.files.values()
+    assert uploaded["md5"] == hashlib.md5(data).hexdigest()
+    assert drive.bytes_uploaded == len(data)
+
+
+def test_missing_files_are_not_queued(drive):
+    sync = DriveSync(folder_id="tests")
+    sync.queue("missing.json")
+    assert sync.pending == {}
+    sync.finish()
+    assert not drive.calls
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+
+from conftest import ROOT
+from fixture_server import JUDGE_PAGE_SIZE, FixtureCorpus
+from main import parse_judge_cards
+
+
+def test_judge_listing_pages_hold_distinct_judges():
+    corpus = FixtureCorpus()
+    pages = [parse_judge_cards(corpus.judge_listing(30, offset)) for offset in range(0, 36, JUDGE_PAGE_SIZE)]
+    assert [len(page) for page in pages] == [12, 12, 6]
+    urls = [url for page in pages for url in page]
+    assert len(set(urls)) == 30
+    assert all(FixtureCorpus.judge_id(i) in "".join(urls) for i in range(30))
+
+
+def test_judge_pages_are_personalised_per_judge():
+    corpus = FixtureCorpus()
+    judge_id = FixtureCorpus.judge_id(7)
+    assert FixtureCorpus.judge_index(judge_id) == 7
+    assert "Judge 7" in corpus.judge_profile(judge_id)
+    assert corpus.judge_appointments(judge_id).count("<tr>") == 8 + corpus.appointments_head.count("<tr>")
+
+
+def test_site_honours_if_none_match(site):
+    url = f"{site.url}/critiques/3/critique/1"
+    first = httpx.get(url)
+    assert first.status_code == 200 and "Show 1" in first.text
+    again = httpx.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.content == b""
+    assert httpx.get(f"{site.url}/critiques/3/critique/3").status_code == 404
+
+
+def test_pipeline_benchmark_runs_offline(workdir):
+    out = workdir / "pipeline.json"
+    subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "bench_pipeline.py"), "--scales", "10",
+                    "--concurrency", "4", "--out", str(out)],
+                   cwd=workdir, check=True, capture_output=True, timeout=300)
+    with open(out) as f:
+        report = json.load(f)
+    runs = {run["pipeline"]: run for run in report["runs"]}
+    assert set(runs) == {"judges", "critiques"}
+    assert all(run["requests"] > 0 and run["drive_calls"] > 0 for run in runs.values())
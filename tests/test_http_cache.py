@@ -0,0 +1,78 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+import main
+from http_cache import HttpCache
+
+URL = "https://example.test/judge-profile/?JudgeId=1"
+
+
+def test_stored_validators_are_sent_and_a_304_returns_the_cached_body():
+    cache = HttpCache()
+    assert cache.conditional_headers(URL) == {}
+    cache.store(URL, httpx.Response(200, text="<html>v1</html>",
+                                    headers={"ETag": '"v1"', "Last-Modified": "Sat, 14 Sep 2024 10:00:00 GMT"}))
+
+    cache = HttpCache()  # a later run reads the entry back from disk
+    assert cache.conditional_headers(URL) == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Sat, 14 Sep 2024 10:00:00 GMT"}
+    assert cache.not_modified(URL) == "<html>v1</html>"
+    assert cache.stats["hits"] == 1 and cache.stats["not_modified"] == 1
+    assert cache._entries == {}
+
+
+def test_response_without_validators_is_not_stored():
+    cache = HttpCache()
+    cache.conditional_headers(URL)
+    cache.store(URL, httpx.Response(200, text="no validators"))
+    assert cache.stats["stored"] == 0
+    assert HttpCache().conditional_headers(URL) == {}
+
+
+def test_fetch_page_revalidates_against_the_fixture_site(kc, site):
+    page = kc(12) + "/search/find-a-judge/judge-profile/?JudgeId=00000001-0b7d-e811-a8a3-002248005d25"
+    cache, stats = HttpCache(), {"pages": 0}
+
+    async def fetch_twice():
+        async with httpx.AsyncClient() as client:
+            first = await main.fetch_page(client, page, stats, cache)
+            second = await main.fetch_page(client, page, stats, cache)
+        return first, second
+
+    (text, cached), (again, revalidated) = asyncio.run(fetch_twice())
+    assert not cached and revalidated
+    assert again == text and "Judge 1" in text
+    assert cache.stats["not_modified"] == 1
+    assert cache._entries == {}
+
+
+@pytest.mark.parametrize("error", [httpx.ConnectError("refused"), asyncio.CancelledError()])
+def test_fetch_page_forgets_the_entry_when_the_request_raises(error):
+    cache = HttpCache()
+    cache.store(URL, httpx.Response(200, text="cached", headers={"ETag": '"v1"'}))
+
+    def fail(request):
+        raise error
+
+    async def fetch():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(fail)) as client:
+            await main.fetch_page(client, URL, {"pages": 0}, cache)
+
+    with pytest.raises(type(error)):
+        asyncio.run(fetch())
+    assert cache._entries == {}
+
+
+def test_prune_drops_entries_past_their_max_age():
+    cache = HttpCache(max_age_days=1)
+    for n in range(3):
+        cache.store(f"{URL}{n}", httpx.Response(200, text="x", headers={"ETag": f'"{n}"'}))
+    old = time.time() - 2 * 86400
+    os.utime(cache._file(f"{URL}0"), (old, old))
+    cache.prune()
+    assert cache.stats["evicted"] == 1
+    assert sorted(os.listdir(cache.path)) == sorted(os.path.basename(cache._file(f"{URL}{n}")) for n in (1, 2))
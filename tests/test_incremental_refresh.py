@@ -0,0 +1,58 @@
+import asyncio
+import math
+import sqlite3
+import time
+
+import main
+
+
+def scrape(refresh):
+    return asyncio.run(main.fetch_golden_judges(concurrency=4, discovery="http", refresh=refresh))
+
+
+def run_reasons(run_id):
+    db = sqlite3.connect("judges.db")
+    try:
+        return dict(db.execute(
+            "SELECT reason, COUNT(*) FROM run_targets WHERE run_id = ? GROUP BY reason", (run_id,)).fetchall())
+    finally:
+        db.close()
+
+
+def test_refresh_reason():
+    now = time.time()
+    fresh = {"card_hash": "c1", "last_fetched": now - 3600}
+    assert main.refresh_reason(None, "c1", now) == "new"
+    assert main.refresh_reason({"card_hash": None, "last_fetched": None}, "c1", now) == "new"
+    assert main.refresh_reason(fresh, "c2", now) == "card_changed"
+    assert main.refresh_reason(fresh, "c1", now) is None
+    old = {"card_hash": "c1", "last_fetched": now - main.JUDGE_FULL_REFRESH_DAYS * 86400}
+    assert main.refresh_reason(old, "c1", now) == "stale"
+
+
+def test_rotation_slice_takes_the_longest_unfetched_first(monkeypatch):
+    monkeypatch.setattr(main, "JUDGE_REFRESH_SLICE", 0.25)
+    rest = [(t, f"judge{t}") for t in (5, 1, 9, 3, 7)]
+    assert main.rotation_slice(rest) == [(1, "judge1"), (3, "judge3")]
+
+
+def test_incremental_run_fetches_only_changed_stale_and_rotation_judges(kc, site):
+    base = kc(30)
+    first = scrape("full")
+    assert first["judges"] == 30
+
+    changed = f"{base}/search/find-a-judge/judge-profile/?JudgeId=00000003-0b7d-e811-a8a3-002248005d25"
+    stale = f"{base}/search/find-a-judge/judge-profile/?JudgeId=00000004-0b7d-e811-a8a3-002248005d25"
+    db = sqlite3.connect("judges.db")
+    with db:
+        db.execute("UPDATE judge_listing SET card_hash = 'old card' WHERE profile_url = ?", (changed,))
+        db.execute("UPDATE judge_listing SET last_fetched = 0 WHERE profile_url = ?", (stale,))
+    db.close()
+
+    site.reset()
+    stats = scrape("incremental")
+    rotation = math.ceil(28 * main.JUDGE_REFRESH_SLICE)
+    assert stats["listed"] == 30
+    assert stats["judges"] == 2 + rotation
+    assert run_reasons(stats["run_id"]) == {"card_changed": 1, "stale": 1, "rotation": rotation}
+    assert site.calls["judge_profile"] == 2 + rotation
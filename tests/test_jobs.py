@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from jobs import JobRunner, progress, runner
+
+
+def test_triggering_a_running_job_returns_the_running_one():
+    async def run():
+        jobs = JobRunner()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first, started = jobs.start("judges", work)
+        second, started_again = jobs.start("judges", work)
+        assert started and not started_again and second is first
+        release.set()
+        assert await first.task == "done"
+        third, started = jobs.start("judges", work)
+        await third.task
+        return first, third, started
+
+    first, third, started = asyncio.run(run())
+    assert first.status == "succeeded" and first.result == "done"
+    assert started and third.id != first.id
+
+
+def test_jobs_sharing_a_lock_never_overlap():
+    spans = []
+
+    async def work(tag):
+        spans.append((tag, "start"))
+        await asyncio.sleep(0.01)
+        spans.append((tag, "end"))
+
+    async def run():
+        jobs = JobRunner()
+        a, _ = jobs.start("judges", work, "a", lock="state")
+        b, _ = jobs.start("export", work, "b", lock="state")
+        await asyncio.gather(a.task, b.task)
+
+    asyncio.run(run())
+    assert spans == [("a", "start"), ("a", "end"), ("b", "start"), ("b", "end")]
+
+
+def test_a_failed_job_records_its_error_and_progress():
+    async def work():
+        progress(total=10)
+        progress(advance=4)
+        raise RuntimeError("listing unavailable")
+
+    async def run():
+        jobs = JobRunner()
+        seen = []
+        jobs.listeners.append(lambda job: seen.append(job.status))
+        job, _ = jobs.start("judges", work)
+        await job.task
+        return jobs, job, seen
+
+    jobs, job, seen = asyncio.run(run())
+    assert job.status == "failed" and job.error == "RuntimeError: listing unavailable"
+    assert jobs.last_error["judges"]["job_id"] == job.id
+    assert job.to_dict()["progress"]["done"] == 4 and job.to_dict()["progress"]["total"] == 10
+    assert seen == ["running", "failed"]
+    assert not jobs.is_running("judges")
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+    assert not runner._running
+
+
+def test_run_endpoint_starts_a_job_and_reports_it(client, monkeypatch):
+    async def scrape(full=False):
+        return {"full": full}
+
+    monkeypatch.setattr(main, "scrape_brazenbeacon_critiques", scrape)
+    response = client.get("/run/critiques?full=true&wait=true")
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    assert client.get(f"/jobs/{job_id}").json()["result"] == {"full": True}
+    assert job_id in [job["id"] for job in client.get("/jobs").json()["jobs"]]
+
+
+def test_waiting_on_a_failed_job_is_an_error(client, monkeypatch):
+    async def scrape(full=False):
+        raise RuntimeError("site down")
+
+    monkeypatch.setattr(main, "scrape_brazenbeacon_critiques", scrape)
+    response = client.get("/run/critiques?wait=true")
+    assert response.status_code == 500
+    assert response.json()["detail"]["status"] == "failed"
+    assert response.json()["detail"]["error"] == "RuntimeError: site down"
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from request_policy import RequestPolicy
+
+
+def discover(mode="http"):
+    return asyncio.run(main.discover_judge_links(mode, concurrency=4, policy=RequestPolicy("judges")))
+
+
+def listing_state():
+    db = sqlite3.connect("judges.db")
+    try:
+        members = db.execute("SELECT COUNT(*) FROM listing_breeds").fetchone()[0]
+    finally:
+        db.close()
+    with open("judge_profile_links.json") as f:
+        return members, len(json.load(f))
+
+
+def scrape():
+    return asyncio.run(main.fetch_golden_judges(concurrency=4, discovery="http", refresh="full"))
+
+
+def test_http_discovery_pages_through_the_whole_listing(kc, site):
+    base = kc(30)
+    links, mode, _ = discover()
+    assert mode == "http"
+    assert len(links) == 30
+    assert all(url.startswith(f"{base}/search/find-a-judge/judge-profile/") for url in links)
+    # The first page, then one window of four pages (the last of them empty).
+    assert site.calls["judge_listing"] == 5
+
+
+def test_auto_discovery_falls_back_to_the_browser_when_http_finds_nothing(kc, monkeypatch):
+    base = kc(0)
+    card = {f"{base}/search/find-a-judge/judge-profile/?JudgeId=00000001-aaaa": "card"}
+
+    async def browser(breed=None):
+        yield card
+
+    monkeypatch.setattr(main, "discover_judges_browser", browser)
+    links, mode, _ = discover("auto")
+    assert links == card and mode == "browser"
+
+
+def test_unknown_discovery_mode_is_rejected(kc):
+    kc(12)
+    with pytest.raises(ValueError):
+        discover("scroll")
+    with TestClient(main.app) as client:
+        response = client.get("/run/judges?discovery=scroll")
+    assert response.status_code == 400
+
+
+def test_a_listing_that_ignores_paging_is_an_error(kc, monkeypatch):
+    kc(30)
+    scrape()
+    assert listing_state() == (30, 30)
+    judge_list_url = main.judge_list_url
+    monkeypatch.setattr(main, "judge_list_url", lambda total, breed=None: judge_list_url(0, breed))
+    with pytest.raises(RuntimeError, match="ignored its paging offset"):
+        scrape()
+    assert listing_state() == (30, 30)
+
+
+def test_an_empty_listing_keeps_the_known_judges(kc):
+    kc(30)
+    scrape()
+    kc(0)
+    stats = scrape()
+    assert stats["judges"] == 0
+    assert listing_state() == (30, 30)
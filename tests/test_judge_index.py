@@ -0,0 +1,103 @@
+import json
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from judge_index import Snapshot, judge_index
+from judge_parser import DEFAULT_BREED, build_result
+from judge_store import JudgeStore, iso_date
+
+CLUBS = ["Crufts", "Welsh Kennel Club", "Golden Retriever Club", "Birmingham National"]
+BREEDS = [DEFAULT_BREED, "Retriever (Labrador)", "Setter (Irish)"]
+
+
+def make_results(count=40, seed=7):
+    rng = random.Random(seed)
+    results = []
+    for n in range(count):
+        approved = [{"group": "Gundog", "breed": b, "level": "Championship"}
+                    for b in rng.sample(BREEDS, rng.randint(1, 3))]
+        profile = {"judge_name": f"Judge {n:02d}", "breed_judge_id": str(n), "address": None,
+                   "approved_breeds": approved}
+        appointments = [{
+            "date": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2015, 2024)}",
+            "club_name": rng.choice(CLUBS),
+            "sex_judged": rng.choice(["Dog", "Bitch", None]),
+            "dogs_judged": str(rng.randint(1, 80)),
+            "breed_average": str(rng.randint(1, 80)),
+        } for _ in range(rng.randint(0, 12))]
+        results.append(build_result(f"judge-{n:02d}", profile, appointments, rng.choice(BREEDS[:2])))
+    return results
+
+
+@pytest.fixture(scope="module")
+def results():
+    return make_results()
+
+
+@pytest.fixture(scope="module")
+def snapshot(results):
+    return Snapshot([json.dumps(r) for r in results])
+
+
+def judge_ids(page):
+    return [item["judge_id"] for item in page["items"]]
+
+
+def test_judge_filters_match_a_full_scan(snapshot, results):
+    expected = sorted(r["judge_id"] for r in results if r["total_appointments"] >= 3 and any(
+        a["club_name"] == "Crufts" and a["date"].endswith("2020") for a in r["appointments"]))
+    page = snapshot.judges_query(min_appointments=3, club="crufts", year=2020, sort="judge_name", limit=500)
+    assert judge_ids(page) == expected and page["total"] == len(expected)
+
+    expected = [r["judge_id"] for r in results if r["golden_only"]]
+    assert sorted(judge_ids(snapshot.judges_query(golden_only=True, limit=500))) == sorted(expected)
+
+
+def test_date_bounds_select_judges_with_an_appointment_in_range(snapshot, results):
+    def dated(r):
+        return [iso_date(a["date"]) for a in r["appointments"]]
+
+    since = sorted(r["judge_id"] for r in results if any(d >= "2023-01-01" for d in dated(r)))
+    assert sorted(judge_ids(snapshot.judges_query(since="2023-01-01", limit=500))) == since
+    between = sorted(r["judge_id"] for r in results
+                     if any("2018-01-01" <= d <= "2018-12-31" for d in dated(r)))
+    assert sorted(judge_ids(snapshot.judges_query(since="2018-01-01", until="2018-12-31", limit=500))) == between
+
+
+def test_sorting_puts_missing_values_last_both_ways(snapshot, results):
+    for sort in ("last_appointment", "-last_appointment"):
+        rows = snapshot.judges_query(sort=sort, limit=500)["items"]
+        values = [row["last_appointment"] for row in rows]
+        present = [v for v in values if v is not None]
+        assert present == sorted(present, reverse=sort.startswith("-"))
+        assert values == present + [None] * (len(values) - len(present))
+
+
+def test_appointments_page_in_date_order(snapshot, results):
+    everything = sorted((iso_date(a["date"]) for r in results for a in r["appointments"]), reverse=True)
+    page = snapshot.appointments_query(sort="-date", offset=5, limit=10)
+    assert page["total"] == len(everything)
+    assert [item["date"] for item in page["items"]] == everything[5:15]
+
+
+def test_unknown_sort_is_rejected(snapshot):
+    with pytest.raises(ValueError):
+        snapshot.judges_query(sort="address")
+
+
+def test_endpoints_serve_the_refreshed_index(results):
+    store = JudgeStore()
+    for result in results[:5]:
+        store.upsert_judge(result["judge_id"], "hash", result)
+    store.close()
+    with TestClient(main.app) as client:
+        client.portal.call(judge_index.refresh)
+        assert client.get("/judges").json()["total"] == 5
+        assert client.get(f"/judges/{results[0]['judge_id']}").json() == results[0]
+        assert client.get("/judges/nobody").status_code == 404
+        assert client.get("/judges?sort=address").status_code == 400
+        appointments = client.get(f"/appointments?judge_id={results[1]['judge_id']}&limit=500").json()
+        assert appointments["total"] == results[1]["total_appointments"]
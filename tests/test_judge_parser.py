@@ -0,0 +1,67 @@
+import pytest
+
+import judge_parser
+from bench_parse import bs4_parse_appointments, bs4_parse_profile
+from judge_parser import DEFAULT_BREED, build_result, parse_appointments, parse_profile
+
+# Whitespace, comments, scripts and nested markup that the text extraction has to treat like BeautifulSoup.
+TRICKY_PROFILE = """
+<div class="t-judge-profile__name"> Mr <b>Joe</b>  Bloggs <!-- hidden --> Breed Judge ID 42</div>
+<dl><dt>Phone</dt><dd>0123</dd><dt> Address </dt><dd> 1 Road <br> <span>Town</span><script>x()</script> </dd></dl>
+<h4>Gundog</h4><p>note</p>
+<ul class="t-judge-profile__long-list">
+  <li><a href="#">Retriever (Golden)</a> <label>Level</label><label> Championship </label></li>
+  <li><label>Setter (Irish)</label><label>Limited</label></li>
+</ul>
+"""
+TRICKY_APPOINTMENTS = """
+<table class="a-table__table"><tbody>
+<tr><td> 01/02/2023 </td><td>Club <em>A</em></td><td><svg class="a-icon a-icon--male"></svg></td><td>5</td><td>7</td></tr>
+<tr><td>short row</td></tr>
+<tr><th>02/03/2024</th><td>Club B</td><td></td><td></td><td><!-- none --></td></tr>
+</tbody></table>
+"""
+
+
+def test_recorded_profile_parses(judge_pages):
+    profile = parse_profile(judge_pages[0])
+    assert profile["judge_name"] == "Mrs Jane Example"
+    assert profile["breed_judge_id"] == "104233"
+    assert profile["address"] == "Standfast Cottage, 1 Lane End, Little Example, EX1 2MP"
+    assert {"group": "Approved breeds", "breed": "Retriever (Golden)", "level": "Championship"} in \
+        profile["approved_breeds"]
+
+
+def test_recorded_appointments_parse(judge_pages):
+    appointments = parse_appointments(judge_pages[1])
+    assert len(appointments) == 240
+    assert appointments[0] == {"date": "03/09/2024", "club_name": "Welsh Kennel Club", "sex_judged": "Bitch",
+                               "dogs_judged": "12", "breed_average": "25"}
+
+
+@pytest.mark.parametrize("profile_html", ["recorded", TRICKY_PROFILE])
+def test_profile_matches_the_original_beautifulsoup_parser(judge_pages, profile_html):
+    html = judge_pages[0] if profile_html == "recorded" else profile_html
+    assert parse_profile(html) == bs4_parse_profile(html)
+
+
+@pytest.mark.parametrize("appointments_html", ["recorded", TRICKY_APPOINTMENTS])
+def test_appointments_match_the_original_beautifulsoup_parser(judge_pages, appointments_html):
+    html = judge_pages[1] if appointments_html == "recorded" else appointments_html
+    assert parse_appointments(html) == bs4_parse_appointments(html)
+
+
+def test_last_appointment_is_the_latest_by_calendar_date():
+    profile = {"judge_name": "J", "breed_judge_id": None, "address": None, "approved_breeds": []}
+    appointments = [{"date": d, "club_name": "C"} for d in ("02/12/2023", "15/01/2024", "bad", "30/11/2023")]
+    result = build_result("j", profile, appointments)
+    assert result["last_appointment"] == "15/01/2024"
+    assert result["years_active"] == [2023, 2024]
+    assert result["total_appointments"] == 4
+
+
+def test_breed_only_allows_a_few_other_breeds():
+    approved = [{"breed": b} for b in ("Retriever (Golden)", "Setter (Irish)", "Retriever (Labrador)")]
+    assert judge_parser.breed_only(approved, DEFAULT_BREED)
+    assert not judge_parser.breed_only(approved + [{"breed": "Pointer"}], DEFAULT_BREED)
+    assert not judge_parser.breed_only(approved[1:], DEFAULT_BREED)
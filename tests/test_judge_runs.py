@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import main
+from atomic_io import atomic_write, write_json
+from judge_store import JudgeStore
+from request_policy import RequestPolicy
+from test_judge_scrape import scrape, stored_judges
+
+
+def test_a_failed_write_leaves_the_old_file_alone():
+    write_json("state.json", {"run": 1})
+    with pytest.raises(RuntimeError):
+        with atomic_write("state.json") as f:
+            f.write('{"run": ')
+            raise RuntimeError("killed")
+    with open("state.json") as f:
+        assert json.load(f) == {"run": 1}
+    assert not os.path.exists("state.json.tmp")
+
+
+def latest_run():
+    store = JudgeStore()
+    try:
+        return store.get_run("latest")
+    finally:
+        store.close()
+
+
+def test_an_interrupted_run_resumes_where_it_stopped(kc, site, monkeypatch):
+    kc(30)
+    upsert = JudgeStore.upsert_judge
+    saved = []
+
+    async def interrupted():
+        task = asyncio.current_task()
+
+        def counting(store, *args):
+            saved.append(args[0])
+            if len(saved) == 10:
+                task.cancel()
+            return upsert(store, *args)
+
+        monkeypatch.setattr(JudgeStore, "upsert_judge", counting)
+        policy = RequestPolicy("judges", max_concurrency=4)
+        listing = main.stream_breeds("http", 4, main.JUDGE_BREEDS, policy=policy)
+        await main.scrape_appointments_from_html(listing, concurrency=4, policy=policy)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(interrupted())
+    monkeypatch.setattr(JudgeStore, "upsert_judge", upsert)
+
+    run = latest_run()
+    assert run["status"] == "running" and 10 <= run["done"] < 30
+    site.reset()
+    stats = scrape(resume="latest")
+    assert stats["run_id"] == run["run_id"] and stats["failed"] == 0
+    assert stored_judges() == 30
+    assert site.calls["judge_profile"] == 30 - run["done"]
+    assert latest_run() is None
+
+
+def test_the_store_is_closed_when_a_resume_fails(kc, monkeypatch):
+    kc(12)
+    closed = []
+    close = JudgeStore.close
+    monkeypatch.setattr(JudgeStore, "close", lambda store: closed.append(store) or close(store))
+    with pytest.raises(ValueError, match="No unfinished judge run"):
+        scrape(resume="nope")
+    assert len(closed) == 1
@@ -0,0 +1,59 @@
+import asyncio
+
+import main
+from judge_store import JudgeStore
+from request_policy import RequestPolicy
+
+
+class CountingPolicy(RequestPolicy):
+    """A RequestPolicy that records the most requests it ever had on the wire at once."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def send(self, request, send):
+        async def counted(request):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                await asyncio.sleep(0.005)
+                return await send(request)
+            finally:
+                self.in_flight -= 1
+
+        return await super().send(request, counted)
+
+
+def scrape(concurrency=4, refresh="full", policy=None, **kwargs):
+    policy = policy or RequestPolicy("judges", max_concurrency=concurrency)
+    listing = main.stream_breeds("http", concurrency, main.JUDGE_BREEDS, policy=policy)
+    return asyncio.run(main.scrape_appointments_from_html(listing, concurrency=concurrency, refresh=refresh,
+                                                          policy=policy, **kwargs))
+
+
+def stored_judges():
+    store = JudgeStore()
+    try:
+        return store.conn.execute("SELECT COUNT(*) FROM judges").fetchone()[0]
+    finally:
+        store.close()
+
+
+def test_scrape_saves_every_listed_judge(kc, site):
+    kc(30)
+    stats = scrape(concurrency=4)
+    assert stats["judges"] == 30
+    assert stats["failed"] == 0
+    assert stored_judges() == 30
+    assert site.calls["judge_profile"] == 30
+    assert site.calls["judge_appointments"] == 30
+
+
+def test_scrape_never_exceeds_its_concurrency(kc):
+    kc(40)
+    policy = CountingPolicy("judges", max_concurrency=3)
+    stats = scrape(concurrency=3, policy=policy)
+    assert stats["judges"] == 40
+    assert 1 < policy.peak <= 3
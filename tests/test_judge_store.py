@@ -0,0 +1,58 @@
+import json
+import os
+
+from judge_parser import DEFAULT_BREED
+from judge_store import JudgeStore, export_json, iso_date
+
+JUDGE_ID = "3f2a9c1e-0b7d-e811-a8a3-002248005d25"
+
+
+def test_upsert_reports_whether_the_stored_content_changed(judge_result):
+    store = JudgeStore()
+    assert store.upsert_judge(JUDGE_ID, "hash1", judge_result)
+    assert not store.upsert_judge(JUDGE_ID, "hash2", judge_result)
+    judge_result["appointments"] = judge_result["appointments"][:3]
+    assert store.upsert_judge(JUDGE_ID, "hash3", judge_result)
+    store.close()
+
+    store = JudgeStore()
+    assert store.get_result(JUDGE_ID) == judge_result
+    assert store.data_hash(JUDGE_ID) == "hash3"
+    rows = store.conn.execute(
+        "SELECT seq, date, appointment_date FROM appointments WHERE judge_id = ? ORDER BY seq", (JUDGE_ID,)).fetchall()
+    assert [(seq, date) for seq, date, _ in rows] == [(i, a["date"]) for i, a in enumerate(judge_result["appointments"])]
+    assert all(iso == iso_date(date) for _, date, iso in rows)
+    store.close()
+
+
+def test_appointment_dates_are_stored_sortably():
+    assert iso_date("03/09/2024") == "2024-09-03"
+    assert iso_date("31/02/2024") is None
+    assert iso_date("") is None
+
+
+def test_export_json_writes_the_legacy_files(judge_result):
+    store = JudgeStore()
+    store.upsert_judge(JUDGE_ID, "hash1", judge_result)
+    written = export_json(store, [(JUDGE_ID, DEFAULT_BREED)], "processed_judges.json")
+    store.close()
+    assert written == [f"judge_{JUDGE_ID}_appointments.json", "processed_judges.json"]
+    with open(written[0]) as f:
+        assert json.load(f) == judge_result
+    with open("processed_judges.json") as f:
+        assert json.load(f) == {JUDGE_ID: {"data_hash": "hash1"}}
+
+
+def test_processed_file_is_imported_into_an_empty_store_only():
+    with open("processed_judges.json", "w") as f:
+        json.dump({"a": {"data_hash": "ha"}, "b": {"data_hash": "hb"}}, f)
+    store = JudgeStore()
+    store.import_processed_file("processed_judges.json")
+    assert store.processed_hashes() == {"a": {"data_hash": "ha"}, "b": {"data_hash": "hb"}}
+
+    with open("processed_judges.json", "w") as f:
+        json.dump({"c": {"data_hash": "hc"}}, f)
+    store.import_processed_file("processed_judges.json")
+    assert store.data_hash("c") is None
+    store.close()
+    assert os.path.exists("judges.db")
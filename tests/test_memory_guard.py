@@ -0,0 +1,98 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+import main
+import memory_guard
+from memory_guard import MemoryGuard, browser_rss_mb, child_rss_mb
+from request_policy import AimdLimiter, RequestPolicy
+
+# A child that holds ~64 MB resident until killed.
+HOLD = ("import sys, time; b = b'x' * (64 * 1024 * 1024); "
+        "sys.stdout.write('ready\\n'); sys.stdout.flush(); time.sleep(60)")
+
+
+@pytest.fixture
+def child():
+    procs = []
+
+    def start(*argv):
+        proc = subprocess.Popen([sys.executable, "-c", HOLD, *argv], stdout=subprocess.PIPE, text=True)
+        procs.append(proc)
+        assert proc.stdout.readline() == "ready\n"
+        return proc
+
+    yield start
+    for proc in procs:
+        proc.kill()
+        proc.wait()
+
+
+def test_tree_rss_sums_a_process_and_its_descendants(monkeypatch):
+    monkeypatch.setattr(memory_guard, "_PAGE_MB", 1)
+    table = {1: (0, 10), 2: (1, 5), 3: (2, 1), 4: (0, 100)}
+    assert memory_guard._tree_rss_mb(table, {1}) == 16
+    assert memory_guard._tree_rss_mb(table, set()) == 0
+
+
+def test_child_rss_counts_child_processes(child):
+    before = child_rss_mb()
+    child()
+    assert child_rss_mb() - before >= 60
+
+
+def test_browser_rss_counts_only_the_playwright_driver(child):
+    assert browser_rss_mb() == 0
+    child()
+    assert browser_rss_mb() == 0
+    child("run-driver")
+    assert browser_rss_mb() >= 60
+
+
+def test_sampling_tracks_the_peak(child):
+    with MemoryGuard("tests", 0, interval=0.01) as guard:
+        child()
+        time.sleep(0.05)
+    assert guard.peak_mb >= guard.peak_process_mb + 60
+
+
+def test_throttle_cuts_concurrency_over_the_ceiling_and_grows_it_back():
+    async def run(guard, limiter):
+        async with guard.throttle(limiter):
+            pass
+
+    guard = MemoryGuard("tests", 100)
+    limiter = AimdLimiter(8)
+    guard.current_mb = 150
+    asyncio.run(run(guard, limiter))
+    assert limiter.limit == 4 and guard.throttled == 1 and guard.min_limit == 4
+
+    guard.current_mb = 90  # under the ceiling but above the resume fraction: hold steady
+    asyncio.run(run(guard, limiter))
+    assert limiter.limit == 4
+    guard.current_mb = 50
+    asyncio.run(run(guard, limiter))
+    assert limiter.limit == 4.25
+
+
+def test_judges_are_fetched_while_discovery_is_still_walking(kc, site):
+    kc(60)
+    policy = RequestPolicy("judges", max_concurrency=4)
+    fetched_during_discovery = []
+
+    async def listing():
+        async for target in main.stream_breeds("http", 4, main.JUDGE_BREEDS, policy=policy):
+            yield target
+            if not fetched_during_discovery:
+                for _ in range(200):
+                    if site.calls["judge_profile"]:
+                        fetched_during_discovery.append(site.calls["judge_listing"])
+                        break
+                    await asyncio.sleep(0.01)
+
+    stats = asyncio.run(main.scrape_appointments_from_html(listing(), concurrency=4, policy=policy))
+    assert stats["judges"] == 60
+    assert fetched_during_discovery and fetched_during_discovery[0] < site.calls["judge_listing"]
@@ -0,0 +1,51 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from metrics import ERRORS, Registry, span
+
+
+def test_exposition_follows_the_prometheus_text_format():
+    registry = Registry()
+    pages = registry.counter("pages_total", "Pages.", ("kind", "status"))
+    limit = registry.gauge("limit", "Limit.", ("host",))
+    seconds = registry.histogram("stage_seconds", "Stage time.", ("stage",), buckets=(0.1, 1.0))
+    pages.inc(kind="profile", status=200)
+    pages.inc(2, kind="profile", status=200)
+    limit.set(4, host='kc "main"')
+    for value in (0.05, 0.5, 5.0):
+        seconds.observe(value, stage="fetch")
+
+    assert registry.expose().splitlines() == [
+        "# HELP pages_total Pages.",
+        "# TYPE pages_total counter",
+        'pages_total{kind="profile",status="200"} 3',
+        "# HELP limit Limit.",
+        "# TYPE limit gauge",
+        'limit{host="kc \\"main\\""} 4',
+        "# HELP stage_seconds Stage time.",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="fetch",le="0.1"} 1',
+        'stage_seconds_bucket{stage="fetch",le="1.0"} 2',
+        'stage_seconds_bucket{stage="fetch",le="+Inf"} 3',
+        'stage_seconds_sum{stage="fetch"} 5.55',
+        'stage_seconds_count{stage="fetch"} 3',
+    ]
+
+
+def test_a_failing_span_counts_an_error_for_its_stage():
+    before = ERRORS.value(pipeline="tests", stage="parse")
+    with pytest.raises(ValueError):
+        with span("parse", "tests"):
+            raise ValueError("bad page")
+    assert ERRORS.value(pipeline="tests", stage="parse") == before + 1
+
+
+def test_a_judge_run_shows_up_at_the_metrics_endpoint(kc):
+    kc(12)
+    with TestClient(main.app) as client:
+        assert client.get("/run/judges?discovery=http&refresh=full&wait=true").status_code == 200
+        text = client.get("/metrics").text
+    assert 'scrape_pages_fetched_total{pipeline="judges",kind="profile",status="200"}' in text
+    assert 'scrape_stage_seconds_count{pipeline="judges",stage="parse",kind="judge"}' in text
+    assert 'scrape_job_runs_total{job="judges",status="succeeded"}' in text
@@ -0,0 +1,63 @@
+import asyncio
+
+import main
+from fixture_server import FixtureCorpus
+from judge_parser import DEFAULT_BREED
+from judge_store import JudgeStore
+from test_judge_scrape import scrape
+
+LABRADOR = "Retriever (Labrador)"
+BREEDS = {DEFAULT_BREED: "golden-guid", LABRADOR: "labrador-guid"}
+
+
+def collect(listing):
+    async def run():
+        return [item async for item in listing]
+
+    return asyncio.run(run())
+
+
+def test_stream_breeds_merges_each_judges_breeds(monkeypatch):
+    listings = {DEFAULT_BREED: [{"a": "ga", "b": "gb"}], LABRADOR: [{"b": "lb"}, {"c": "lc"}]}
+
+    async def fake_links(mode, concurrency, breed, policy, report):
+        for cards in listings[breed]:
+            await asyncio.sleep(0)
+            yield cards
+
+    monkeypatch.setattr(main, "stream_judge_links", fake_links)
+    found = {url: (card, breeds) for url, card, breeds in collect(main.stream_breeds("http", 2, BREEDS))}
+    assert {url: breeds for url, (_, breeds) in found.items()} == {
+        "a": [DEFAULT_BREED], "b": [DEFAULT_BREED, LABRADOR], "c": [LABRADOR]}
+
+    # Joining another breed's listing changes the judge's card hash.
+    listings[LABRADOR] = [{"c": "lc"}]
+    again = {url: card for url, card, _ in collect(main.stream_breeds("http", 2, BREEDS))}
+    assert again["a"] == found["a"][0] and again["b"] != found["b"][0]
+
+
+def test_target_breeds_falls_back_to_the_first_breed(monkeypatch):
+    monkeypatch.setattr(main, "JUDGE_BREEDS", BREEDS)
+    store = JudgeStore()
+    try:
+        store.record_listing("listed", "judge-1", [LABRADOR], 0)
+        assert main.target_breeds(store, ["listed", "unknown"]) == {
+            "listed": {LABRADOR: "labrador-guid"}, "unknown": {DEFAULT_BREED: "golden-guid"}}
+    finally:
+        store.close()
+
+
+def test_a_judge_listed_under_two_breeds_is_saved_once_per_breed(kc, site, monkeypatch):
+    kc(12)
+    monkeypatch.setattr(main, "JUDGE_BREEDS", BREEDS)
+    stats = scrape(concurrency=4)
+    assert stats["judges"] == 12 and stats["failed"] == 0
+    assert site.calls["judge_profile"] == 12
+    store = JudgeStore()
+    try:
+        rows = dict(store.conn.execute("SELECT breed, COUNT(*) FROM judges GROUP BY breed").fetchall())
+        result = store.get_result(FixtureCorpus.judge_id(0), LABRADOR)
+    finally:
+        store.close()
+    assert rows == {DEFAULT_BREED: 12, LABRADOR: 12}
+    assert result["breed"] == LABRADOR
@@ -0,0 +1,61 @@
+import asyncio
+import os
+
+import pytest
+
+import main
+from conftest import JUDGE_ID
+from judge_parser import DEFAULT_BREED, parse_judge
+from judge_store import JudgeStore
+from parse_pool import ParsePool
+from test_judge_scrape import scrape
+
+
+def die_once(marker):
+    """Kill the parser process the first time, answer the second."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+@pytest.fixture
+def workers():
+    pool = ParsePool(2)
+    yield pool
+    pool.shutdown()
+
+
+def test_no_workers_parses_inline():
+    pool = ParsePool(0)
+    assert asyncio.run(pool.run(os.getpid)) == os.getpid()
+    assert pool._executor is None
+
+
+def test_workers_parse_in_other_processes_with_the_same_result(workers, judge_pages, judge_result):
+    profile, appointments = judge_pages
+    pid = asyncio.run(workers.run(os.getpid))
+    assert pid != os.getpid()
+    parsed = asyncio.run(workers.run(parse_judge, JUDGE_ID, profile, {DEFAULT_BREED: appointments}))
+    assert parsed[DEFAULT_BREED] == judge_result
+
+
+def test_a_dead_parser_process_is_replaced(workers, tmp_path):
+    assert asyncio.run(workers.run(die_once, str(tmp_path / "died"))) != os.getpid()
+
+
+def test_a_scrape_stores_the_same_results_with_workers(kc, workers, monkeypatch):
+    def results():
+        store = JudgeStore()
+        try:
+            return store.conn.execute("SELECT judge_id, breed, result_json FROM judges ORDER BY judge_id").fetchall()
+        finally:
+            store.close()
+
+    kc(12)
+    scrape(concurrency=4)
+    inline = results()
+    os.remove("judges.db")
+    monkeypatch.setattr(main, "parse_pool", workers)
+    assert scrape(concurrency=4)["judges"] == 12 and workers._executor is not None
+    assert results() == inline
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+import request_policy
+from request_policy import AimdLimiter, HostState, RequestPolicy, TokenBucket, parse_retry_after
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after("5") == 5
+    assert parse_retry_after("-3") == 0
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after("86400") == request_policy.RETRY_AFTER_MAX
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_token_bucket_spaces_requests_at_its_rate():
+    async def take(bucket, n):
+        started = time.monotonic()
+        for _ in range(n):
+            await bucket.take()
+        return time.monotonic() - started
+
+    assert asyncio.run(take(TokenBucket(50, burst=1), 6)) == pytest.approx(0.1, abs=0.05)
+    assert asyncio.run(take(TokenBucket(0), 100)) < 0.05
+
+
+def test_aimd_halves_once_per_throttle_event_and_grows_back_slowly():
+    limiter = AimdLimiter(8)
+    assert limiter.decrease() and limiter.limit == 4
+    assert not limiter.decrease() and limiter.limit == 4
+    limiter.increase()
+    assert limiter.limit == 4.25
+    limiter._last_decrease -= AimdLimiter.DECREASE_INTERVAL
+    assert limiter.decrease() and limiter.limit == 2.125
+    for _ in range(100):
+        limiter.increase()
+    assert limiter.limit == 8
+
+
+def test_breaker_opens_probes_once_and_closes_on_success():
+    async def run():
+        host = HostState("kc", rate=0, max_concurrency=4, pipeline="tests", breaker_failures=2, breaker_cooldown=0.05)
+        host.failure()
+        assert not host.open_until
+        host.failure()
+        assert host.open_until > time.monotonic()
+        started = time.monotonic()
+        assert await host.ready() is True
+        assert time.monotonic() - started >= 0.04
+        waiting = asyncio.create_task(host.ready())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()  # only one probe while half-open
+        host.success()
+        assert await waiting is False
+        return host
+
+    host = asyncio.run(run())
+    assert not host.open_until and not host.probing and host.failures == 0
+
+
+def test_a_failed_probe_reopens_with_a_longer_cooldown():
+    async def run():
+        host = HostState("kc", rate=0, max_concurrency=4, pipeline="tests", breaker_failures=1, breaker_cooldown=0.02)
+        host.failure()
+        assert await host.ready()
+        host.failure()
+        return host
+
+    host = asyncio.run(run())
+    assert host.cooldown == 0.04 and host.open_until and not host.probing
+
+
+def request():
+    return httpx.Request("GET", "https://kc.test/judge")
+
+
+def test_send_retries_throttling_and_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(request_policy, "backoff_delay", lambda attempt: 0)
+    responses = [httpx.Response(503, headers={"Retry-After": "0.05"}), httpx.Response(200, text="ok")]
+    sent = []
+
+    async def send(req):
+        sent.append(time.monotonic())
+        return responses.pop(0)
+
+    policy = RequestPolicy("tests", max_concurrency=4)
+    resp = asyncio.run(policy.send(request(), send))
+    assert resp.status_code == 200 and len(sent) == 2
+    assert sent[1] - sent[0] >= 0.05
+    # Halved from 4 by the 503, then one success's worth of additive increase.
+    assert policy.host("kc.test").aimd.limit == 2.5
+
+
+def test_send_gives_up_after_max_retries():
+    async def send(req):
+        raise httpx.ConnectError("refused")
+
+    policy = RequestPolicy("tests", max_retries=1)
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(policy.send(request(), send))
+    assert policy.host("kc.test").failures == 2
+
+
+@pytest.mark.parametrize("outcome", ["cancelled", "error"])
+def test_a_probe_that_ends_without_an_outcome_frees_the_half_open_slot(outcome):
+    started = asyncio.Event()
+
+    async def send(req):
+        started.set()
+        if outcome == "error":
+            raise ValueError("unexpected")
+        await asyncio.sleep(10)
+
+    async def run():
+        policy = RequestPolicy("tests")
+        host = policy.host("kc.test")
+        host.open_until = time.monotonic()
+        probe = asyncio.create_task(policy.send(request(), send))
+        await started.wait()
+        probe.cancel()
+        results = await asyncio.gather(probe, return_exceptions=True)
+        assert isinstance(results[0], ValueError if outcome == "error" else asyncio.CancelledError)
+        assert not host.probing
+
+        async def ok(req):
+            return httpx.Response(200)
+
+        assert (await policy.send(request(), ok)).status_code == 200
+        return host
+
+    host = asyncio.run(run())
+    assert not host.open_until
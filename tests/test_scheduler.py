@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import scheduler as scheduler_module
+from jobs import JobRunner
+from scheduler import ScheduledJob, Scheduler, parse_duration
+
+DAY = 86400
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    """A fresh job runner for each test, so schedulers made here never listen to the app's."""
+    runner = JobRunner()
+    monkeypatch.setattr(scheduler_module, "runner", runner)
+    return runner
+
+
+def test_parse_duration():
+    assert parse_duration("90") == 90
+    assert parse_duration("90s") == 90
+    assert parse_duration("1h30m") == 5400
+    assert parse_duration("1.5d") == 1.5 * DAY
+    assert parse_duration(" @Daily ") == DAY
+    for bad in ("", "1w", "1h 30m", "soon"):
+        with pytest.raises(ValueError):
+            parse_duration(bad)
+
+
+def test_ticks_are_offset_multiples_of_the_interval():
+    job = ScheduledJob("judges", None, "1d", offset="27h", jitter="1d")
+    assert job.offset == 3 * 3600 and job.jitter == DAY / 2
+    midnight = 20000 * DAY
+    assert job.next_tick(midnight) == midnight + 3 * 3600
+    assert job.next_tick(midnight + 3 * 3600) == midnight + DAY + 3 * 3600
+    with pytest.raises(ValueError):
+        ScheduledJob("judges", None, "0s")
+
+
+def test_first_tick_follows_the_last_run_across_restarts(runner, workdir):
+    now = 20000 * DAY + 12 * 3600
+    scheduler = Scheduler("state.json")
+    job = scheduler.add("judges", None, "1d")
+    assert scheduler.first_tick(job, now) == 20001 * DAY
+
+    async def run():
+        started = runner.start("judges", asyncio.sleep, 0)[0]
+        await started.task
+        return started
+
+    started = asyncio.run(run())
+    restarted = Scheduler("state.json")
+    job = restarted.add("judges", None, "1d")
+    assert restarted.last_started("judges") == started.started_at
+    assert restarted.state["judges"]["last_status"] == "succeeded"
+    # A run three days ago means the tick after it was missed: it is due now, once.
+    restarted.state["judges"]["last_started"] = now - 3 * DAY
+    assert restarted.first_tick(job, now) == 19998 * DAY
+
+
+def test_a_tick_is_covered_by_a_run_since_it_was_due(runner):
+    async def run():
+        scheduler = Scheduler("state.json")
+        job = scheduler.add("judges", asyncio.sleep, "1h", jitter=0, delay=0)
+        scheduler.state["judges"] = {"last_started": 1000.0}
+        await scheduler._fire(job, 1000.0)
+        assert runner.running("judges") is None
+        await scheduler._fire(job, 1000.5)
+        assert runner.running("judges") is not None
+
+    asyncio.run(run())
+
+
+def test_scheduled_jobs_never_overlap(runner):
+    spans = []
+
+    async def work(tag):
+        spans.append((tag, "start"))
+        await asyncio.sleep(0.02)
+        spans.append((tag, "end"))
+
+    async def run():
+        scheduler = Scheduler("state.json")
+        judges = scheduler.add("judges", work, "1h", jitter=0, tag="judges")
+        critiques = scheduler.add("critiques", work, "1h", jitter=0, tag="critiques")
+        await scheduler._fire(judges, 1.0)
+        # Two ticks for the other job while the first runs: one waits, then starts; the other is skipped.
+        await asyncio.gather(scheduler._fire(critiques, 1.0), scheduler._fire(critiques, 2.0))
+        await runner.running("critiques").task
+
+    asyncio.run(run())
+    assert spans == [("judges", "start"), ("judges", "end"), ("critiques", "start"), ("critiques", "end")]
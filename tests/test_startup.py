@@ -0,0 +1,26 @@
+import base64
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# Heavy or credential-bound modules that must stay off the import path.
+LAZY_MODULES = ["googleapiclient", "google.oauth2", "playwright", "pyarrow"]
+
+CHECK = f"""
+import json, sys
+import main
+print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))
+"""
+
+
+def test_importing_the_app_loads_no_heavy_modules_and_decodes_no_credentials(workdir):
+    env = {**os.environ, "PYTHONPATH": ROOT,
+           "GOOGLE_SERVICE_ACCOUNT_BASE64": base64.b64encode(b'{"type": "service_account"}').decode()}
+    out = subprocess.run([sys.executable, "-c", CHECK], cwd=workdir, env=env, capture_output=True, text=True,
+                         check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
+    assert not os.path.exists(workdir / "credentials.json")
+    assert "Chromium" not in out.stdout